@@ -0,0 +1,179 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Extractions running at once; each already fans out across the whole worker pool
+DEFAULT_MAX_ACTIVE = 2
+# Extractions allowed to wait for a slot before new ones are rejected
+DEFAULT_MAX_QUEUED = 8
+# Background (cache-warming) extractions allowed to wait; they only run when no interactive one waits
+DEFAULT_MAX_BACKGROUND_QUEUED = 32
+# Retry-After used before any run duration has been observed
+DEFAULT_RETRY_AFTER_S = 10
+MAX_RETRY_AFTER_S = 300
+
+class QueueFull(Exception):
+    """Raised by AdmissionController.reserve when no slot or queue space is left."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Extraction queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class Ticket:
+    """
+    A reserved place in the extraction queue.
+    wait() blocks until admitted (False if cancelled first); release() frees
+    the slot, or leaves the queue when still waiting. Usable as a context manager.
+    """
+
+    def __init__(self, controller: "AdmissionController", ship_id: str, background: bool = False):
+        self.controller = controller
+        self.ship_id = ship_id
+        self.background = background
+        self.admitted = False
+        self.cancelled = False
+        self.released = False
+        self.admitted_at: Optional[float] = None
+        self._event = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        self._event.wait(timeout)
+        return self.admitted and not self.cancelled
+
+    def release(self):
+        self.controller._release(self)
+
+    def __enter__(self) -> "Ticket":
+        if not self.wait():
+            raise RuntimeError("Extraction was cancelled while queued")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class AdmissionController:
+    """
+    Global bounded work queue in front of the shared worker pool.
+    At most max_active extractions run at once and at most max_queued wait;
+    beyond that reserve() fails fast with a Retry-After estimate. Free slots go
+    to the waiting ship with the fewest running extractions (round-robin among
+    equals, FIFO within a ship), so one ship's burst cannot starve the others.
+    Background tickets (cache warming) have their own FIFO queue and are only
+    admitted when no interactive ticket waits, and never into the last slot.
+    """
+
+    def __init__(self, max_active: int = None, max_queued: int = None):
+        self.max_active = max_active or int(os.getenv("EXTRACT_MAX_ACTIVE", DEFAULT_MAX_ACTIVE))
+        self.max_queued = max_queued if max_queued is not None else int(
+            os.getenv("EXTRACT_MAX_QUEUED", DEFAULT_MAX_QUEUED))
+        self.max_background_queued = int(os.getenv("EXTRACT_MAX_BACKGROUND_QUEUED", DEFAULT_MAX_BACKGROUND_QUEUED))
+        # One slot stays free for interactive requests (unless there is only one)
+        self.max_background_active = max(1, self.max_active - 1)
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, Deque[Ticket]] = {}
+        self._rotation: Deque[str] = deque()
+        self._active: Dict[str, int] = {}
+        self._active_total = 0
+        self._queued_total = 0
+        self._background: Deque[Ticket] = deque()
+        self._background_active = 0
+        # Exponentially weighted mean run time, for Retry-After
+        self._avg_run_s: Optional[float] = None
+
+    def reserve(self, ship_id: str, background: bool = False) -> Ticket:
+        """Non-blocking: queues a ticket or raises QueueFull."""
+        with self._lock:
+            if background:
+                if len(self._background) >= self.max_background_queued:
+                    raise QueueFull(self._retry_after())
+                ticket = Ticket(self, ship_id, background=True)
+                self._background.append(ticket)
+                self._dispatch()
+                return ticket
+            if self._active_total >= self.max_active and self._queued_total >= self.max_queued:
+                raise QueueFull(self._retry_after())
+            ticket = Ticket(self, ship_id)
+            if ship_id not in self._waiting:
+                self._waiting[ship_id] = deque()
+                self._rotation.append(ship_id)
+            self._waiting[ship_id].append(ticket)
+            self._queued_total += 1
+            self._dispatch()
+            return ticket
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self._active_total, "queued": self._queued_total,
+                    "max_active": self.max_active, "max_queued": self.max_queued,
+                    "background_active": self._background_active, "background_queued": len(self._background)}
+
+    def _dispatch(self):
+        while self._active_total < self.max_active:
+            if self._rotation:
+                ship_id = min(self._rotation, key=lambda s: self._active.get(s, 0))
+                self._rotation.remove(ship_id)
+                queue = self._waiting[ship_id]
+                ticket = queue.popleft()
+                if queue:
+                    self._rotation.append(ship_id)
+                else:
+                    del self._waiting[ship_id]
+                self._queued_total -= 1
+            elif self._background and self._background_active < self.max_background_active:
+                ticket = self._background.popleft()
+                ship_id = ticket.ship_id
+                self._background_active += 1
+            else:
+                break
+            self._active[ship_id] = self._active.get(ship_id, 0) + 1
+            self._active_total += 1
+            ticket.admitted = True
+            ticket.admitted_at = time.monotonic()
+            ticket._event.set()
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted:
+                self._active[ticket.ship_id] -= 1
+                if not self._active[ticket.ship_id]:
+                    del self._active[ticket.ship_id]
+                self._active_total -= 1
+                if ticket.background:
+                    self._background_active -= 1
+                self._record_run(time.monotonic() - ticket.admitted_at)
+            else:
+                # Cancelled while queued
+                if ticket.background:
+                    self._background.remove(ticket)
+                    ticket.cancelled = True
+                    ticket._event.set()
+                    self._dispatch()
+                    return
+                queue = self._waiting[ticket.ship_id]
+                queue.remove(ticket)
+                if not queue:
+                    del self._waiting[ticket.ship_id]
+                    self._rotation.remove(ticket.ship_id)
+                self._queued_total -= 1
+                ticket.cancelled = True
+                ticket._event.set()
+            self._dispatch()
+
+    def _record_run(self, seconds: float):
+        if self._avg_run_s is None:
+            self._avg_run_s = seconds
+        else:
+            self._avg_run_s = 0.8 * self._avg_run_s + 0.2 * seconds
+
+    def _retry_after(self) -> int:
+        if self._avg_run_s is None:
+            return DEFAULT_RETRY_AFTER_S
+        # Time for the queue ahead to drain through the active slots
+        estimate = self._avg_run_s * (self._queued_total + 1) / self.max_active
+        return max(1, min(MAX_RETRY_AFTER_S, math.ceil(estimate)))
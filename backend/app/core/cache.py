@@ -1,46 +1,553 @@
 import hashlib
 import json
 import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
-CACHE_DIR = Path(__file__).parent.parent.parent / "cache_store"
-CACHE_DIR.mkdir(exist_ok=True)
+# EXTRACT_CACHE_DIR lets spawned workers and tests share a non-default location
+CACHE_DIR = Path(os.getenv("EXTRACT_CACHE_DIR") or Path(__file__).parent.parent.parent / "cache_store")
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Read buffer for content hashing; large reads keep hashing I/O-bound
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Disk budget for everything under CACHE_DIR; eviction trims to EVICT_TARGET of it
+DEFAULT_CACHE_MAX_MB = 512
+DEFAULT_CACHE_TTL_DAYS = 30
+EVICT_TARGET = 0.9
+# Writes between full rescans of CACHE_DIR (other processes write too)
+RESCAN_EVERY = 200
+# Decoded per-file results kept in process memory in front of ExtractionCache
+DEFAULT_MEMORY_CACHE_ENTRIES = 256
+# Ships whose final summary is kept in process memory
+DEFAULT_SUMMARY_CACHE_ENTRIES = 64
+
+def hash_file(file_path: str) -> str:
+    """MD5 of a file's content, read in HASH_CHUNK_SIZE blocks."""
+    hash_md5 = hashlib.md5()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hash_md5.update(view[:n])
+    return hash_md5.hexdigest()
+
+class CacheStats:
+    """
+    Per-process hit / miss / write / eviction counters by cache tier.
+    Worker processes return drain() with each shard and the API process
+    merge()s it, so the stats endpoint sees the whole pool.
+    """
+    _counters: Dict[str, Dict[str, int]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def incr(cls, tier: str, name: str, amount: int = 1):
+        with cls._lock:
+            counters = cls._counters.setdefault(tier, {})
+            counters[name] = counters.get(name, 0) + amount
+
+    @classmethod
+    def drain(cls) -> Dict[str, Dict[str, int]]:
+        with cls._lock:
+            drained, cls._counters = cls._counters, {}
+        return drained
+
+    @classmethod
+    def merge(cls, delta: Optional[Dict[str, Dict[str, int]]]):
+        for tier, counters in (delta or {}).items():
+            for name, amount in counters.items():
+                cls.incr(tier, name, amount)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, int]]:
+        with cls._lock:
+            return {tier: dict(counters) for tier, counters in cls._counters.items()}
+
+class FileCacheBackend:
+    """
+    One JSON document per key under CACHE_DIR/<tier>.
+    Writes go to a temp file that is renamed over the entry, so a concurrent
+    reader sees the old or the new document, never a torn one.
+    A hit refreshes the entry's mtime, so mtime order is least-recently-used order.
+    """
+    name = "file"
+    # ExtractionCache entries live directly in CACHE_DIR
+    TIER_DIRS = {"files": ""}
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, tier: str, key: str) -> Path:
+        return self.root / self.TIER_DIRS.get(tier, tier) / f"{key}.json"
+
+    def get(self, tier: str, key: str) -> Optional[Dict[str, Any]]:
+        cache_file = self.path(tier, key)
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            # Missing, evicted by another process, or unreadable
+            return None
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return data
+
+    def set(self, tier: str, key: str, data: Dict[str, Any]) -> int:
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        cache_file = self.path(tier, key)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_file, cache_file)
+        return len(payload)
+
+    def scan(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of every cache entry."""
+        entries = []
+        for path in self.root.rglob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def usage(self) -> Dict[str, int]:
+        entries = self.scan()
+        return {"bytes": sum(size for _, size, _ in entries), "entries": len(entries)}
+
+    def evict(self, target_bytes: float, expires_before: float) -> Tuple[int, int, int]:
+        """Returns (evicted entries, evicted bytes, bytes left)."""
+        entries = sorted(self.scan(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        evicted = evicted_bytes = 0
+        for mtime, size, path in entries:
+            if mtime >= expires_before and total <= target_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+            evicted_bytes += size
+        return evicted, evicted_bytes, total
+
+class SqliteCacheBackend:
+    """
+    All tiers in one SQLite database (CACHE_DIR/cache.sqlite3) in WAL mode:
+    readers never block the writer, and an upsert is one atomic statement,
+    so pool workers can share it safely. Payloads are compact JSON, zlib-compressed.
+    """
+    name = "sqlite"
+    DB_NAME = "cache.sqlite3"
+    COMPRESS_LEVEL = 6
+    SETUP_ATTEMPTS = 50
+    # Switching to WAL takes an exclusive lock that skips the busy timeout,
+    # so concurrent first connections are serialized here and retried across processes
+    _setup_lock = threading.Lock()
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.db_path = root / self.DB_NAME
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        with self._setup_lock:
+            for attempt in range(self.SETUP_ATTEMPTS):
+                try:
+                    self._setup(conn)
+                    break
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or attempt == self.SETUP_ATTEMPTS - 1:
+                        conn.close()
+                        raise
+                    time.sleep(0.05)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _setup(conn: sqlite3.Connection):
+        # auto_vacuum only takes effect on a new database; lets evict() return space to the disk
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " tier TEXT NOT NULL, key TEXT NOT NULL, payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (tier, key)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @classmethod
+    def encode(cls, data: Dict[str, Any]) -> bytes:
+        return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                             cls.COMPRESS_LEVEL)
+
+    @staticmethod
+    def decode(payload: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def get(self, tier: str, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute("SELECT payload FROM entries WHERE tier = ? AND key = ?", (tier, key)).fetchone()
+        if row is None:
+            return None
+        try:
+            data = self.decode(row[0])
+        except (zlib.error, ValueError):
+            return None
+        conn.execute("UPDATE entries SET accessed = ? WHERE tier = ? AND key = ?", (time.time(), tier, key))
+        return data
+
+    def set(self, tier: str, key: str, data: Dict[str, Any]) -> int:
+        payload = self.encode(data)
+        self._connect().execute(
+            "INSERT INTO entries (tier, key, payload, size, accessed) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (tier, key) DO UPDATE SET"
+            " payload = excluded.payload, size = excluded.size, accessed = excluded.accessed",
+            (tier, key, payload, len(payload), time.time())
+        )
+        return len(payload)
+
+    def usage(self) -> Dict[str, int]:
+        total, count = self._connect().execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+        return {"bytes": total, "entries": count}
+
+    def evict(self, target_bytes: float, expires_before: float) -> Tuple[int, int, int]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            doomed = []
+            evicted_bytes = 0
+            for tier, key, size, accessed in conn.execute(
+                    "SELECT tier, key, size, accessed FROM entries ORDER BY accessed").fetchall():
+                if accessed >= expires_before and total <= target_bytes:
+                    break
+                doomed.append((tier, key))
+                total -= size
+                evicted_bytes += size
+            conn.executemany("DELETE FROM entries WHERE tier = ? AND key = ?", doomed)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if doomed:
+            conn.execute("PRAGMA incremental_vacuum")
+        return len(doomed), evicted_bytes, total
+
+CACHE_BACKENDS = {"file": FileCacheBackend, "sqlite": SqliteCacheBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Backend chosen by EXTRACT_CACHE_BACKEND ('file' by default, or 'sqlite')."""
+    global _backend
+    name = os.getenv("EXTRACT_CACHE_BACKEND", "file").lower()
+    with _backend_lock:
+        if _backend is None or _backend.name != name or _backend.root != CACHE_DIR:
+            if name not in CACHE_BACKENDS:
+                raise ValueError(f"Unknown EXTRACT_CACHE_BACKEND: {name}")
+            _backend = CACHE_BACKENDS[name](CACHE_DIR)
+        return _backend
+
+class CacheBudget:
+    """
+    Keeps the cache under a byte budget (EXTRACT_CACHE_MAX_MB) with LRU and
+    TTL (EXTRACT_CACHE_TTL_DAYS) eviction, whichever backend stores it.
+    """
+    _estimate: Optional[int] = None
+    _writes_since_scan = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def max_bytes() -> int:
+        return int(float(os.getenv("EXTRACT_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+
+    @staticmethod
+    def ttl_seconds() -> float:
+        return float(os.getenv("EXTRACT_CACHE_TTL_DAYS", DEFAULT_CACHE_TTL_DAYS)) * 86400
+
+    @classmethod
+    def usage(cls) -> Dict[str, int]:
+        return get_backend().usage()
+
+    @classmethod
+    def note_write(cls, nbytes: int):
+        """Tracks bytes written; a periodic rescan (which also applies the TTL) or an exceeded budget evicts."""
+        with cls._lock:
+            cls._writes_since_scan += 1
+            rescan = cls._estimate is None or cls._writes_since_scan >= RESCAN_EVERY
+            if not rescan:
+                cls._estimate += nbytes
+            needs_eviction = rescan or cls._estimate > cls.max_bytes()
+        if needs_eviction:
+            cls.evict()
+
+    @classmethod
+    def evict(cls, now: float = None) -> Tuple[int, int]:
+        """Drops expired entries, then least-recently-used ones down to EVICT_TARGET of the budget."""
+        now = now or time.time()
+        evicted, evicted_bytes, total = get_backend().evict(cls.max_bytes() * EVICT_TARGET,
+                                                            now - cls.ttl_seconds())
+        with cls._lock:
+            cls._estimate = total
+            cls._writes_since_scan = 0
+        if evicted:
+            CacheStats.incr("eviction", "entries", evicted)
+            CacheStats.incr("eviction", "bytes", evicted_bytes)
+        return evicted, evicted_bytes
+
+def _cache_get(tier: str, key: str) -> Optional[Dict[str, Any]]:
+    data = get_backend().get(tier, key)
+    CacheStats.incr(tier, "hits" if data is not None else "misses")
+    return data
+
+def _cache_set(tier: str, key: str, data: Dict[str, Any]):
+    written = get_backend().set(tier, key, data)
+    CacheStats.incr(tier, "writes")
+    CacheStats.incr(tier, "bytes_written", written)
+    CacheBudget.note_write(written)
 
 class ExtractionCache:
     """
-    Simple file-based cache mechanism.
-    Key: MD5 hash of the PDF file content.
+    Simple cache mechanism (file or SQLite backend, see get_backend).
+    Key: MD5 hash of the PDF file content (+ parser version).
     Value: Extracted JSON result.
     """
+    TIER = "files"
     
     @staticmethod
     def get_file_hash(file_path: str) -> str:
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-
-    @staticmethod
-    def get(file_path: str) -> Optional[Dict[str, Any]]:
-        file_hash = ExtractionCache.get_file_hash(file_path)
-        cache_file = CACHE_DIR / f"{file_hash}.json"
-        
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Verify metadata to ensure it's not stale logic? 
-                    # For now, strict content hash is enough.
-                    return data
-            except Exception:
-                return None
+        """
+        Content hash of the file. Unchanged files (same path, size and mtime)
+        are answered from FileHashIndex with a single stat call.
+        """
+        stat_result = os.stat(file_path)
+        file_hash = FileHashIndex.lookup(file_path, stat_result)
+        if file_hash is None:
+            file_hash = hash_file(file_path)
+            FileHashIndex.record(file_path, file_hash, stat_result)
+        return file_hash
+
+    @staticmethod
+    def _key(file_hash: str, version: str) -> str:
+        # Entries from another parser version are simply never read again and age out
+        return f"{file_hash}_{version}" if version else file_hash
+
+    @staticmethod
+    def get(file_path: str, file_hash: str = None, version: str = "") -> Optional[Dict[str, Any]]:
+        file_hash = file_hash or ExtractionCache.get_file_hash(file_path)
+        return _cache_get(ExtractionCache.TIER, ExtractionCache._key(file_hash, version))
+
+    @staticmethod
+    def set(file_path: str, data: Dict[str, Any], file_hash: str = None, version: str = ""):
+        file_hash = file_hash or ExtractionCache.get_file_hash(file_path)
+        _cache_set(ExtractionCache.TIER, ExtractionCache._key(file_hash, version), data)
+
+class _JsonDirCache:
+    """Key -> JSON document store; tier <SUBDIR> of the cache backend (CACHE_DIR/<SUBDIR> for files)."""
+    SUBDIR = ""
+
+    @classmethod
+    def _path(cls, key: str) -> Path:
+        return CACHE_DIR / cls.SUBDIR / f"{key}.json"
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Dict[str, Any]]:
+        return _cache_get(cls.SUBDIR, key)
+
+    @classmethod
+    def set(cls, key: str, data: Dict[str, Any]):
+        _cache_set(cls.SUBDIR, key, data)
+
+class FileHashIndex(_JsonDirCache):
+    """
+    Key: the file's absolute path.
+    Value: size, mtime and content hash when it was last hashed (or uploaded).
+    Entries are also kept in process memory, so repeated lookups skip the disk.
+    """
+    SUBDIR = "hashes"
+    _memory: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return hashlib.md5(str(Path(file_path).resolve()).encode()).hexdigest()
+
+    @classmethod
+    def lookup(cls, file_path: str, stat_result: os.stat_result = None) -> Optional[str]:
+        stat_result = stat_result or os.stat(file_path)
+        key = cls._key(file_path)
+        entry = cls._memory.get(key) or cls.get(key)
+        if entry and entry["size"] == stat_result.st_size and entry["mtime_ns"] == stat_result.st_mtime_ns:
+            cls._memory[key] = entry
+            return entry["hash"]
         return None
 
+    @classmethod
+    def record(cls, file_path: str, file_hash: str, stat_result: os.stat_result = None):
+        stat_result = stat_result or os.stat(file_path)
+        entry = {
+            "path": str(file_path),
+            "size": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "hash": file_hash
+        }
+        key = cls._key(file_path)
+        cls._memory[key] = entry
+        cls.set(key, entry)
+
+class PageCache(_JsonDirCache):
+    """
+    Second cache tier below ExtractionCache.
+    Key: content fingerprint of a single page (see AdvancedCableParser.page_fingerprint)
+    + parser version.
+    Value: that page's parsed cables and misses.
+    A drawing revision that edits a few pages re-parses only those pages.
+    """
+    SUBDIR = "pages"
+
+class TextLayerCache(_JsonDirCache):
+    """
+    Raw text layer of a page, independent of the parsing rules.
+    Key: file hash + page number + text-extraction settings.
+    Value: page text and word boxes, so rule changes re-run only the regex stage.
+    """
+    SUBDIR = "text"
+
+    @staticmethod
+    def key(file_hash: str, page_num: int, settings: Dict[str, Any]) -> str:
+        settings_hash = hashlib.md5(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+        return f"{file_hash}_p{page_num}_{settings_hash}"
+
+class MemoryCache:
+    """
+    Per-process LRU tier in front of ExtractionCache, bounded by
+    EXTRACT_MEMORY_CACHE_ENTRIES (0 disables it).
+    Key: file hash + parser version, like ExtractionCache.
+    Value: the decoded result, shared rather than copied, so callers must not mutate it.
+    A repeat extraction of an unchanged file skips the disk read, json.load and decoding.
+    """
+    TIER = "memory"
+    _entries: "OrderedDict[str, Any]" = OrderedDict()
+    _lock = threading.Lock()
+
     @staticmethod
-    def set(file_path: str, data: Dict[str, Any]):
-        file_hash = ExtractionCache.get_file_hash(file_path)
-        cache_file = CACHE_DIR / f"{file_hash}.json"
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+    def max_entries() -> int:
+        return int(os.getenv("EXTRACT_MEMORY_CACHE_ENTRIES", DEFAULT_MEMORY_CACHE_ENTRIES))
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Any]:
+        with cls._lock:
+            value = cls._entries.get(key)
+            if value is not None:
+                cls._entries.move_to_end(key)
+        CacheStats.incr(cls.TIER, "hits" if value is not None else "misses")
+        return value
+
+    @classmethod
+    def set(cls, key: str, value: Any):
+        limit = cls.max_entries()
+        if limit <= 0:
+            return
+        with cls._lock:
+            cls._entries[key] = value
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > limit:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        with cls._lock:
+            return len(cls._entries)
+
+class SummaryCache:
+    """
+    Per-process memo of each ship's final ExtractionSummary, bounded by
+    EXTRACT_SUMMARY_CACHE_ENTRIES ships (0 disables it).
+    Key: ship ID. An entry only counts for the same digest (sorted content hashes
+    of the ship's files + parser version), so an added, replaced or removed file
+    is a miss; IStorageService changes also invalidate() the ship right away.
+    """
+    TIER = "summary"
+    _entries: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def max_entries() -> int:
+        return int(os.getenv("EXTRACT_SUMMARY_CACHE_ENTRIES", DEFAULT_SUMMARY_CACHE_ENTRIES))
+
+    @staticmethod
+    def digest(file_hashes: List[str], version: str) -> str:
+        return hashlib.md5("\n".join(sorted(file_hashes) + [version]).encode()).hexdigest()
+
+    @classmethod
+    def get(cls, ship_id: str, digest: str) -> Optional[Any]:
+        with cls._lock:
+            entry = cls._entries.get(ship_id)
+            summary = entry[1] if entry and entry[0] == digest else None
+            if summary is not None:
+                cls._entries.move_to_end(ship_id)
+        CacheStats.incr(cls.TIER, "hits" if summary is not None else "misses")
+        return summary
+
+    @classmethod
+    def set(cls, ship_id: str, digest: str, summary: Any):
+        limit = cls.max_entries()
+        if limit <= 0:
+            return
+        with cls._lock:
+            cls._entries[ship_id] = (digest, summary)
+            cls._entries.move_to_end(ship_id)
+            while len(cls._entries) > limit:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, ship_id: str):
+        with cls._lock:
+            cls._entries.pop(ship_id, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters since startup plus current disk usage against the budget."""
+    tiers = CacheStats.snapshot()
+    evicted = tiers.pop("eviction", {})
+    return {
+        "backend": get_backend().name,
+        **CacheBudget.usage(),
+        "max_bytes": CacheBudget.max_bytes(),
+        "ttl_seconds": CacheBudget.ttl_seconds(),
+        "evictions": evicted.get("entries", 0),
+        "evicted_bytes": evicted.get("bytes", 0),
+        "memory_entries": MemoryCache.size(),
+        "tiers": tiers,
+    }
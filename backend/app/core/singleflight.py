@@ -0,0 +1,36 @@
+import concurrent.futures
+import threading
+from typing import Any, Dict, Tuple
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key within a process.
+    The first acquire() of a key leads and must resolve() it; callers that
+    acquire it while the leader is still running get the same Future and wait
+    on it instead of repeating the work. Resolving with None tells them the
+    leader gave up (failed or abandoned), so they should compute it themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, concurrent.futures.Future] = {}
+
+    def acquire(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """(future, True) for the leader, (the leader's future, False) for followers."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = concurrent.futures.Future()
+            self._flights[key] = future
+            return future, True
+
+    def resolve(self, key: str, result: Any):
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
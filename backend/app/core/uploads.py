@@ -0,0 +1,245 @@
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from .cache import HASH_CHUNK_SIZE
+
+# Resumable uploads are staged here; None = the system temp directory
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+# Largest chunk accepted per request of a resumable upload
+DEFAULT_UPLOAD_CHUNK_MB = 8
+# Resumable uploads untouched for this long are discarded
+DEFAULT_UPLOAD_SESSION_TTL_HOURS = 24
+# Caps on what one ZIP upload may expand to (decompression bombs)
+DEFAULT_ARCHIVE_MAX_MEMBERS = 1000
+DEFAULT_ARCHIVE_MAX_MEMBER_MB = 512
+DEFAULT_ARCHIVE_MAX_TOTAL_MB = 4096
+
+class HashingReader(io.RawIOBase):
+    """
+    Read-only view of a seekable upload spool that MD5-hashes bytes as the parser
+    reads them, so parsing is also the hashing pass and nothing is copied.
+    Reads extending the hashed prefix are hashed once, in order; hexdigest()
+    reads only what the parser skipped. Closing it leaves the spool open.
+    """
+
+    def __init__(self, file_obj: BinaryIO):
+        super().__init__()
+        self._file = file_obj
+        self._file.seek(0)
+        self._md5 = hashlib.md5()
+        self._hashed = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._file.tell()
+        data = self._file.read(size)
+        end = start + len(data)
+        if start <= self._hashed < end:
+            self._md5.update(memoryview(data)[self._hashed - start:])
+            self._hashed = end
+        return data
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def hexdigest(self) -> str:
+        position = self._file.tell()
+        self._file.seek(self._hashed)
+        for chunk in iter(lambda: self._file.read(HASH_CHUNK_SIZE), b""):
+            self._md5.update(chunk)
+            self._hashed += len(chunk)
+        self._file.seek(position)
+        return self._md5.hexdigest()
+
+class UploadConflict(Exception):
+    """Raised by UploadSessions.append for a chunk that does not start where the upload stands."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload continues at byte {offset}")
+        self.offset = offset
+
+class ArchiveTooLarge(ValueError):
+    """Raised by iter_archive_members for an archive over the member count or expanded size caps."""
+
+class UploadSessions:
+    """
+    Resumable uploads: a file declared up front (ship, name, size, hex MD5)
+    and received as consecutive byte ranges into root/<upload_id>.part, with
+    the declaration in root/<upload_id>.json, so a session survives a dropped
+    connection or a server restart. The received length is the .part file's
+    size; a client asks for it and continues from there. The MD5 is kept
+    running as chunks arrive (rebuilt from the .part file after a restart),
+    so the finished upload is never read again to verify it.
+    """
+
+    def __init__(self, root: Path = None, max_chunk_mb: int = None, ttl_hours: float = None):
+        self.root = root or Path(UPLOAD_TMP_DIR or tempfile.gettempdir()) / "seastar_uploads"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_chunk_bytes = (max_chunk_mb or int(os.getenv("UPLOAD_CHUNK_MB", DEFAULT_UPLOAD_CHUNK_MB))) * 1024 * 1024
+        self.ttl_seconds = (ttl_hours or float(os.getenv("UPLOAD_SESSION_TTL_HOURS", DEFAULT_UPLOAD_SESSION_TTL_HOURS))) * 3600
+        self._lock = threading.Lock()
+        # upload_id -> (bytes hashed, running MD5)
+        self._hashes: Dict[str, Tuple[int, Any]] = {}
+
+    def _paths(self, upload_id: str):
+        # IDs come from URLs: accept only what create() hands out
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+            raise KeyError(upload_id)
+        return self.root / f"{upload_id}.json", self.root / f"{upload_id}.part"
+
+    def create(self, ship_id: str, filename: str, size: int, md5: str) -> Dict[str, Any]:
+        """A new session, or the unfinished one for the same ship, name and content."""
+        self.purge()
+        with self._lock:
+            for meta_path in self.root.glob("*.json"):
+                session = self.get(meta_path.stem)
+                if session and (session["ship_id"], session["filename"], session["md5"]) == (ship_id, filename, md5):
+                    return session
+            upload_id = uuid.uuid4().hex
+            meta_path, part_path = self._paths(upload_id)
+            part_path.touch()
+            session = {"upload_id": upload_id, "ship_id": ship_id, "filename": filename, "size": size, "md5": md5}
+            tmp_path = meta_path.with_name(f"{meta_path.name}.tmp")
+            tmp_path.write_text(json.dumps(session), encoding="utf-8")
+            os.replace(tmp_path, meta_path)
+        return {**session, "offset": 0}
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """The session's declaration plus its received length (offset), or None."""
+        try:
+            meta_path, part_path = self._paths(upload_id)
+            session = json.loads(meta_path.read_text(encoding="utf-8"))
+            return {**session, "offset": part_path.stat().st_size}
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def append(self, upload_id: str, start: int, data: bytes) -> Dict[str, Any]:
+        """Writes data at start, which must be the current offset; returns the updated session."""
+        with self._lock:
+            session = self.get(upload_id)
+            if session is None:
+                raise KeyError(upload_id)
+            if start != session["offset"] or start + len(data) > session["size"]:
+                raise UploadConflict(session["offset"])
+            hash_md5 = self._running_md5(upload_id, start)
+            with open(self._paths(upload_id)[1], "ab") as f:
+                f.write(data)
+            hash_md5.update(data)
+            self._hashes[upload_id] = (start + len(data), hash_md5)
+        session["offset"] += len(data)
+        return session
+
+    def _running_md5(self, upload_id: str, offset: int):
+        """The MD5 of the first offset bytes received, from memory or (after a restart) the .part file."""
+        hashed, hash_md5 = self._hashes.get(upload_id, (None, None))
+        if hashed == offset:
+            return hash_md5
+        hash_md5 = hashlib.md5()
+        with open(self._paths(upload_id)[1], "rb") as f:
+            for chunk in iter(lambda: f.read(min(HASH_CHUNK_SIZE, offset - f.tell())), b""):
+                hash_md5.update(chunk)
+        return hash_md5
+
+    def verify(self, upload_id: str) -> bool:
+        """Whether the received bytes are complete and match the declared MD5."""
+        with self._lock:
+            session = self.get(upload_id)
+            return (session is not None and session["offset"] == session["size"]
+                    and self._running_md5(upload_id, session["offset"]).hexdigest() == session["md5"])
+
+    def path(self, upload_id: str) -> Path:
+        """The received bytes; storage may take the file over once the upload is verified."""
+        return self._paths(upload_id)[1]
+
+    def discard(self, upload_id: str):
+        self._hashes.pop(upload_id, None)
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge(self):
+        """Discards sessions untouched for longer than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for part_path in self.root.glob("*.part"):
+            try:
+                if part_path.stat().st_mtime < cutoff:
+                    self.discard(part_path.stem)
+            except (KeyError, OSError):
+                pass
+
+def iter_archive_members(file_obj: BinaryIO, suffixes: Tuple[str, ...], max_members: int = None,
+                         max_member_mb: int = None, max_total_mb: int = None) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    (file name, stream) of each ZIP member ending in one of suffixes, in archive order.
+    Each stream decompresses as it is read and is only valid until the next member;
+    nothing is unpacked to disk. Folders are flattened; a name seen before (e.g.
+    R0/E-101.pdf and R1/E-101.pdf) gets a counter, "E-101 (2).pdf", so every member
+    is a distinct file. file_obj must be seekable. Raises zipfile.BadZipFile, and
+    ArchiveTooLarge before the first member if the archive is over the caps
+    (ARCHIVE_MAX_MEMBERS, ARCHIVE_MAX_MEMBER_MB, ARCHIVE_MAX_TOTAL_MB).
+    """
+    max_members = max_members or int(os.getenv("ARCHIVE_MAX_MEMBERS", DEFAULT_ARCHIVE_MAX_MEMBERS))
+    max_member_bytes = (max_member_mb or int(os.getenv("ARCHIVE_MAX_MEMBER_MB", DEFAULT_ARCHIVE_MAX_MEMBER_MB))) * 1024 * 1024
+    max_total_bytes = (max_total_mb or int(os.getenv("ARCHIVE_MAX_TOTAL_MB", DEFAULT_ARCHIVE_MAX_TOTAL_MB))) * 1024 * 1024
+    # Lower-cased, as case-insensitive filesystems would see them
+    taken = set()
+    with zipfile.ZipFile(file_obj) as archive:
+        members = []
+        for info in archive.infolist():
+            name = info.filename.replace("\\", "/").rsplit("/", 1)[-1]
+            # Skip folders, macOS resource forks and hidden files
+            if (info.is_dir() or info.filename.startswith("__MACOSX/") or name.startswith(".")
+                    or not name.lower().endswith(suffixes)):
+                continue
+            stem, suffix = os.path.splitext(name)
+            count = 1
+            while name.lower() in taken:
+                count += 1
+                name = f"{stem} ({count}){suffix}"
+            taken.add(name.lower())
+            members.append((name, info))
+
+        # Declared sizes are binding: zipfile never expands a member past its file_size
+        if len(members) > max_members:
+            raise ArchiveTooLarge(f"Archive holds {len(members)} files; the limit is {max_members}")
+        for name, info in members:
+            if info.file_size > max_member_bytes:
+                raise ArchiveTooLarge(f"{name} expands to {info.file_size} bytes; the limit is {max_member_bytes}")
+        total = sum(info.file_size for _, info in members)
+        if total > max_total_bytes:
+            raise ArchiveTooLarge(f"Archive expands to {total} bytes; the limit is {max_total_bytes}")
+
+        for name, info in members:
+            with archive.open(info) as member:
+                yield name, member
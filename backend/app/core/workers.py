@@ -0,0 +1,180 @@
+import concurrent.futures
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_SELF = Path("/proc/self")
+
+# Peak RSS budget for one pdfplumber worker on large drawings
+DEFAULT_WORKER_MEMORY_MB = 512
+# Memory kept back for the API process itself
+RESERVED_MEMORY_MB = 256
+# Recycle workers periodically to contain pdfplumber memory growth
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+
+def _read_first_line(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip().split("\n")[0]
+    except OSError:
+        return None
+
+def detect_cpu_limit(cgroup_root: Path = CGROUP_ROOT) -> float:
+    """
+    Effective CPU count: cgroup quota (v2 cpu.max or v1 cfs quota) capped by
+    the scheduler affinity mask. os.cpu_count() alone reports host cores.
+    """
+    try:
+        available = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        available = float(os.cpu_count() or 1)
+
+    quota = None
+    cpu_max = _read_first_line(cgroup_root / "cpu.max")
+    if cpu_max:
+        parts = cpu_max.split()
+        if len(parts) == 2 and parts[0] != "max":
+            quota = int(parts[0]) / int(parts[1])
+    else:
+        quota_us = _read_first_line(cgroup_root / "cpu" / "cpu.cfs_quota_us")
+        period_us = _read_first_line(cgroup_root / "cpu" / "cpu.cfs_period_us")
+        if quota_us and period_us and int(quota_us) > 0:
+            quota = int(quota_us) / int(period_us)
+
+    if quota:
+        return min(available, quota)
+    return available
+
+def detect_memory_limit(cgroup_root: Path = CGROUP_ROOT) -> Optional[int]:
+    """Container memory limit in bytes, or None when unlimited / not in a cgroup."""
+    mem_max = _read_first_line(cgroup_root / "memory.max")
+    if mem_max is None:
+        mem_max = _read_first_line(cgroup_root / "memory" / "memory.limit_in_bytes")
+    if not mem_max or mem_max == "max":
+        return None
+    limit = int(mem_max)
+    # cgroup v1 reports "unlimited" as a page-rounded LONG_MAX
+    if limit >= 1 << 60:
+        return None
+    return limit
+
+def default_pool_size(cgroup_root: Path = CGROUP_ROOT) -> int:
+    """
+    Worker count from the cgroup CPU and memory limits.
+    EXTRACT_WORKERS overrides; EXTRACT_WORKER_MEMORY_MB tunes the per-worker budget.
+    """
+    override = os.getenv("EXTRACT_WORKERS")
+    if override:
+        return max(1, int(override))
+
+    workers = max(1, math.floor(detect_cpu_limit(cgroup_root)))
+
+    memory_limit = detect_memory_limit(cgroup_root)
+    if memory_limit is not None:
+        worker_mb = int(os.getenv("EXTRACT_WORKER_MEMORY_MB", DEFAULT_WORKER_MEMORY_MB))
+        usable_mb = memory_limit // (1024 * 1024) - RESERVED_MEMORY_MB
+        workers = min(workers, max(1, usable_mb // worker_mb))
+
+    return workers
+
+def _proc_status_mb(field: str, proc_self: Path = PROC_SELF) -> Optional[float]:
+    """A kB field of /proc/self/status (VmRSS, VmHWM) in MB, or None without procfs."""
+    try:
+        for line in (proc_self / "status").read_text().splitlines():
+            if line.startswith(f"{field}:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+class PeakRSSWindow:
+    """
+    Peak resident memory (MB) of the calling process from construction on.
+    A pool worker outlives many shards, so its lifetime high-water mark
+    (ru_maxrss) says nothing about the current one. The kernel's mark is
+    reset instead (Linux /proc/self/clear_refs); where that is not allowed,
+    RSS sampled at both ends of the window stands in for the peak.
+    peak_mb() is None without procfs.
+    """
+
+    def __init__(self, proc_self: Path = PROC_SELF):
+        self.proc_self = proc_self
+        try:
+            (proc_self / "clear_refs").write_text("5")
+            self.reset = True
+        except OSError:
+            self.reset = False
+        self.start_mb = _proc_status_mb("VmRSS", proc_self)
+
+    def peak_mb(self) -> Optional[float]:
+        if self.reset:
+            return _proc_status_mb("VmHWM", self.proc_self)
+        end_mb = _proc_status_mb("VmRSS", self.proc_self)
+        samples = [mb for mb in (self.start_mb, end_mb) if mb is not None]
+        return max(samples) if samples else None
+
+def warm_worker():
+    """Pool initializer: import the parser stack once per worker process."""
+    import pdfplumber  # noqa: F401
+    import pydantic  # noqa: F401
+    from ..services import manager  # noqa: F401
+
+def _ping() -> int:
+    return os.getpid()
+
+class WorkerPool:
+    """
+    Long-lived, pre-warmed process pool shared by all extraction requests.
+    Workers are spawned (not forked) so they can be recycled after
+    max_tasks_per_child tasks.
+    """
+
+    def __init__(self, max_workers: int = None, max_tasks_per_child: int = None):
+        self.max_workers = max_workers or default_pool_size()
+        self.max_tasks_per_child = max_tasks_per_child or int(
+            os.getenv("EXTRACT_MAX_TASKS_PER_CHILD", DEFAULT_MAX_TASKS_PER_CHILD)
+        )
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_worker,
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    def start(self, warm: bool = True) -> "WorkerPool":
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+        if warm:
+            self.warm()
+        return self
+
+    def warm(self):
+        """Spawn every worker up front so the first request pays no import cost."""
+        futures = [self.submit(_ping) for _ in range(self.max_workers)]
+        concurrent.futures.wait(futures)
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        self.start(warm=False)
+        try:
+            return self._executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool and retry once
+            with self._lock:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
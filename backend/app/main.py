@@ -1,20 +1,49 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import re
 import shutil
+import zipfile
 import os
+import time
 from pathlib import Path
 
 from .services.parser import AdvancedCableParser
 from .services.universal_parser import UniversalParser
 from .services.cad_service import CADService
 from .services.storage import get_storage_service
-from .models.schemas import ExtractedCable, ExtractionSummary
+from .models.schemas import ExtractedCable, ExtractionSummary, JobRequest, JobStatus, UploadSessionRequest, validate_cables
+from .services.jobs import JobManager
+from .core.workers import WorkerPool
+from .core.admission import AdmissionController, QueueFull, Ticket
+from .core.cache import CacheBudget, SummaryCache, cache_stats
+from .core.uploads import ArchiveTooLarge, HashingReader, UploadConflict, UploadSessions, iter_archive_members
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pre-warmed worker pool for the lifetime of the server,
+    # instead of a ProcessPoolExecutor per /api/extract call
+    # Apply the cache budget/TTL to whatever the previous instance left behind
+    CacheBudget.evict()
+    worker_pool = WorkerPool().start()
+    parser_manager.attach_pool(worker_pool)
+    print(f"[Workers] Extraction pool ready ({worker_pool.max_workers} workers)")
+    yield
+    job_manager.shutdown()
+    parser_manager.attach_pool(None)
+    worker_pool.shutdown()
 
 app = FastAPI(
     title="Seastar Cable Manager API",
     description="Enterprise API for Ship Cable Engineering",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # CORS Policy configuration
@@ -30,6 +59,9 @@ from .services.manager import ExtractionManager
 
 parser_manager = ExtractionManager()
 storage_service = get_storage_service()
+# Shared by /api/extract, its stream variant and /api/jobs
+admission = AdmissionController()
+upload_sessions = UploadSessions()
 
 @app.get("/")
 async def root():
@@ -38,91 +70,460 @@ async def root():
 from fastapi import UploadFile, File, Form
 import shutil
 
+def _extract_on_upload() -> bool:
+    return os.getenv("EXTRACT_ON_UPLOAD", "").lower() in ("1", "true", "yes")
+
+def _schedule_warm(ship_id: str) -> Optional[str]:
+    """Queues a low-priority extraction so the ship's results are cached before anyone asks."""
+    try:
+        return job_manager.submit(ship_id, background=True).job_id
+    except QueueFull:
+        print(f"[Jobs] Background queue full, {ship_id} will be extracted on demand")
+        return None
+
 @app.post("/api/upload/{ship_id}")
-async def upload_file(ship_id: str, file: UploadFile = File(...)):
+async def upload_file(ship_id: str, file: UploadFile = File(...), extract: Optional[bool] = None):
     """
     Upload a PDF file to the specific ship's working directory.
+    extract (default: EXTRACT_ON_UPLOAD) queues a background extraction that warms the cache.
     """
     # Use Storage Service to save file
-    # This handles Local vs Cloud abstraction
+    # This handles Local vs Cloud abstraction; storing, hashing and page
+    # counting are blocking I/O, so they run off the event loop
     try:
-        file_path_or_uri = storage_service.save_file(ship_id, file.filename, file.file)
+        await run_in_threadpool(storage_service.save_file, ship_id, file.filename, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
     finally:
         file.file.close()
-        
-    return {"filename": file.filename, "ship_id": ship_id, "status": "uploaded"}
 
-@app.post("/api/extract/{ship_id}", response_model=ExtractionSummary)
-async def extract_from_ship_wd(ship_id: str):
+    return _uploaded(ship_id, file.filename, "uploaded", extract)
+
+def _uploaded(ship_id: str, filename: str, status: str, extract: Optional[bool]) -> dict:
+    response = {"filename": filename, "ship_id": ship_id, "status": status}
+    if extract if extract is not None else _extract_on_upload():
+        response["extraction_job_id"] = _schedule_warm(ship_id)
+    return response
+
+@app.post("/api/upload/{ship_id}/sessions")
+async def create_upload_session(ship_id: str, upload: UploadSessionRequest, extract: Optional[bool] = None):
     """
-    Process all files in the specific SHIP's 'wd' folder.
+    Starts (or resumes) a chunked upload of one file, declared by name, size and MD5.
+    If the storage already holds that content the file is saved right away
+    (status 'present'); otherwise PUT the bytes to /api/uploads/{upload_id}
+    in chunks of at most chunk_size, starting at the returned offset.
+    """
+    filename = Path(upload.filename).name
+    md5 = upload.md5.lower()
+    try:
+        # Refused now rather than after the client has sent every chunk
+        storage_service.validate_name(ship_id, filename)
+        saved = await run_in_threadpool(storage_service.save_existing, ship_id, filename, md5)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+    if saved is not None:
+        return _uploaded(ship_id, filename, "present", extract)
+    session = await run_in_threadpool(upload_sessions.create, ship_id, filename, upload.size, md5)
+    return {**session, "status": "pending", "chunk_size": upload_sessions.max_chunk_bytes}
+
+# Archive members that are stored; only the PDFs are extracted
+ARCHIVE_SUFFIXES = (".pdf", ".xlsx")
+
+@app.post("/api/upload/{ship_id}/archive")
+async def upload_archive(ship_id: str, file: UploadFile = File(...), extract: bool = True):
+    """
+    Upload a ZIP of drawings: each PDF/XLSX member is read from the archive and stored
+    as a ship file, and with extract (default) each PDF is handed to the extraction
+    batch as soon as it is stored, so parsing overlaps reading the rest of the archive.
+    Returns the stored file names and the ExtractionSummary of the archive's PDFs.
+    """
+    ticket = _reserve(ship_id) if extract else None
+    stored: List[str] = []
+    try:
+        summary = await run_in_threadpool(_ingest_archive, ticket, ship_id, file.file, stored)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"Not a ZIP archive: {file.filename}")
+    except ArchiveTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload archive: {str(e)}")
+    finally:
+        if ticket is not None:
+            ticket.release()
+        file.file.close()
+
+    response = {"filename": file.filename, "ship_id": ship_id, "status": "uploaded", "files": stored}
+    if summary is not None:
+        response["summary"] = json.loads(summary.model_dump_json())
+    return response
+
+def _ingest_archive(ticket: Optional[Ticket], ship_id: str, archive, stored: List[str]) -> Optional[ExtractionSummary]:
+    # Filled as members are stored (which counts their pages), read as each is admitted
+    page_counts: Dict[str, int] = {}
+
+    def local_pdfs() -> Iterable[str]:
+        # Lazy: each member is read and stored as the batch asks for its next path, and its
+        # shards go to the pool right away, so parsing overlaps reading the rest of the archive
+        for name, member in iter_archive_members(archive, ARCHIVE_SUFFIXES):
+            storage_service.save_file(ship_id, name, member)
+            stored.append(name)
+            if name.lower().endswith(".pdf"):
+                page_counts.update(storage_service.page_counts(ship_id))
+                yield storage_service.get_file_path(ship_id, name)
+
+    if ticket is None:
+        for _ in local_pdfs():
+            pass
+        return None
+    with ticket:
+        result = parser_manager.extract_batch(local_pdfs(), page_counts=page_counts)
+        _record_extraction(ship_id, result)
+        return _build_summary(result)
+
+def _get_upload_session(upload_id: str) -> dict:
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    return session
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload_session(upload_id: str):
+    """Bytes received so far (offset): where an interrupted upload continues."""
+    return {**_get_upload_session(upload_id), "status": "pending"}
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request, extract: Optional[bool] = None):
+    """
+    Appends one chunk, sent as the raw body with 'Content-Range: bytes start-end/size'.
+    start must equal the current offset (409 with the offset otherwise, so the client
+    can resume). The last chunk is verified against the declared MD5 and the file saved.
+    """
+    session = _get_upload_session(upload_id)
+    match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", request.headers.get("content-range", ""))
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range: bytes start-end/size required")
+    start, end, size = (int(g) for g in match.groups())
+    too_large = HTTPException(status_code=413, detail=f"Chunks are limited to {upload_sessions.max_chunk_bytes} bytes")
+    if int(request.headers.get("content-length") or 0) > upload_sessions.max_chunk_bytes:
+        raise too_large
+    # Counted as it arrives: without Content-Length the body is only known by reading it
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > upload_sessions.max_chunk_bytes:
+            raise too_large
+    data = bytes(data)
+    if size != session["size"] or end - start + 1 != len(data):
+        raise HTTPException(status_code=400, detail="Content-Range does not match the chunk or the declared size")
+    try:
+        session = await run_in_threadpool(upload_sessions.append, upload_id, start, data)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "offset": e.offset})
+    if session["offset"] < session["size"]:
+        return {**session, "status": "pending"}
+    await run_in_threadpool(_complete_upload, session)
+    return _uploaded(session["ship_id"], session["filename"], "uploaded", extract)
+
+def _complete_upload(session: dict):
+    """Verifies an upload's bytes and hands the file over to storage; the session is gone either way."""
+    upload_id = session["upload_id"]
+    try:
+        if not upload_sessions.verify(upload_id):
+            raise HTTPException(status_code=422, detail="Upload does not match the declared MD5; start again")
+        storage_service.save_path(session["ship_id"], session["filename"], upload_sessions.path(upload_id),
+                                  session["md5"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+    finally:
+        upload_sessions.discard(upload_id)
+
+@app.delete("/api/uploads/{upload_id}")
+async def cancel_upload_session(upload_id: str):
+    _get_upload_session(upload_id)
+    upload_sessions.discard(upload_id)
+    return {"upload_id": upload_id, "status": "cancelled"}
+
+@app.delete("/api/upload/{ship_id}/{filename}")
+async def delete_file(ship_id: str, filename: str):
+    """
+    Remove a file from the ship's working directory.
+    """
+    try:
+        deleted = storage_service.delete_file(ship_id, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    return {"filename": filename, "ship_id": ship_id, "status": "deleted"}
+
+@app.get("/api/files/{ship_id}")
+async def list_ship_files(ship_id: str, since: int = 0):
+    """
+    The ship's files from its manifest (hash, size, pages, upload time, extraction status).
+    With ?since=N, only files added, replaced or re-extracted after manifest version N,
+    plus the names removed since; poll with the returned version.
+    """
+    try:
+        return await run_in_threadpool(storage_service.changes_since, ship_id, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Storage Error: {e}")
+        raise HTTPException(status_code=503, detail="Storage unavailable")
+
+def _ship_uris(ship_id: str) -> List[str]:
+    """
+    Lists the ship's PDFs (local paths or gs:// URIs).
     """
-    
     # Use Storage Service to list files
     try:
         pdf_files = storage_service.list_files(ship_id)
         # Filter only PDFs? list_files already does some filtering or returns all?
         # Let's trust list_files but ensure extension check if needed.
-        pdf_files = [f for f in pdf_files if f.lower().endswith(".pdf")]
+        return [f for f in pdf_files if f.lower().endswith(".pdf")]
     except Exception as e:
         # If storage fails (e.g. bucket access), return empty
         print(f"Storage Error: {e}")
-        pdf_files = []
+        return []
 
-    if not pdf_files:
-        return ExtractionSummary(
-            total_count=0,
-            system_distribution={},
-            potential_misses=[],
-            processing_time_ms=0,
-            ship_metadata={"hull_no": "N/A", "ship_type": "No Data"},
-            cables=[]
-        )
-    
-    # Execute Parallel Extraction
-    # NOTE: parser_manager needs to handle gs:// paths if on cloud.
-    # storage_service.get_file_path handles downloading if necessary.
-    
-    # We need to adapt parser_manager slightly or handle download here.
-    # For robust architecture, let's download files to temp if they are remote
-    # or ensure parser supports gs://
-    
-    # Currently parser expects Paths. 
-    # Let's map remote URIs to local temp paths
-    local_paths = []
-    for uri in pdf_files:
-        if uri.startswith("gs://"):
-            local_paths.append(storage_service.get_file_path(ship_id, uri))
-        else:
-            local_paths.append(uri)
-            
-    result = parser_manager.extract_batch(local_paths)
-    
+def _resolve_ship_files(ship_id: str, uris: List[str] = None) -> Iterable[str]:
+    """
+    Maps the ship's PDFs to local paths the parser can open.
+    Remote files are downloaded in parallel (only if changed) and yielded as
+    each one lands, so the batch starts parsing before the last download ends.
+    """
+    uris = _ship_uris(ship_id) if uris is None else uris
+    if not uris:
+        return []
+    return storage_service.iter_local_paths(ship_id, uris)
+
+def _ship_page_counts(ship_id: str) -> Dict[str, int]:
+    """Page counts the manifest already holds (by content hash), so planning need not open each PDF."""
+    try:
+        return storage_service.page_counts(ship_id)
+    except Exception as e:
+        print(f"Storage Error: {e}")
+        return {}
+
+def _ship_digest(ship_id: str, uris: List[str]) -> Optional[str]:
+    """SummaryCache digest from the storage's content hashes (no download needed for GCS)."""
+    try:
+        file_hashes = storage_service.content_hashes(ship_id, uris)
+    except Exception as e:
+        print(f"Storage Error: {e}")
+        return None
+    return SummaryCache.digest(file_hashes, AdvancedCableParser.version()) if file_hashes else None
+
+def _empty_summary() -> ExtractionSummary:
+    return ExtractionSummary(
+        total_count=0,
+        system_distribution={},
+        potential_misses=[],
+        processing_time_ms=0,
+        ship_metadata={"hull_no": "N/A", "ship_type": "No Data"},
+        cables=[]
+    )
+
+def _build_summary(result: dict) -> ExtractionSummary:
+    # The manager passes CableRecords; validate them once, as one batch
     return ExtractionSummary(
         total_count=result["total_count"],
         system_distribution=result["system_distribution"],
-        potential_misses=result["potential_misses"],
+        potential_misses=[m._asdict() for m in result["potential_misses"]],
         processing_time_ms=result["processing_time_ms"],
+        peak_worker_rss_mb=result.get("peak_worker_rss_mb"),
         ship_metadata=result["ship_metadata"],
-        cables=result.get("cables", []) # Ensure we pass the list back
+        cables=validate_cables(result.get("cables", [])) # Ensure we pass the list back
     )
 
+def _job_result(result: Optional[dict]) -> ExtractionSummary:
+    return _build_summary(result) if result else _empty_summary()
+
+def _record_extraction(ship_id: str, result: dict):
+    """Stores each file's extraction outcome in the ship's manifest."""
+    try:
+        storage_service.record_extraction(ship_id, result.get("file_status", {}), AdvancedCableParser.version())
+    except Exception as e:
+        print(f"Storage Error: {e}")
+
+job_manager = JobManager(parser_manager, _resolve_ship_files, _job_result, admission=admission,
+                         on_summary=_record_extraction, page_counts=_ship_page_counts)
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def _reserve(ship_id: str) -> Ticket:
+    """Reserves an extraction slot, or rejects right away with 429 + Retry-After."""
+    try:
+        return admission.reserve(ship_id)
+    except QueueFull as e:
+        raise _queue_full(e)
+
+def _lookup_summary(ship_id: str, uris: List[str]) -> Tuple[Optional[str], Optional[ExtractionSummary]]:
+    """(digest, memoized summary or None): an unchanged ship needs no aggregation or validation."""
+    start_time = time.time()
+    digest = _ship_digest(ship_id, uris)
+    summary = SummaryCache.get(ship_id, digest) if digest else None
+    if summary is not None:
+        summary = summary.model_copy(update={"processing_time_ms": (time.time() - start_time) * 1000,
+                                             "peak_worker_rss_mb": None})
+    return digest, summary
+
+def _finish_summary(ship_id: str, uris: List[str], digest: Optional[str], result: dict) -> ExtractionSummary:
+    """Records the batch's per-file outcome; memoizes the summary only if it covers every file."""
+    _record_extraction(ship_id, result)
+    summary = _build_summary(result)
+    statuses = result.get("file_status", {})
+    # A file that failed (or never downloaded) must be retried next time, not summarized away
+    complete = (set(statuses) == {Path(uri).name for uri in uris}
+                and all(status == "extracted" for status in statuses.values()))
+    if digest and complete:
+        SummaryCache.set(ship_id, digest, summary)
+    return summary
+
+def _run_extract(ticket: Ticket, ship_id: str) -> ExtractionSummary:
+    with ticket:
+        uris = _ship_uris(ship_id)
+        if not uris:
+            return _empty_summary()
+        digest, summary = _lookup_summary(ship_id, uris)
+        if summary is not None:
+            return summary
+        # Execute Parallel Extraction
+        result = parser_manager.extract_batch(_resolve_ship_files(ship_id, uris),
+                                              page_counts=_ship_page_counts(ship_id))
+        return _finish_summary(ship_id, uris, digest, result)
+
+@app.post("/api/extract/{ship_id}", response_model=ExtractionSummary)
+async def extract_from_ship_wd(ship_id: str):
+    """
+    Process all files in the specific SHIP's 'wd' folder.
+    Blocks until done; /api/jobs is the non-blocking alternative.
+    """
+    ticket = _reserve(ship_id)
+    # Waiting for a slot, file resolution (possibly GCS downloads) and the batch run off the event loop
+    try:
+        summary = await run_in_threadpool(_run_extract, ticket, ship_id)
+    finally:
+        ticket.release()
+    # Already a validated ExtractionSummary: serialize it directly rather than
+    # have response_model dump and re-validate every cable
+    return Response(summary.model_dump_json(), media_type="application/json")
+
+@app.post("/api/jobs", response_model=JobStatus, status_code=202)
+async def create_extraction_job(job_request: JobRequest):
+    """
+    Queues an extraction of the ship's drawings and returns its job ID immediately.
+    Poll GET /api/jobs/{job_id} for progress, then fetch /api/jobs/{job_id}/result.
+    """
+    try:
+        job = job_manager.submit(job_request.ship_id, reparse=job_request.reparse)
+    except QueueFull as e:
+        raise _queue_full(e)
+    return job.to_status()
+
+@app.get("/api/jobs", response_model=List[JobStatus])
+async def list_extraction_jobs(ship_id: Optional[str] = None):
+    return [job.to_status() for job in job_manager.list(ship_id)]
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_extraction_job(job_id: str):
+    return _get_job(job_id).to_status()
+
+@app.get("/api/jobs/{job_id}/result", response_model=ExtractionSummary)
+async def get_extraction_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.result is None:
+        detail = job.error or f"Job is {job.state.value}"
+        raise HTTPException(status_code=409, detail=detail)
+    return job.result
+
+@app.delete("/api/jobs/{job_id}", response_model=JobStatus)
+async def cancel_extraction_job(job_id: str):
+    """Cancels a queued job, or stops a running one after its current shard."""
+    _get_job(job_id)
+    return job_manager.cancel(job_id).to_status()
+
+@app.post("/api/extract/{ship_id}/stream")
+async def stream_extract_from_ship_wd(ship_id: str, request: Request, format: str = "ndjson"):
+    """
+    Streaming variant of /api/extract/{ship_id}.
+    Emits one event per parsed page ('pages'), per finished file ('file'/'error'),
+    with progress counters, and the full ExtractionSummary as the last 'summary' event.
+    Served as NDJSON by default, or as Server-Sent Events with ?format=sse
+    (or an 'Accept: text/event-stream' header).
+    """
+    use_sse = format == "sse" or "text/event-stream" in request.headers.get("accept", "")
+    ticket = _reserve(ship_id)
+
+    def encode(event: dict) -> str:
+        payload = json.dumps(event, ensure_ascii=False)
+        if use_sse:
+            return f"event: {event['event']}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    def events():
+        with ticket:
+            uris = _ship_uris(ship_id)
+            if not uris:
+                yield encode({"event": "summary", "summary": jsonable_encoder(_empty_summary())})
+                return
+            digest, summary = _lookup_summary(ship_id, uris)
+            if summary is not None:
+                yield encode({"event": "summary", "summary": jsonable_encoder(summary)})
+                return
+            # Each file's first page is a shard of its own: the first event arrives after
+            # one page, not one batch, and the rest of the file parses in normal-sized shards
+            for event in parser_manager.iter_batch(_resolve_ship_files(ship_id, uris), first_page_alone=True,
+                                                   page_counts=_ship_page_counts(ship_id)):
+                if event["event"] == "summary":
+                    summary = _finish_summary(ship_id, uris, digest, event["summary"])
+                    event = {"event": "summary", "summary": jsonable_encoder(summary)}
+                elif "cables" in event:
+                    event = {**event, "cables": [c._asdict() for c in event["cables"]],
+                             "misses": [m._asdict() for m in event["misses"]]}
+                yield encode(event)
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    # Release also runs after the response, in case the generator never started
+    return StreamingResponse(events(), media_type=media_type, background=BackgroundTask(ticket.release))
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hits, misses, writes and bytes per cache tier, evictions, and disk usage vs. budget."""
+    stats = await run_in_threadpool(cache_stats)
+    return {**stats, "parser_version": AdvancedCableParser.version()}
+
 @app.post("/api/universal/upload/{ship_id}", response_model=ExtractionSummary)
 async def universal_upload(
     ship_id: str,
     file: UploadFile = File(...)
 ):
     try:
-        # Save temp file
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
+        # The upload is already spooled (to disk past the size threshold); parse it in place,
+        # off the event loop, hashing as the parser reads
+        upload = HashingReader(file.file)
         parser = UniversalParser()
-        data = parser.parse(temp_path)
+        data = await run_in_threadpool(parser.parse, upload)
+        file_hash = await run_in_threadpool(upload.hexdigest)
         
         # Convert to ExtractedCable format
         cables = []
@@ -153,46 +554,38 @@ async def universal_upload(
                 print(f"Row error: {row_err}")
                 continue
 
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
         return ExtractionSummary(
             total_count=len(cables),
             cables=cables,
             potential_misses=[],
             system_distribution={},
             processing_time_ms=0,
-            ship_metadata={"hull_no": ship_id, "ship_type": "UNIVERSAL"}
+            ship_metadata={"hull_no": ship_id, "ship_type": "UNIVERSAL", "file_hash": file_hash}
         )
             
     except Exception as e:
-        if os.path.exists(f"temp_{file.filename}"):
-            os.remove(f"temp_{file.filename}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        file.file.close()
 
 @app.post("/api/cad/upload")
 async def cad_upload(
     file: UploadFile = File(...)
 ):
     try:
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
+        # Parse the existing spool in place, off the event loop, hashing as the parser reads
+        upload = HashingReader(file.file)
         cad_service = CADService()
-        result = cad_service.parse_dxf(temp_path)
-        
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            
+        result = await run_in_threadpool(cad_service.parse_dxf, upload)
+        # Lets the client recognise a re-upload of the same drawing
+        result["file_hash"] = await run_in_threadpool(upload.hexdigest)
+
         return result
             
     except Exception as e:
-        if os.path.exists(f"temp_{file.filename}"):
-            os.remove(f"temp_{file.filename}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        file.file.close()
 
 if __name__ == "__main__":
     import uvicorn
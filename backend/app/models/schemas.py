@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter, validator
+from typing import List, NamedTuple, Optional
 from enum import Enum
 from datetime import datetime
 
@@ -13,6 +13,13 @@ class SystemType(str, Enum):
     SIGNAL = "S"
     UNKNOWN = "U"
 
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
 class CableBase(BaseModel):
     cable_name: str = Field(..., description="Unique Circuit Identifier (e.g., P2811)")
     cable_type: str = Field(..., description="Normalized Cable Specification (e.g., DPYC-2.5)")
@@ -57,11 +64,61 @@ class ExtractedCable(CableBase):
             "page": str(self.page_number)
         }
     
+class CableRecord(NamedTuple):
+    """
+    Compact cable row used in the parser hot loop and between worker processes.
+    Same fields and order as ExtractedCable; validated into models once, at the API boundary.
+    """
+    cable_name: str
+    cable_type: str = "UNKNOWN"
+    from_room: str = ""
+    from_equip: str = ""
+    from_node: str = ""
+    to_room: str = ""
+    to_equip: str = ""
+    to_node: str = ""
+    length: Optional[float] = None
+    page_number: int = 0
+    raw_text: str = ""
+    confidence_score: float = 1.0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CableRecord":
+        # Tolerates cache entries written before a field existed
+        return cls(**{k: data[k] for k in cls._fields if k in data})
+
+class MissRecord(NamedTuple):
+    """A circuit-like token that was not extracted; offset is its position in the page text."""
+    page_number: int
+    token: str
+    offset: int = 0
+    context: str = ""
+
+    @classmethod
+    def from_dict(cls, data) -> "MissRecord":
+        # Cache entries written before misses were structured hold plain strings
+        if isinstance(data, str):
+            return cls(page_number=0, token=data, context=data)
+        return cls(**{k: data[k] for k in cls._fields if k in data})
+
+class PotentialMiss(BaseModel):
+    page_number: int
+    token: str
+    offset: int = 0
+    context: str = ""
+
+_cable_list_adapter = TypeAdapter(List[ExtractedCable])
+
+def validate_cables(records: List[CableRecord]) -> List[ExtractedCable]:
+    """Validates a whole batch of records in one pydantic-core call."""
+    return _cable_list_adapter.validate_python([r._asdict() for r in records])
+
 class ExtractionSummary(BaseModel):
     total_count: int
     system_distribution: dict
-    potential_misses: List[str]
+    potential_misses: List[PotentialMiss]
     processing_time_ms: float
+    peak_worker_rss_mb: Optional[float] = Field(None, description="Peak resident memory of any extraction worker while parsing one of this batch's shards (MB)")
     timestamp: datetime = Field(default_factory=datetime.now)
     ship_metadata: dict = Field(default_factory=dict, description="Extracted Ship Info (Hull No, Type)")
     cables: List[ExtractedCable] = Field(default_factory=list, description="List of extracted cables")
@@ -69,3 +126,23 @@ class ExtractionSummary(BaseModel):
 class ParseRequest(BaseModel):
     file_path: str
     revision: str = "R0"
+
+class JobRequest(BaseModel):
+    ship_id: str
+    reparse: bool = Field(False, description="Ignore cached results (e.g. after a rule change)")
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0, description="File size in bytes")
+    md5: str = Field(..., pattern=r"^[0-9a-fA-F]{32}$", description="Hex MD5 of the file's content")
+
+class JobStatus(BaseModel):
+    job_id: str
+    ship_id: str
+    status: JobState
+    background: bool = False
+    progress: dict = Field(default_factory=dict, description="pages_done / total_pages / files_done / total_files")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
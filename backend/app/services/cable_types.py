@@ -0,0 +1,213 @@
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+# 케이블 타입 하드코딩 (JIS-C3410 기준)
+CABLE_TYPES = {
+    # Single core 시리즈
+    'S1': 'S(Y)(S)1', 'S2': 'S(Y)(S)2.5', 'S4': 'S(Y)(S)4',
+    'S6': 'S(Y)(S)6', 'S10': 'S(Y)(S)10', 'S16': 'S(Y)(S)16',
+    'S25': 'S(Y)(S)25', 'S35': 'S(Y)(S)35', 'S50': 'S(Y)(S)50',
+    'S70': 'S(Y)(C)(S)70', 'S95': 'S(Y)(C)(S)95', 'S150': 'S(Y)(C)(S)150',
+
+    # SPYC 시리즈
+    'SP1': 'SPYC(Y)(S)-1.5', 'SP2': 'SPYC(Y)(S)-2.5', 'SP4': 'SPYC(Y)(S)-4',
+    'SP6': 'SPYC(Y)(S)-6', 'SP10': 'SPYC(Y)(S)-10', 'SP16': 'SPYC(Y)(S)-16',
+    'SP25': 'SPYC(Y)(S)-25', 'SP35': 'SPYC(Y)(S)-35', 'SP50': 'SPYC(Y)(S)-50',
+
+    # Double core 시리즈
+    'D1': 'D(Y)(S)1', 'D2': 'D(Y)(S)2', 'D4': 'D(Y)(S)4',
+    'D6': 'D(Y)(S)6', 'D10': 'D(Y)(S)10', 'D16': 'D(Y)(S)16',
+    'D25': 'D(Y)(S)25', 'D35': 'D(Y)(S)35', 'D50': 'D(Y)(S)50',
+
+    # DPYC 시리즈
+    'DP1': 'DPYC(Y)(S)-1.5', 'DP2': 'DPYC(Y)(S)-2.5', 'DP4': 'DPYC(Y)(S)-4',
+    'DP6': 'DPYC(Y)(S)-6', 'DP10': 'DPYC(Y)(S)-10', 'DP16': 'DPYC(Y)(S)-16',
+
+    # Three core 시리즈
+    'T1': 'T(Y)(S)1', 'T2': 'T(Y)(S)2', 'T4': 'T(Y)(S)4',
+    'T6': 'T(Y)(S)6', 'T10': 'T(Y)(S)10', 'T16': 'T(Y)(S)16',
+    'T25': 'T(Y)(S)25', 'T35': 'T(Y)(S)35', 'T50': 'T(Y)(S)50',
+    'T70': 'T(Y)(S)70', 'T95': 'T(Y)(S)95', 'T120': 'T(Y)(S)120',
+    'T150': 'T(Y)(S)150',
+
+    # TPYC 시리즈
+    'TP1': 'TPYC(Y)(S)-1.5', 'TP2': 'TPYC(Y)(S)-2.5', 'TP4': 'TPYC(Y)(S)-4',
+    'TP10': 'TPYC(Y)(S)-10', 'TP16': 'TPYC(Y)(S)-16', 'TP25': 'TPYC(Y)(S)-25',
+
+    # Multi core (M, TT 시리즈)
+    'M2': 'M(Y)(S)2', 'M4': 'M(Y)(S)4', 'M7': 'M(Y)(S)7',
+    'M12': 'M(Y)(S)12', 'M19': 'M(Y)(S)19', 'M27': 'M(Y)(S)27',
+
+    'TT1': 'TT(Y)(S)1', 'TT1Q': 'TT(Y)(S)1Q', 'TT4': 'TT(Y)(S)4',
+    'TT7': 'TT(Y)(S)7', 'TT10': 'TT(Y)(S)10', 'TT14': 'TT(Y)(S)14',
+
+    'TTS1': 'TTYC(Y)(S)-1', 'TTS1Q': 'TTYC(Y)(S)-1Q', 'TTS4': 'TTYC(Y)(S)-4',
+
+    # Fire resistant 시리즈 (Regex Logic has priority for specific mappings)
+    'FT1': 'FT(Y)(S)1', 'FT2': 'FT(Y)(S)2', 'FT4': 'FT(Y)(S)4',
+
+    # 기타
+    'DY1': 'DY-1', 'DY2': 'DY-2', 'TY2': 'TY-2', 'TY6': 'TY-6', 'TY10': 'TY-10',
+    'MY2': 'MY-2', 'MY4': 'MY-4', 'MY7': 'MY-7', 'MY12': 'MY-12',
+    'SY6': 'SY-6', 'SY10': 'SY-10', 'SY50': 'SY-50', 'SY70': 'SY-70',
+    'MS2': 'MS-2', 'MS4': 'MS-4', 'MS7': 'MS-7', 'MS12': 'MS-12',
+    '5P1': '5PYC(Y)-1.5', '5P2': '5PYC(Y)-2.5',
+    'RG6': 'RG-6', 'RG12U': 'RG-12/U', 'CAT5': 'STP CAT-5', 'CAT6': 'STP CAT-6',
+}
+
+def _build_index() -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Lookup index over CABLE_TYPES, built once.
+    Maps each accepted spelling to the position of the first table entry it
+    matches, so lookups keep the priority of the original linear scan.
+    """
+    by_original = {}
+    by_no_hyphen = {}
+    for idx, (key, value) in enumerate(CABLE_TYPES.items()):
+        by_original.setdefault(key.upper(), idx)
+        by_original.setdefault(value.upper(), idx)
+        by_no_hyphen.setdefault(key.replace('-', ''), idx)
+        by_no_hyphen.setdefault(value.replace('(', '').replace(')', '').replace('-', '').upper(), idx)
+    return by_original, by_no_hyphen
+
+_BY_ORIGINAL, _BY_NO_HYPHEN = _build_index()
+_VALUES = list(CABLE_TYPES.values())
+
+# Rule patterns, compiled once; tried in order after the table lookup
+_S = re.compile(r'^S-?(\d+)')
+_SP = re.compile(r'^SP-?(\d+)')
+_D = re.compile(r'^D-?(\d+)')
+_DP = re.compile(r'^DP-?(\d+)')
+_T = re.compile(r'^T-?(\d+)')
+_TP = re.compile(r'^TP-?(\d+)')
+_M = re.compile(r'^M-?(\d+)')
+_TT = re.compile(r'^TT-?(\d+)([QS]?)')
+_TTS = re.compile(r'^TTS-?(\d+)([QS]?)')
+_FIRE = re.compile(r'^F([DTM])-?(\d+)')
+_XY = re.compile(r'^([DTMS])Y-?(\d+)')
+_MS = re.compile(r'^MS-?(\d+)')
+_5P = re.compile(r'^5P-?(\d+)')
+_RG = re.compile(r'^RG-?(\w+)')
+_CAT = re.compile(r'^(?:STP)?-?CAT-?([56])')
+
+_CORE_SIZES = {'1': '1.5', '2': '2.5', '4': '4', '6': '6', '10': '10',
+               '16': '16', '25': '25', '35': '35', '50': '50'}
+
+# Bump for normalization logic changes that the table, patterns and sizes do not capture
+NORMALIZER_REVISION = 1
+
+def rules_fingerprint() -> list:
+    """Everything normalize_cable_type's output depends on; part of the parser's cache version."""
+    patterns = [_S, _SP, _D, _DP, _T, _TP, _M, _TT, _TTS, _FIRE, _XY, _MS, _5P, _RG, _CAT]
+    return [NORMALIZER_REVISION, CABLE_TYPES, _CORE_SIZES, [p.pattern for p in patterns]]
+
+def _normalize_by_rules(original: str) -> str:
+    match = _S.match(original)
+    if match:
+        num = match.group(1)
+        if num in ('1', '2', '4', '6', '10', '16', '25', '35', '50', '70', '95', '150'):
+            if num in ('70', '95', '150'):
+                return f'S(Y)(C)(S){num}'
+            return f'S(Y)(S){num}'
+
+    match = _SP.match(original)
+    if match and match.group(1) in _CORE_SIZES:
+        return f'SPYC(Y)(S)-{_CORE_SIZES[match.group(1)]}'
+
+    match = _D.match(original)
+    if match and match.group(1) in ('1', '2', '4', '6', '10', '16', '25', '35', '50'):
+        return f'D(Y)(S){match.group(1)}'
+
+    match = _DP.match(original)
+    if match and match.group(1) in ('1', '2', '4', '6', '10', '16'):
+        return f'DPYC(Y)(S)-{_CORE_SIZES[match.group(1)]}'
+
+    match = _T.match(original)
+    if match and match.group(1) in ('1', '2', '4', '6', '10', '16', '25', '35', '50', '70', '95', '120', '150'):
+        return f'T(Y)(S){match.group(1)}'
+
+    match = _TP.match(original)
+    if match and match.group(1) in _CORE_SIZES:
+        return f'TPYC(Y)(S)-{_CORE_SIZES[match.group(1)]}'
+
+    match = _M.match(original)
+    if match and match.group(1) in ('2', '4', '7', '12', '19', '27', '37', '44'):
+        return f'M(Y)(S){match.group(1)}'
+
+    match = _TT.match(original)
+    if match and match.group(1) in ('1', '2', '4', '7', '10', '14'):
+        return f'TT(Y)(S){match.group(1)}Q' if match.group(2) == 'Q' else f'TT(Y)(S){match.group(1)}'
+
+    match = _TTS.match(original)
+    if match:
+        return f'TTYC(Y)(S)-{match.group(1)}Q' if match.group(2) == 'Q' else f'TTYC(Y)(S)-{match.group(1)}'
+
+    match = _FIRE.match(original)
+    if match:
+        prefix, num = match.group(1), match.group(2)
+        if prefix == 'D' and num in ('1', '2', '4', '6'):
+            return f'FDPYC(Y)(S)-{_CORE_SIZES[num]}FA'
+        elif prefix == 'T' and num in _CORE_SIZES:
+            return f'FTPYC(Y)(S)-{_CORE_SIZES[num]}FA'
+        elif prefix == 'M' and num in ('2', '4', '7', '12', '19'):
+            return f'FMPYC(Y)(S)-{num}FA'
+
+    # 특수 타입들 (하이픈 유지 필요): DY-1, TY-2, MY-7, SY-6 등
+    match = _XY.match(original)
+    if match:
+        return f'{match.group(1)}Y-{match.group(2)}'
+
+    match = _MS.match(original)
+    if match:
+        return f'MS-{match.group(1)}'
+
+    match = _5P.match(original)
+    if match and match.group(1) in ('1', '2'):
+        return f'5PYC(Y)-{_CORE_SIZES[match.group(1)]}'
+
+    match = _RG.match(original)
+    if match:
+        return f'RG-{match.group(1)}'
+
+    match = _CAT.match(original)
+    if match:
+        return f'STP CAT-{match.group(1)}'
+
+    # 매칭 안되면 원본 반환
+    return original
+
+@lru_cache(maxsize=65536)
+def normalize_cable_type(cable_type_str: str) -> str:
+    """
+    케이블 타입 문자열을 표준 형식으로 변환
+    하이픈 유무 상관없이 처리: D-2, D2 모두 D(Y)(S)2로 변환
+    Memoized per raw string; the table lookup is a precomputed index.
+    """
+    if not cable_type_str:
+        return ''
+
+    # 공백 제거 및 대문자 변환
+    original = cable_type_str.strip().upper().replace(' ', '')
+    # 하이픈 제거한 버전
+    no_hyphen = original.replace('-', '').replace('(', '').replace(')', '')
+
+    # 1. 직접 매칭 (사전 계산된 인덱스)
+    hits = [idx for idx in (_BY_ORIGINAL.get(original), _BY_NO_HYPHEN.get(no_hyphen)) if idx is not None]
+    if hits:
+        return _VALUES[min(hits)]
+
+    # 2. 패턴 매칭 (하이픈 유무 상관없이)
+    return _normalize_by_rules(original)
+
+def normalize_series(series):
+    """
+    Normalizes a whole pandas column: each distinct raw value is normalized
+    once and the result is mapped back. Missing values become ''.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = [normalize_cable_type(str(u)) for u in uniques]
+    values = [mapped[c] if c >= 0 else '' for c in codes]
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
@@ -1,20 +1,70 @@
 
 import ezdxf
-from typing import List, Dict, Any, Optional
+from ezdxf.document import Drawing
+from ezdxf.filemanagement import dxf_stream_info
+from ezdxf.lldxf.tagger import binary_tags_loader
+from typing import List, Dict, Any, Optional, BinaryIO, Union
+import io
+import mmap
 import os
 
+BINARY_DXF_SIGNATURE = b"AutoCAD Binary DXF\r\n\x1a\x00"
+# Binary DXF streams larger than this are memory-mapped instead of read into memory
+BINARY_MAP_MIN_BYTES = 1024 * 1024
+
+class _MappedDXF(mmap.mmap):
+    """Read-only mapping with the bytes.index() that ezdxf's binary loader uses."""
+
+    def index(self, sub: bytes, start: int = 0, end: int = None) -> int:
+        found = self.find(sub, start, len(self) if end is None else end)
+        if found < 0:
+            raise ValueError("subsection not found")
+        return found
+
 class CADService:
     @staticmethod
-    def parse_dxf(file_path: str) -> Dict[str, Any]:
+    def read_dxf_stream(stream: BinaryIO) -> Drawing:
+        """
+        Loads an ASCII or binary DXF document from a seekable binary stream,
+        detecting the text encoding the way ezdxf.readfile does for paths.
+        """
+        stream.seek(0)
+        if stream.read(len(BINARY_DXF_SIGNATURE)) == BINARY_DXF_SIGNATURE:
+            size = stream.seek(0, io.SEEK_END)
+            stream.seek(0)
+            if size < BINARY_MAP_MIN_BYTES:
+                return Drawing.load(binary_tags_loader(stream.read()))
+            with _MappedDXF(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return Drawing.load(binary_tags_loader(data))
+
+        stream.seek(0)
+        probe = io.TextIOWrapper(stream, encoding="utf-8", errors="ignore")
+        try:
+            info = dxf_stream_info(probe)
+        finally:
+            # Detach so closing the wrapper never closes the caller's stream
+            probe.detach()
+        stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=info.encoding, errors="surrogateescape")
+        try:
+            return ezdxf.read(text)
+        finally:
+            text.detach()
+
+    @staticmethod
+    def parse_dxf(source: Union[str, BinaryIO]) -> Dict[str, Any]:
         """
-        Parses a DXF file and extracts entities (LINES, LWPOLYLINE, TEXT, MTEXT)
-        optimized for web visualization.
+        Parses a DXF file (path or seekable binary stream) and extracts entities
+        (LINES, LWPOLYLINE, TEXT, MTEXT) optimized for web visualization.
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"DXF file not found: {file_path}")
+        if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+            raise FileNotFoundError(f"DXF file not found: {source}")
 
         try:
-            doc = ezdxf.readfile(file_path)
+            if isinstance(source, (str, os.PathLike)):
+                doc = ezdxf.readfile(source)
+            else:
+                doc = CADService.read_dxf_stream(source)
             msp = doc.modelspace()
             
             layers = set()
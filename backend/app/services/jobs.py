@@ -0,0 +1,185 @@
+import concurrent.futures
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ..models.schemas import JobState
+
+# Extraction jobs running at once; each one mostly waits on the shared worker pool
+DEFAULT_MAX_JOBS = 2
+# Finished jobs kept for status/result polling before the oldest are dropped
+DEFAULT_JOB_HISTORY = 100
+
+class ExtractionJob:
+    """State of one queued / running / finished ship extraction."""
+
+    def __init__(self, ship_id: str, reparse: bool = False, ticket=None, background: bool = False):
+        self.job_id = uuid.uuid4().hex
+        self.ship_id = ship_id
+        self.reparse = reparse
+        # Low-priority cache warming (e.g. right after an upload)
+        self.background = background
+        # Admission ticket; the job stays QUEUED until it is admitted
+        self.ticket = ticket
+        self.state = JobState.QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.cancel_requested = threading.Event()
+        self.future: Optional[concurrent.futures.Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.COMPLETED, JobState.FAILED, JobState.CANCELLED)
+
+    def to_status(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "ship_id": self.ship_id,
+            "status": self.state,
+            "background": self.background,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobManager:
+    """
+    Runs ship extractions on background threads so the API event loop never
+    blocks on parsing. Each job consumes ExtractionManager.iter_batch, which
+    gives it live progress and a point between shard results to stop at when
+    cancelled (closing the iterator drops the job's queued shards).
+    With an AdmissionController, submit() reserves a place in the shared
+    extraction queue first and raises QueueFull when there is none.
+    Background jobs get background tickets, and one still queued per ship
+    absorbs later requests for that ship (it lists the files when it starts).
+    """
+
+    def __init__(self, extraction_manager, resolve_files: Callable[[str], List[str]],
+                 build_result: Callable[[Dict[str, Any]], Any], admission=None,
+                 max_jobs: int = None, history: int = None,
+                 on_summary: Callable[[str, Dict[str, Any]], None] = None,
+                 page_counts: Callable[[str], Dict[str, int]] = None):
+        self.extraction_manager = extraction_manager
+        self.resolve_files = resolve_files
+        # Known page counts of a ship's files by content hash, for shard planning
+        self.page_counts = page_counts
+        self.build_result = build_result
+        # Called with (ship_id, raw batch summary) after each completed extraction
+        self.on_summary = on_summary
+        self.admission = admission
+        if admission is not None:
+            # One thread per ticket the controller can hand out, so an admitted
+            # job never waits behind jobs still queued for admission
+            self.max_jobs = admission.max_active + admission.max_queued + admission.max_background_queued
+        else:
+            self.max_jobs = max_jobs or int(os.getenv("EXTRACT_MAX_JOBS", DEFAULT_MAX_JOBS))
+        self.history = history or int(os.getenv("EXTRACT_JOB_HISTORY", DEFAULT_JOB_HISTORY))
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_jobs,
+                                                               thread_name_prefix="extract-job")
+        self._jobs: "OrderedDict[str, ExtractionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, ship_id: str, reparse: bool = False, background: bool = False) -> ExtractionJob:
+        if background and not reparse:
+            pending = next((job for job in self.list(ship_id) if job.background and not job.reparse
+                            and job.state == JobState.QUEUED and not job.cancel_requested.is_set()), None)
+            if pending is not None:
+                return pending
+        ticket = self.admission.reserve(ship_id, background=background) if self.admission is not None else None
+        job = ExtractionJob(ship_id, reparse, ticket, background)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExtractionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, ship_id: str = None) -> List[ExtractionJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if ship_id is None or job.ship_id == ship_id]
+
+    def cancel(self, job_id: str) -> Optional[ExtractionJob]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested.set()
+        # Still queued: it never starts
+        if job.future is not None and job.future.cancel():
+            self._finish(job, JobState.CANCELLED)
+            if job.ticket is not None:
+                job.ticket.release()
+        elif job.ticket is not None and not job.ticket.admitted:
+            # Waiting for admission: leave the queue and wake the job thread
+            job.ticket.release()
+        return job
+
+    def shutdown(self):
+        for job in self.list():
+            self.cancel(job.job_id)
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: ExtractionJob):
+        try:
+            if job.ticket is not None and not job.ticket.wait():
+                self._finish(job, JobState.CANCELLED)
+                return
+            if job.cancel_requested.is_set():
+                self._finish(job, JobState.CANCELLED)
+                return
+            self._execute(job)
+        finally:
+            if job.ticket is not None:
+                job.ticket.release()
+
+    def _execute(self, job: ExtractionJob):
+        job.state = JobState.RUNNING
+        job.started_at = datetime.now()
+        events = None
+        try:
+            file_paths = self.resolve_files(job.ship_id)
+            # build_result(None) stands for a ship without drawings
+            summary = None
+            page_counts = self.page_counts(job.ship_id) if self.page_counts and file_paths else None
+            events = (self.extraction_manager.iter_batch(file_paths, reparse=job.reparse, background=job.background,
+                                                         page_counts=page_counts)
+                      if file_paths else [])
+            for event in events:
+                if job.cancel_requested.is_set():
+                    self._finish(job, JobState.CANCELLED)
+                    return
+                if "progress" in event:
+                    job.progress = event["progress"]
+                if event["event"] == "summary":
+                    summary = event["summary"]
+            if summary is not None and self.on_summary is not None:
+                self.on_summary(job.ship_id, summary)
+            job.result = self.build_result(summary)
+            self._finish(job, JobState.COMPLETED)
+        except Exception as e:
+            print(f"❌ Extraction job {job.job_id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, JobState.FAILED)
+        finally:
+            if hasattr(events, "close"):
+                events.close()
+
+    def _finish(self, job: ExtractionJob, state: JobState):
+        job.state = state
+        job.finished_at = datetime.now()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
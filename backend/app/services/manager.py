@@ -1,91 +1,442 @@
 import concurrent.futures
+import math
+import os
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from .parser import AdvancedCableParser
-from ..core.cache import ExtractionCache
-from ..models.schemas import ExtractionSummary
+from ..core.cache import CacheStats, ExtractionCache, MemoryCache, PageCache, TextLayerCache
+from ..core.singleflight import SingleFlight
+from ..core.workers import PeakRSSWindow, WorkerPool, default_pool_size
+from ..models.schemas import CableRecord, ExtractionSummary, MissRecord
+
+# Shards per worker: more shards than workers keeps every core busy
+# while the tail of a large drawing is still being parsed.
+SHARDS_PER_WORKER = 4
+
+# In-flight parses by content hash + parser version, shared by every batch in this process
+_flights = SingleFlight()
+# How long a batch waits for another batch's parse before parsing the file itself
+DEFAULT_FLIGHT_WAIT_SECONDS = 120
+
+def _from_cache(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cached JSON rows -> CableRecords / MissRecords (the in-process representation)."""
+    return {**data, "cables": [CableRecord.from_dict(c) for c in data["cables"]],
+            "misses": [MissRecord.from_dict(m) for m in data["misses"]]}
+
+def _to_cache(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {**result, "cables": [c._asdict() for c in result["cables"]],
+            "misses": [m._asdict() for m in result["misses"]]}
+
+def _load_cached(file_path: str, file_hash: str) -> Dict[str, Any]:
+    """Decoded file result from MemoryCache, else from ExtractionCache (promoted to memory); None if uncached."""
+    version = AdvancedCableParser.version()
+    key = f"{file_hash}_{version}"
+    data = MemoryCache.get(key)
+    if data is None:
+        cached = ExtractionCache.get(file_path, file_hash=file_hash, version=version)
+        if cached:
+            data = _from_cache(cached)
+            MemoryCache.set(key, data)
+    return data
 
-# Module-level function for multiprocessing (Picklable)
-def process_single_file(file_path: str) -> Dict[str, Any]:
+def _store_result(file_path: str, file_hash: str, result: Dict[str, Any]):
+    version = AdvancedCableParser.version()
+    ExtractionCache.set(file_path, _to_cache(result), file_hash=file_hash, version=version)
+    MemoryCache.set(f"{file_hash}_{version}", result)
+
+def process_page_shard(file_path: str, start_page: int, end_page: int,
+                       file_hash: str = None, reparse: bool = False) -> Dict[str, Any]:
     """
-    Worker function executed in separate process.
-    Returns dictionary with 'cables', 'meta', 'misses', 'error'.
+    Worker function for one page range of a PDF.
+    Returns the raw (not yet deduplicated) cables of the range so the parent
+    can merge all shards of a file in page order.
+    Pages already seen in any file (e.g. an earlier revision) come from PageCache;
+    page text comes from TextLayerCache, so reparse only re-runs the regex stage.
     """
-    # Check Cache First
-    cached = ExtractionCache.get(file_path)
-    if cached:
-        return {"cached": True, "data": cached, "file": Path(file_path).name}
-
-    # If no cache, Parse
-    parser = AdvancedCableParser() # New instance per process
+    parser = AdvancedCableParser()
+    memory = PeakRSSWindow()
     try:
-        # Extract metadata
-        filename = Path(file_path).name
-        meta = parser.extract_metadata(filename)
-        
-        # Parse cables
-        cables = parser.parse_file(file_path)
-        
-        # Serialize for return/caching
-        cables_data = [c.dict() for c in cables]
-        
-        result = {
-            "cables": cables_data,
-            "meta": meta,
+        cables = parser.parse_pages(file_path, start_page, end_page, page_cache=PageCache,
+                                    text_cache=TextLayerCache, file_key=file_hash, refresh_pages=reparse)
+        # CableRecords pickle as compact tuples across the process boundary
+        return {
+            "start_page": start_page,
+            "cables": cables,
             "misses": parser.missed_patterns,
+            "peak_rss_mb": memory.peak_mb(),
+            # This worker's cache counters since its last shard
+            "cache_stats": CacheStats.drain(),
             "error": None
         }
-        
-        # Save to Cache
-        ExtractionCache.set(file_path, result)
-        
-        return {"cached": False, "data": result, "file": filename}
-        
     except Exception as e:
-        return {"cached": False, "data": None, "file": Path(file_path).name, "error": str(e)}
+        return {"start_page": start_page, "cables": [], "misses": [], "peak_rss_mb": memory.peak_mb(),
+                "cache_stats": CacheStats.drain(), "error": str(e)}
 
 class ExtractionManager:
     """
     Manages parallel execution of extraction tasks.
+    Files are split into page-range shards so one large drawing is spread
+    across every worker instead of being bound to a single process.
     """
-    
-    def __init__(self, max_workers: int = None):
-        # Default to fewer than CPU count to leave room for OS/Server
-        self.max_workers = max_workers or (os.cpu_count() or 1)
 
-    def extract_batch(self, file_paths: List[str]) -> Dict[str, Any]:
+    def __init__(self, max_workers: int = None, pages_per_shard: int = None, pool: WorkerPool = None,
+                 flight_wait: float = None):
+        # Sized from the container's cgroup CPU/memory limits, not host cores
+        self.max_workers = max_workers or default_pool_size()
+        # None = size shards from the batch's total page count
+        self.pages_per_shard = pages_per_shard
+        self.flight_wait = flight_wait or float(os.getenv("EXTRACT_FLIGHT_WAIT_SECONDS", DEFAULT_FLIGHT_WAIT_SECONDS))
+        self.pool = None
+        if pool is not None:
+            self.attach_pool(pool)
+
+    def attach_pool(self, pool: WorkerPool = None):
+        """
+        Use a long-lived WorkerPool (created in the API lifespan) instead of
+        spawning a ProcessPoolExecutor per batch. None detaches it.
+        """
+        self.pool = pool
+        if pool is not None:
+            self.max_workers = pool.max_workers
+
+    @property
+    def background_shards(self) -> int:
+        """
+        Shards a background batch may have in the pool at once (EXTRACT_BACKGROUND_SHARDS,
+        default half the workers), so the rest stay free for interactive requests.
+        """
+        override = os.getenv("EXTRACT_BACKGROUND_SHARDS")
+        return max(1, int(override) if override else self.max_workers // 2)
+
+    def plan_shards(self, page_counts: Dict[str, int], pages_per_shard: int = None,
+                    first_page_alone: bool = False) -> List[Tuple[str, int, int]]:
+        """
+        Splits every file into (file_path, start_page, end_page) shards and orders
+        them largest-first across the whole batch (LPT scheduling).
+        Shard cost is estimated from the file's bytes per page.
+        first_page_alone makes each file's first page a shard of its own, queued
+        before the rest: results start after one page, while the remaining shards
+        stay normal-sized (each shard reopens its PDF, so page-sized ones are costly).
+        """
+        total_pages = sum(page_counts.values())
+        if total_pages == 0:
+            return []
+        per_shard = (pages_per_shard or self.pages_per_shard
+                     or max(1, math.ceil(total_pages / (self.max_workers * SHARDS_PER_WORKER))))
+
+        first_pages = []
+        shards = []
+        for file_path, pages in page_counts.items():
+            try:
+                bytes_per_page = os.path.getsize(file_path) / max(pages, 1)
+            except OSError:
+                bytes_per_page = 1.0
+            first = 0
+            if first_page_alone and pages > 0:
+                first_pages.append((file_path, 0, 1))
+                first = 1
+            for start in range(first, pages, per_shard):
+                end = min(start + per_shard, pages)
+                shards.append(((end - start) * bytes_per_page, file_path, start, end))
+
+        # Stable sort keeps input order among equal-cost shards
+        shards.sort(key=lambda s: s[0], reverse=True)
+        return first_pages + [(fp, start, end) for _, fp, start, end in shards]
+
+    @staticmethod
+    def _merge_shards(shard_results: List[Dict[str, Any]]) -> Tuple[List[CableRecord], List[MissRecord]]:
+        """Merges shard results in page order, then deduplicates like AdvancedCableParser._deduplicate."""
+        cables = []
+        misses = []
+        for res in sorted(shard_results, key=lambda r: r["start_page"]):
+            cables.extend(res["cables"])
+            misses.extend(res["misses"])
+        unique_map = {c.cable_name: c for c in cables}
+        # A token is reported once per file, at its first page, unless it was extracted elsewhere
+        unique_misses = {}
+        for m in misses:
+            if m.token.replace('-', '').replace(' ', '') not in unique_map:
+                unique_misses.setdefault(m.token, m)
+        return list(unique_map.values()), list(unique_misses.values())
+
+    def _iter_shard_results(self, shards: Iterable[Tuple[str, int, int]], file_hashes: Dict[str, str] = None,
+                            reparse: bool = False,
+                            max_in_flight: int = None) -> Iterator[Tuple[Tuple[str, int, int], Dict[str, Any]]]:
+        """
+        Yields (shard, result) pairs as soon as each shard finishes.
+        Every shard is submitted before the first result is awaited; a lazy
+        shards iterable is submitted as it produces them. With max_in_flight,
+        at most that many are submitted at once and the next waits for a result,
+        so the pool's FIFO queue never holds more of this batch than that.
+        """
+        file_hashes = file_hashes or {}
+        executor = None
+        future_to_shard = {}
+        pending = set()
+        try:
+            for shard in shards:
+                if self.pool is not None:
+                    submit = self.pool.submit
+                elif executor is None:
+                    executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+                    submit = executor.submit
+                future = submit(process_page_shard, *shard, file_hashes.get(shard[0]), reparse)
+                future_to_shard[future] = shard
+                pending.add(future)
+                if max_in_flight and len(pending) >= max_in_flight:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield future_to_shard[future], future.result()
+            for future in concurrent.futures.as_completed(pending):
+                yield future_to_shard[future], future.result()
+        finally:
+            # Consumer stopped early (e.g. client disconnected): drop queued shards
+            for future in future_to_shard:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def iter_batch(self, file_paths: Iterable[str], pages_per_shard: int = None,
+                   reparse: bool = False, background: bool = False,
+                   first_page_alone: bool = False,
+                   page_counts: Dict[str, int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Runs a batch and yields events as results are produced:
+        'start', then 'pages' (one per finished shard, or one per cached file),
+        'file' / 'error' per file, and 'summary' (the extract_batch result) last.
+        reparse bypasses the parsed-result caches (e.g. after a rule change)
+        but still reuses cached page text.
+        A file another batch in this process is already parsing (same ship
+        requested twice, one drawing in two ships) is not parsed again: this
+        batch waits for that result instead.
+        file_paths may also be a lazy iterable (e.g. files still downloading):
+        each file is then sharded and submitted as soon as it arrives, so the
+        pool parses it while later files download; 'start' then carries only
+        the counts known so far and cached files are reported after the shards.
+        first_page_alone is passed to plan_shards (quick first events for streaming).
+        page_counts (by content hash, e.g. from the ship manifest) spares opening
+        each file just to plan its shards; files missing from it are counted.
+        background (cache warm-up) keeps at most background_shards shards in
+        the shared pool, so interactive batches never queue behind all of them.
+        """
         start_time = time.time()
-        
+        version = AdvancedCableParser.version()
+        streamed = not isinstance(file_paths, (list, tuple))
+        known_pages = page_counts if page_counts is not None else {}
+
+        # Serve cached files directly (memory, then disk); only uncached files are
+        # sharded, so a fully cached ship never touches the worker pool
+        seen = []
+        admitted = set()
+        cached_files = []
+        file_data = {}
+        page_counts = {}
+        file_hashes = {}
+        # Flights this batch leads (flight key -> fp), one per admitted file, so
+        # none is lost even if a path is admitted twice with different content
+        leading = {}
+        # Files another batch is parsing (fp -> (its future, page count))
+        following = {}
+        remaining = {}
+        shard_results = {}
+        peak_rss = None
+        counters = {
+            "pages_done": 0,
+            "total_pages": 0,
+            "files_done": 0,
+            "total_files": 0 if streamed else len(set(file_paths)),
+        }
+
+        def resolve(fp: str, result: Optional[Dict[str, Any]]):
+            current = f"{file_hashes.get(fp)}_{version}"
+            for key in [key for key, led in leading.items() if led == fp]:
+                del leading[key]
+                # A key for content fp no longer has gets None: its followers parse it themselves
+                _flights.resolve(key, result if key == current else None)
+
+        def admit(fp: str) -> Optional[int]:
+            """Serves fp from the cache or another batch's flight; otherwise returns its page count to parse."""
+            if fp in admitted:
+                # Listed twice: one parse, one entry in the summary
+                return None
+            admitted.add(fp)
+            seen.append(fp)
+            if streamed:
+                counters["total_files"] += 1
+            try:
+                file_hashes[fp] = ExtractionCache.get_file_hash(fp)
+            except OSError as e:
+                print(f"❌ Error processing {Path(fp).name}: {e}")
+                return None
+            cached = None if reparse else _load_cached(fp, file_hashes[fp])
+            if cached:
+                file_data[fp] = cached
+                cached_files.append(fp)
+                counters["files_done"] += 1
+                return None
+            pages = known_pages.get(file_hashes[fp])
+            if pages is None:
+                try:
+                    pages = AdvancedCableParser.count_pages(fp)
+                except Exception as e:
+                    print(f"❌ Error processing {Path(fp).name}: {e}")
+                    return None
+            counters["total_pages"] += pages
+            if not reparse:
+                key = f"{file_hashes[fp]}_{version}"
+                future, leader = _flights.acquire(key)
+                if not leader:
+                    following[fp] = (future, pages)
+                    return None
+                leading[key] = fp
+            if pages == 0:
+                # Files without pages never get a shard; finish them right away
+                file_data[fp] = self._finish_file(fp, [])
+                resolve(fp, file_data[fp])
+                counters["files_done"] += 1
+                return None
+            page_counts[fp] = pages
+            return pages
+
+        def track(shards: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int]]:
+            # Registered before submission, so a file is complete once its count drops to 0
+            for fp, _, _ in shards:
+                remaining[fp] = remaining.get(fp, 0) + 1
+                shard_results.setdefault(fp, [])
+            return shards
+
+        def arrivals() -> Iterator[Tuple[str, int, int]]:
+            for fp in file_paths:
+                pages = admit(fp)
+                if pages:
+                    yield from track(self.plan_shards({fp: pages}, pages_per_shard, first_page_alone))
+
+        def run_shards(shards: Iterable[Tuple[str, int, int]]) -> Iterator[Dict[str, Any]]:
+            nonlocal peak_rss
+            failed = set()
+            throttle = {"max_in_flight": self.background_shards} if background else {}
+            for (fp, start, end), res in self._iter_shard_results(shards, file_hashes, reparse, **throttle):
+                name = Path(fp).name
+                counters["pages_done"] += end - start
+                remaining[fp] -= 1
+                if res.get("peak_rss_mb") is not None:
+                    peak_rss = max(peak_rss or 0.0, res["peak_rss_mb"])
+                CacheStats.merge(res.get("cache_stats"))
+
+                if res.get("error"):
+                    if fp not in failed:
+                        failed.add(fp)
+                        counters["files_done"] += 1
+                        resolve(fp, None)
+                        print(f"❌ Error processing {name}: {res['error']}")
+                        yield {"event": "error", "file": name, "error": res["error"], "progress": dict(counters)}
+                    continue
+                if fp in failed:
+                    continue
+
+                shard_results[fp].append(res)
+                yield {"event": "pages", "file": name, "pages": [start + 1, end], "cached": False,
+                       "cables": res["cables"], "misses": res["misses"], "progress": dict(counters)}
+
+                if remaining[fp] == 0:
+                    result = self._finish_file(fp, shard_results.pop(fp))
+                    _store_result(fp, file_hashes[fp], result)
+                    resolve(fp, result)
+                    file_data[fp] = result
+                    counters["files_done"] += 1
+                    print(f"✅ Finished {name} (Cached: False)")
+                    yield {"event": "file", "file": name, "total_count": len(result["cables"]), "progress": dict(counters)}
+
+        def cached_events() -> Iterator[Dict[str, Any]]:
+            for fp in cached_files:
+                data = file_data[fp]
+                print(f"✅ Finished {Path(fp).name} (Cached: True)")
+                yield {"event": "pages", "file": Path(fp).name, "pages": None, "cached": True,
+                       "cables": data["cables"], "misses": data["misses"], "progress": dict(counters)}
+
+        try:
+            if streamed:
+                yield {"event": "start", "cached_files": 0, "total_shards": None, "progress": dict(counters)}
+                yield from run_shards(arrivals())
+                yield from cached_events()
+            else:
+                for fp in file_paths:
+                    admit(fp)
+                shards = track(self.plan_shards(page_counts, pages_per_shard, first_page_alone))
+                yield {"event": "start", "cached_files": len(cached_files), "total_shards": len(shards),
+                       "progress": dict(counters)}
+                yield from cached_events()
+                yield from run_shards(shards)
+
+            retry = {}
+            # One deadline for all of them: a leaked flight costs at most flight_wait
+            deadline = time.time() + self.flight_wait
+            for fp, (future, pages) in following.items():
+                try:
+                    result = future.result(timeout=max(0.0, deadline - time.time()))
+                except concurrent.futures.TimeoutError:
+                    print(f"[SingleFlight] Gave up waiting on another batch, parsing {Path(fp).name} here")
+                    result = None
+                if result is None:
+                    # The leading batch failed or was abandoned: parse it here
+                    retry[fp] = pages
+                    continue
+                CacheStats.incr("singleflight", "coalesced")
+                file_data[fp] = result
+                counters["pages_done"] += pages
+                counters["files_done"] += 1
+                print(f"✅ Finished {Path(fp).name} (Coalesced)")
+                yield {"event": "pages", "file": Path(fp).name, "pages": None, "cached": True,
+                       "cables": result["cables"], "misses": result["misses"], "progress": dict(counters)}
+            if retry:
+                yield from run_shards(track(self.plan_shards(retry, pages_per_shard)))
+        finally:
+            # Stopped early or failed: let waiting batches parse these themselves
+            for key in list(leading):
+                _flights.resolve(key, None)
+            leading.clear()
+
+        yield {"event": "summary", "summary": self._summarize(seen, file_data, start_time, peak_rss)}
+
+    def _finish_file(self, file_path: str, shard_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Builds the per-file result (the cached artifact) from its shards."""
+        cables, misses = self._merge_shards(shard_results)
+        return {
+            "cables": cables,
+            "meta": AdvancedCableParser().extract_metadata(Path(file_path).name),
+            "misses": misses,
+            "error": None
+        }
+
+    def extract_batch(self, file_paths: Iterable[str], reparse: bool = False,
+                      page_counts: Dict[str, int] = None) -> Dict[str, Any]:
+        summary = None
+        for event in self.iter_batch(file_paths, reparse=reparse, page_counts=page_counts):
+            if event["event"] == "summary":
+                summary = event["summary"]
+        return summary
+
+    def _summarize(self, file_paths: List[str], file_data: Dict[str, Dict[str, Any]], start_time: float,
+                   peak_rss: float = None) -> Dict[str, Any]:
         all_cables = []
         all_misses = []
         ship_info_agg = {"hull_no": set(), "ship_type": set()}
-        
-        # Use ProcessPoolExecutor for CPU-bound tasks
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks
-            future_to_file = {executor.submit(process_single_file, fp): fp for fp in file_paths}
-            
-            for future in concurrent.futures.as_completed(future_to_file):
-                res = future.result()
-                
-                if res.get("error"):
-                    print(f"❌ Error processing {res['file']}: {res['error']}")
-                    continue
-                
-                data = res["data"]
-                # Aggregate Results
-                # data["cables"] is a list of dicts here due to serialization
-                all_cables.extend(data["cables"])
-                all_misses.extend(data["misses"])
-                
-                meta = data["meta"]
-                if meta.get("hull_no") and meta["hull_no"] != "UNKNOWN":
-                    ship_info_agg["hull_no"].add(meta["hull_no"])
-                if meta.get("ship_type") and meta["ship_type"] != "UNKNOWN":
-                    ship_info_agg["ship_type"].add(meta["ship_type"])
-                    
-                print(f"✅ Finished {res['file']} (Cached: {res.get('cached')})")
+
+        # Aggregate in input order so results are deterministic
+        for fp in file_paths:
+            data = file_data.get(fp)
+            if data is None:
+                continue
+            # data["cables"] is a list of CableRecords
+            all_cables.extend(data["cables"])
+            all_misses.extend(data["misses"])
+
+            meta = data["meta"]
+            if meta.get("hull_no") and meta["hull_no"] != "UNKNOWN":
+                ship_info_agg["hull_no"].add(meta["hull_no"])
+            if meta.get("ship_type") and meta["ship_type"] != "UNKNOWN":
+                ship_info_agg["ship_type"].add(meta["ship_type"])
 
         # Resolve unified Ship Info
         unified_hull = next(iter(ship_info_agg["hull_no"])) if ship_info_agg["hull_no"] else "UNKNOWN"
@@ -94,22 +445,23 @@ class ExtractionManager:
         # Calculate Distributions
         system_counts = {}
         for c in all_cables:
-            # c is dict
-            sys_code = c["cable_name"][0]
+            sys_code = c.cable_name[0]
             system_counts[sys_code] = system_counts.get(sys_code, 0) + 1
 
         end_time = time.time()
-        
+
         return {
             "total_count": len(all_cables),
             "system_distribution": system_counts,
             "potential_misses": all_misses,
             "processing_time_ms": (end_time - start_time) * 1000,
+            # Memory ceiling of the workers that parsed this batch (None if all cached)
+            "peak_worker_rss_mb": peak_rss,
             "ship_metadata": {
                 "hull_no": unified_hull,
                 "ship_type": unified_type
             },
-            "cables": all_cables # Return full data if needed or handled by caller
+            "cables": all_cables, # Return full data if needed or handled by caller
+            # Outcome per file name, for the storage manifest
+            "file_status": {Path(fp).name: "extracted" if fp in file_data else "failed" for fp in file_paths}
         }
-
-import os
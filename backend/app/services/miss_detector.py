@@ -0,0 +1,49 @@
+import re
+from typing import Iterable, List, Set
+
+from ..models.schemas import MissRecord
+
+class MissDetector:
+    """
+    Flags tokens that look like circuit numbers (P-1234, P 1234, AB123C, ...)
+    but were not extracted as cables.
+    Known cables and already reported tokens are hash sets, and the non-cable
+    prefixes are compiled into one anchored alternation, so a page is checked
+    in a single pass regardless of how many cables it has.
+    """
+    LOOSE_PATTERN = re.compile(r'\b([A-Z]{1,2}[-\s]?\d{3,4}[A-Z]?)\b')
+    # Common non-cable strings
+    EXCLUDED_PREFIXES = ('IEC', 'JIS', 'NK', 'POS', 'NO', 'DWG', 'REF', 'REV', 'SEC', 'PAGE', 'DATE',
+                         'APP', 'CHK', 'DRW', 'TYP', 'CAP', r'AC\d', r'DC\d', 'OE-')
+    CONTEXT_CHARS = 50
+
+    def __init__(self, excluded_prefixes: Iterable[str] = EXCLUDED_PREFIXES):
+        self.exclude = re.compile('^(?:' + '|'.join(excluded_prefixes) + ')')
+        self.reported: Set[str] = set()
+
+    def reset(self):
+        self.reported.clear()
+
+    def detect(self, text: str, page_number: int, found: Iterable[str]) -> List[MissRecord]:
+        """
+        Potential misses on one page. found holds the cable names extracted from it;
+        offset is the token's character position in text.
+        """
+        found = found if isinstance(found, (set, frozenset)) else set(found)
+        misses = []
+        offset = 0
+        for line in text.split('\n'):
+            for m in self.LOOSE_PATTERN.finditer(line):
+                token = m.group(1)
+                clean = token.replace('-', '').replace(' ', '')
+                if clean in found or clean in self.reported or self.exclude.match(clean):
+                    continue
+                self.reported.add(clean)
+                misses.append(MissRecord(
+                    page_number=page_number,
+                    token=token,
+                    offset=offset + m.start(1),
+                    context=line.strip()[:self.CONTEXT_CHARS]
+                ))
+            offset += len(line) + 1
+        return misses
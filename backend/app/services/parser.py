@@ -1,89 +1,333 @@
+import hashlib
+import json
 import re
 import pdfplumber
-from typing import List, Dict, Tuple
+from pdfminer.pdftypes import PDFStream, resolve1
+from typing import List, Dict, Tuple, Any, Iterator
 from pathlib import Path
-from ..models.schemas import ExtractedCable, SystemType
+from ..models.schemas import CableRecord, MissRecord, SystemType
+from .cable_types import normalize_cable_type, rules_fingerprint
+from .miss_detector import MissDetector
+
+class ContextScanner:
+    """
+    Resolves a circuit's context window (lines i-2 .. i+4) from per-line match
+    lists computed once per page, instead of re-running every pattern over a
+    rebuilt context string for every circuit match.
+    """
+    BEFORE = 2
+    AFTER = 5
+
+    def __init__(self, lines: List[str], type_pattern, room_pattern, node_pattern, node_excludes):
+        self.lines = lines
+        self.room_pattern = room_pattern
+        self.types = []
+        self.rooms = []
+        self.nodes = []
+        for line in lines:
+            m = type_pattern.search(line)
+            self.types.append(m.group(1) if m else None)
+            self.rooms.append(room_pattern.findall(line))
+            self.nodes.append([n for n in node_pattern.findall(line) if n not in node_excludes and "DK" not in n])
+
+        # ROOM_PATTERN's \s+ can cross a line break when one line ends and the next
+        # non-blank line starts with an uppercase letter; such windows use the joined text
+        stripped = [line.strip() for line in lines]
+        self.join_to = [None] * len(lines)
+        next_nonblank = None
+        for j in range(len(lines) - 1, -1, -1):
+            if next_nonblank is not None and stripped[j][-1:].isascii() and stripped[j][-1:].isupper() \
+                    and stripped[next_nonblank][:1].isascii() and stripped[next_nonblank][:1].isupper():
+                self.join_to[j] = next_nonblank
+            if stripped[j]:
+                next_nonblank = j
+        self._resolved = {}
+
+    def resolve(self, i: int) -> Tuple[str, Tuple[str, str], Tuple[str, str]]:
+        """(cable_type, (from_room, to_room), (from_node, to_node)) for a match on line i."""
+        if i in self._resolved:
+            return self._resolved[i]
+        lo, hi = max(0, i - self.BEFORE), min(len(self.lines), i + self.AFTER)
+
+        cable_type = next((t for t in self.types[lo:hi] if t is not None), "UNKNOWN")
+
+        if any(self.join_to[j] is not None and self.join_to[j] < hi for j in range(lo, hi)):
+            rooms = self.room_pattern.findall('\n'.join(self.lines[lo:hi]))
+        else:
+            rooms = self._first_two(self.rooms[lo:hi])
+        nodes = self._first_two(self.nodes[lo:hi])
+
+        resolved = (cable_type, self._pair(rooms), self._pair(nodes))
+        self._resolved[i] = resolved
+        return resolved
+
+    @staticmethod
+    def _first_two(per_line: List[List[str]]) -> List[str]:
+        found = []
+        for matches in per_line:
+            found.extend(matches[:2 - len(found)])
+            if len(found) == 2:
+                break
+        return found
+
+    @staticmethod
+    def _pair(matches: List[str]) -> Tuple[str, str]:
+        if len(matches) >= 2: return matches[0], matches[1]
+        elif len(matches) == 1: return matches[0], ""
+        return "", ""
 
 class AdvancedCableParser:
     CIRCUIT_PATTERN = re.compile(r'\b([A-Z][\dA-Z-]{3,19})\b')
     CABLE_TYPE_PATTERN = re.compile(r'\b((?:[FDTMS][DYSM]?[YP]?[CS]?-?\d{1,3}|5P(?:YC)?-?\d+|RG-?\w+|CAT-?\d+)(?:\(\d+A\))?)\b')
     ROOM_PATTERN = re.compile(r'\b([A-Z]{2,}/[A-Z]|[A-Z]{3,}(?:\s+[A-Z]+)*)\b')
+    # Node Pattern: 1-3 Letters + digits (e.g. N25, TW99S)
+    NODE_PATTERN = re.compile(r'\b([A-Z]{1,3}\d{2,3}[A-Z]{0,2})\b')
+    NODE_EXCLUDES = frozenset(["SPYC", "TPYC", "DPYC", "CAT"])
+    # pdfplumber text-extraction settings; part of the text-layer cache key
+    TEXT_SETTINGS = {"x_tolerance": 3, "y_tolerance": 3}
+    # Bump for extraction logic changes that the patterns and tables below do not capture
+    RULES_REVISION = 1
+    _version = None
 
     def __init__(self):
         self.missed_patterns = []
+        self.miss_detector = MissDetector()
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        Short hash of the parsing rules; part of every parsed-result cache key,
+        so changing a pattern or table invalidates stale entries automatically.
+        """
+        if cls._version is None:
+            rules = [cls.RULES_REVISION, cls.CIRCUIT_PATTERN.pattern, cls.CABLE_TYPE_PATTERN.pattern,
+                     cls.ROOM_PATTERN.pattern, cls.NODE_PATTERN.pattern, sorted(cls.NODE_EXCLUDES),
+                     cls.TEXT_SETTINGS, MissDetector.LOOSE_PATTERN.pattern, MissDetector.EXCLUDED_PREFIXES,
+                     rules_fingerprint()]
+            cls._version = hashlib.md5(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:10]
+        return cls._version
 
     def reset_state(self):
         self.missed_patterns = []
+        self.miss_detector.reset()
 
-    def parse_file(self, file_path: str) -> List[ExtractedCable]:
+    def parse_file(self, file_path: str) -> List[CableRecord]:
         extracted_data = []
         path = Path(file_path)
         if not path.exists(): return []
 
         try:
-            with pdfplumber.open(path) as pdf:
-                for page_idx, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    extracted_data.extend(self._extract_cables_from_text(text, page_idx + 1))
+            extracted_data.extend(self.iter_cables(path))
         except:
             pass
         return self._deduplicate(extracted_data)
 
+    def iter_cables(self, file_path, start_page: int = 0, end_page: int = None) -> Iterator[CableRecord]:
+        """Generator-based parse: yields each page's cables as soon as its text is extracted."""
+        for page_num, text in self.iter_page_texts(file_path, start_page, end_page):
+            yield from self._extract_cables_from_text(text, page_num)
+
+    def iter_page_texts(self, file_path, start_page: int = 0, end_page: int = None) -> Iterator[Tuple[int, str]]:
+        for page_num, page in self.iter_pages(file_path, start_page, end_page):
+            yield page_num, page.extract_text(**self.TEXT_SETTINGS) or ""
+
+    @staticmethod
+    def iter_pages(file_path, start_page: int = 0, end_page: int = None) -> Iterator[Tuple[int, Any]]:
+        """
+        Streams (page_number, page) for the 0-based range [start_page, end_page).
+        pdfplumber keeps every page's layout objects cached on the open document,
+        so each page is released as soon as the consumer moves on; peak memory
+        then depends on the largest page, not on the page count.
+        """
+        with pdfplumber.open(file_path) as pdf:
+            pages = pdf.pages
+            stop = len(pages) if end_page is None else min(end_page, len(pages))
+            for page_idx in range(start_page, stop):
+                page = pages[page_idx]
+                try:
+                    yield page_idx + 1, page
+                finally:
+                    AdvancedCableParser.release_page(page)
+
+    @staticmethod
+    def release_page(page):
+        """Drops a page's cached chars/layout and text maps."""
+        page.flush_cache()
+        page.get_textmap.cache_clear()
+
+    def parse_pages(self, file_path: str, start_page: int, end_page: int, page_cache=None,
+                    text_cache=None, file_key: str = None, refresh_pages: bool = False) -> List[CableRecord]:
+        """
+        Parses the 0-based page range [start_page, end_page) without deduplication,
+        so shards of one file can be merged in page order and deduplicated once.
+        With a page_cache (get/set by page fingerprint), unchanged pages skip
+        text extraction and parsing entirely; refresh_pages re-parses and overwrites them.
+        With a text_cache and file_key, page text is extracted once and reused,
+        so re-parsing after a rule change only re-runs the regex stage.
+        """
+        extracted_data = []
+        for page_num, page in self.iter_pages(file_path, start_page, end_page):
+            key = f"{self.page_fingerprint(page)}_{self.version()}" if page_cache is not None else None
+            hit = page_cache.get(key) if key and not refresh_pages else None
+            if hit is not None:
+                extracted_data.extend(self._restore_page(hit, page_num))
+                continue
+
+            misses_before = len(self.missed_patterns)
+            text = self._page_text(page, page_num, text_cache, file_key)
+            cables = self._extract_cables_from_text(text, page_num)
+            if key:
+                page_cache.set(key, {
+                    "cables": [c._asdict() for c in cables],
+                    "misses": [m._asdict() for m in self.missed_patterns[misses_before:]]
+                })
+            extracted_data.extend(cables)
+        return extracted_data
+
+    def _page_text(self, page, page_num: int, text_cache=None, file_key: str = None) -> str:
+        if text_cache is None or file_key is None:
+            return page.extract_text(**self.TEXT_SETTINGS) or ""
+        key = text_cache.key(file_key, page_num, self.TEXT_SETTINGS)
+        layer = text_cache.get(key)
+        if layer is None:
+            layer = self.extract_text_layer(page)
+            text_cache.set(key, layer)
+        return layer["text"]
+
+    def extract_text_layer(self, page) -> Dict[str, Any]:
+        """Page text plus word boxes as [text, x0, top, x1, bottom]."""
+        words = page.extract_words(**self.TEXT_SETTINGS)
+        return {
+            "text": page.extract_text(**self.TEXT_SETTINGS) or "",
+            "words": [[w["text"], round(w["x0"], 2), round(w["top"], 2), round(w["x1"], 2), round(w["bottom"], 2)]
+                      for w in words]
+        }
+
+    def _restore_page(self, entry: Dict[str, Any], page_num: int) -> List[CableRecord]:
+        # The same page may sit at a different index in a new revision
+        self.missed_patterns.extend(MissRecord.from_dict(m)._replace(page_number=page_num) for m in entry["misses"])
+        return [CableRecord.from_dict(c)._replace(page_number=page_num) for c in entry["cables"]]
+
+    @staticmethod
+    def page_fingerprint(page) -> str:
+        """
+        Content address of a page: geometry plus the raw bytes of its content
+        streams, form/image XObjects and font dictionaries (encodings, ToUnicode
+        maps and embedded font programs included). Independent of the file the
+        page lives in, so unchanged pages of a new revision hash identically.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((page.bbox, page.rotation)).encode())
+        for stream in page.page_obj.contents:
+            AdvancedCableParser._hash_stream(digest, resolve1(stream))
+        AdvancedCableParser._hash_resources(digest, page.page_obj.resources, set())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_stream(digest, stream):
+        if isinstance(stream, PDFStream):
+            data = stream.get_rawdata()
+            digest.update(data if data is not None else stream.get_data())
+
+    @staticmethod
+    def _hash_resources(digest, resources, seen: set):
+        resources = resolve1(resources) or {}
+        fonts = resolve1(resources.get("Font")) or {}
+        for name in sorted(fonts):
+            digest.update(f"{name}=".encode())
+            # Same BaseFont can still map glyphs to different text
+            AdvancedCableParser._hash_object(digest, fonts[name], seen)
+
+        xobjects = resolve1(resources.get("XObject")) or {}
+        for name in sorted(xobjects):
+            ref = xobjects[name]
+            ref_id = getattr(ref, "objid", id(ref))
+            if ref_id in seen:
+                continue
+            seen.add(ref_id)
+            xobj = resolve1(ref)
+            digest.update(name.encode())
+            AdvancedCableParser._hash_stream(digest, xobj)
+            # Form XObjects carry their own fonts and nested forms
+            if isinstance(xobj, PDFStream) and xobj.get("Resources") is not None:
+                AdvancedCableParser._hash_resources(digest, xobj.get("Resources"), seen)
+
+    @staticmethod
+    def _hash_object(digest, obj, seen: set):
+        """Hashes a PDF object with everything it references; shared objects once per page."""
+        ref_id = getattr(obj, "objid", None)
+        if ref_id is not None:
+            if ref_id in seen:
+                digest.update(f"@{ref_id}".encode())
+                return
+            seen.add(ref_id)
+        obj = resolve1(obj)
+        if isinstance(obj, PDFStream):
+            AdvancedCableParser._hash_object(digest, obj.attrs, seen)
+            AdvancedCableParser._hash_stream(digest, obj)
+        elif isinstance(obj, dict):
+            digest.update(b"<<")
+            for key in sorted(obj):
+                digest.update(f"/{key}".encode())
+                AdvancedCableParser._hash_object(digest, obj[key], seen)
+            digest.update(b">>")
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b"[")
+            for item in obj:
+                AdvancedCableParser._hash_object(digest, item, seen)
+            digest.update(b"]")
+        else:
+            digest.update(repr(obj).encode())
+
+    @staticmethod
+    def count_pages(file_path: str) -> int:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+
     def extract_metadata(self, filename: str) -> Dict[str, str]:
         meta = {"hull_no": "UNKNOWN", "ship_type": "UNKNOWN", "system": "UNKNOWN"}
         return meta
         
-    def parse(self, lines: List[str]) -> List[ExtractedCable]:
+    def parse(self, lines: List[str]) -> List[CableRecord]:
         return self._extract_cables_from_text('\n'.join(lines), 1)
 
-    def _extract_cables_from_text(self, text: str, page_num: int) -> List[ExtractedCable]:
+    def _extract_cables_from_text(self, text: str, page_num: int) -> List[CableRecord]:
         cables = []
         lines = text.split('\n')
+        scanner = ContextScanner(lines, self.CABLE_TYPE_PATTERN, self.ROOM_PATTERN,
+                                 self.NODE_PATTERN, self.NODE_EXCLUDES)
         for i, line in enumerate(lines):
             matches = self.CIRCUIT_PATTERN.findall(line)
             for circuit_num in matches:
                 # Simplified robust extraction
                 if len(circuit_num.strip()) < 4: continue
-                
-                # Context window
-                context = '\n'.join(lines[max(0, i-2):min(len(lines), i+5)])
-                
-                try:
-                    cables.append(ExtractedCable(
-                        cable_name=circuit_num.strip(),
-                        cable_type=self._find_match(self.CABLE_TYPE_PATTERN, context),
-                        from_room=self._find_rooms(context)[0],
-                        to_room=self._find_rooms(context)[1],
-                        from_equip="", to_equip="",
-                        from_node=self._find_nodes(context)[0],
-                        to_node=self._find_nodes(context)[1],
-                        page_number=page_num,
-                        raw_text=line.strip()
-                    ))
-                except ValueError: pass
-        return cables
 
-    def _find_match(self, pattern, text):
-        m = pattern.search(text)
-        return m.group(1) if m else "UNKNOWN"
+                # Context window, shared by every match on this line
+                cable_type, rooms, nodes = scanner.resolve(i)
 
-    def _find_rooms(self, context: str) -> Tuple[str, str]:
-        rooms = self.ROOM_PATTERN.findall(context)
-        if len(rooms) >= 2: return rooms[0], rooms[1]
-        elif len(rooms) == 1: return rooms[0], ""
-        return "", ""
+                # Plain record here; pydantic validation happens once at the API boundary
+                cables.append(CableRecord(
+                    cable_name=circuit_num.strip().upper(),
+                    cable_type=self._normalize_type(cable_type),
+                    from_room=rooms[0],
+                    to_room=rooms[1],
+                    from_node=nodes[0],
+                    to_node=nodes[1],
+                    page_number=page_num,
+                    raw_text=line.strip()
+                ))
 
-    def _find_nodes(self, context: str) -> Tuple[str, str]:
-        # Node Pattern: 1-3 Letters + digits (e.g. N25, TW99S)
-        node_pattern = r'\b([A-Z]{1,3}\d{2,3}[A-Z]{0,2})\b'
-        matches = [m for m in re.findall(node_pattern, context) if m not in ["SPYC", "TPYC", "DPYC", "CAT"] and "DK" not in m]
-        if len(matches) >= 2: return matches[0], matches[1]
-        elif len(matches) == 1: return matches[0], ""
-        return "", ""
+        # Misses are scoped to the page so they can be cached with it;
+        # ExtractionManager deduplicates them per file
+        self.miss_detector.reset()
+        self.missed_patterns.extend(
+            self.miss_detector.detect(text, page_num, {c.cable_name for c in cables}))
+        return cables
 
     def _normalize_type(self, raw_type: str) -> str:
-        return raw_type.strip().upper() if raw_type else "UNKNOWN"
+        # Shared, memoized normalizer (D-2 / D2 -> D(Y)(S)2)
+        return normalize_cable_type(raw_type) if raw_type else "UNKNOWN"
 
-    def _deduplicate(self, cables: List[ExtractedCable]) -> List[ExtractedCable]:
+    def _deduplicate(self, cables: List[CableRecord]) -> List[CableRecord]:
         unique_map = {c.cable_name: c for c in cables}
         return list(unique_map.values())
@@ -1,9 +1,218 @@
 
+import base64
+import concurrent.futures
+import hashlib
+import json
 import os
 import shutil
+import tempfile
+import threading
 from abc import ABC, abstractmethod
+from datetime import datetime
 from pathlib import Path
-from typing import List, BinaryIO
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from ..core.cache import HASH_CHUNK_SIZE, ExtractionCache, FileHashIndex, SummaryCache, hash_file
+from .parser import AdvancedCableParser
+
+# Concurrent blob downloads per extraction
+DEFAULT_MAX_DOWNLOADS = 8
+# Attempts at a manifest write before giving up on concurrent writers
+DEFAULT_MANIFEST_RETRIES = 5
+# Content store directory inside a storage root (ship IDs never start with '.')
+BLOBS_DIR = ".blobs"
+# Per-ship file index (a file locally, an object in the bucket for GCS)
+MANIFEST_NAME = ".manifest.json"
+# Generation/MD5 of each local copy of a GCS blob
+DOWNLOADS_NAME = ".downloads.json"
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _write_json(path: Path, doc: Dict[str, Any]):
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _safe_name(name: str, what: str) -> str:
+    """name itself if it is a plain file or folder name; ValueError for '.', '..', separators or a leading dot."""
+    if not name or name.startswith(".") or "/" in name or "\\" in name or "\0" in name:
+        raise ValueError(f"Invalid {what}: {name!r}")
+    return name
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def _count_pages(name: str, source: Union[str, BinaryIO]) -> Optional[int]:
+    """Page count of a PDF path or seekable stream (left at its position); None otherwise."""
+    if not name.lower().endswith(".pdf"):
+        return None
+    position = source.tell() if hasattr(source, "tell") else None
+    try:
+        return AdvancedCableParser.count_pages(source)
+    except Exception:
+        return None
+    finally:
+        if position is not None:
+            source.seek(position)
+
+class ShipManifest:
+    """
+    Index of one ship's files: {"version": n, "files": {name: entry}, "removed": {name: version}}.
+    Entries hold hash, size, pages, uploaded_at and extraction status. Every
+    change bumps the version and stamps it on the changed entry (or on the
+    removed name), so "what changed since version N" reads this one small
+    document instead of listing or hashing the storage.
+    """
+
+    def __init__(self, doc: Dict[str, Any] = None):
+        doc = doc or {}
+        if "files" not in doc:
+            # Pre-versioning manifest: {name: {"hash", "size"}}
+            doc = {"files": {name: {**entry, "name": name, "version": 0} for name, entry in doc.items()}}
+        self.version: int = doc.get("version", 0)
+        self.files: Dict[str, Dict[str, Any]] = doc["files"]
+        self.removed: Dict[str, int] = doc.get("removed", {})
+        # Whether anything changed since loading, i.e. it needs writing back
+        self.dirty = False
+
+    def _bump(self) -> int:
+        self.version += 1
+        self.dirty = True
+        return self.version
+
+    def put(self, name: str, **fields) -> Optional[Dict[str, Any]]:
+        """Adds or replaces a file's entry; returns the previous one."""
+        previous = self.files.get(name)
+        self.files[name] = {"name": name, **fields, "version": self._bump()}
+        self.removed.pop(name, None)
+        return previous
+
+    def update(self, name: str, **fields) -> bool:
+        """Changes fields of an existing entry; False (and no new version) if nothing changed."""
+        entry = self.files.get(name)
+        if entry is None or all(entry.get(k) == v for k, v in fields.items()):
+            return False
+        entry.update(fields)
+        entry["version"] = self._bump()
+        return True
+
+    def remove(self, name: str) -> Optional[Dict[str, Any]]:
+        """Drops a file's entry, remembering when; returns it."""
+        previous = self.files.pop(name, None)
+        if previous is not None:
+            self.removed[name] = self._bump()
+        return previous
+
+    def entries(self) -> List[Dict[str, Any]]:
+        return sorted(self.files.values(), key=lambda entry: entry["name"])
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """Entries added or changed after version, and names removed after it."""
+        return {
+            "version": self.version,
+            "changed": [entry for entry in self.entries() if entry["version"] > version],
+            "removed": sorted(name for name, v in self.removed.items() if v > version),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": self.version, "files": self.files, "removed": self.removed}
+
+class ContentStore:
+    """
+    Files stored once by content hash (MD5) under root/<hh>/<hash>.
+    Ship directories reference them as hard links (copies where links are
+    unsupported), so a drawing shared by sister ships takes disk space once
+    and every ship's path to it hashes to the same extraction cache entries.
+    Ship files must only be replaced (link()), never modified in place.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, file_hash: str) -> Path:
+        return self.root / file_hash[:2] / file_hash
+
+    def has(self, file_hash: str) -> bool:
+        return self.path(file_hash).is_file()
+
+    def temp_path(self) -> Path:
+        """A unique file beside the store, for content whose hash is not known yet."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        os.close(fd)
+        return Path(tmp_path)
+
+    def put_stream(self, file_obj: BinaryIO) -> str:
+        """Stores file_obj in HASH_CHUNK_SIZE chunks, hashing on the way; returns its hash."""
+        tmp_path = self.temp_path()
+        hash_md5 = hashlib.md5()
+        try:
+            with open(tmp_path, "wb") as out:
+                for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b""):
+                    hash_md5.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            tmp_path.unlink()
+            raise
+        return self.commit(tmp_path, hash_md5.hexdigest())
+
+    def commit(self, tmp_path: Path, file_hash: str) -> str:
+        """
+        Moves a file into the store, or drops it if the content is already there.
+        A file on another filesystem is copied in beside the store first.
+        """
+        blob = self.path(file_hash)
+        with self._lock:
+            if blob.is_file():
+                os.remove(tmp_path)
+                return file_hash
+            blob.parent.mkdir(exist_ok=True)
+            try:
+                os.replace(tmp_path, blob)
+                return file_hash
+            except OSError:
+                if not os.path.exists(tmp_path):
+                    raise
+        local_path = self.temp_path()
+        try:
+            shutil.copyfile(tmp_path, local_path)
+        except BaseException:
+            local_path.unlink()
+            raise
+        os.remove(tmp_path)
+        return self.commit(local_path, file_hash)
+
+    def link(self, file_hash: str, target: Path):
+        """Points target at the stored content, atomically replacing whatever was there."""
+        blob = self.path(file_hash)
+        tmp_path = target.with_name(f".{target.name}.{threading.get_ident()}.link")
+        with self._lock:
+            try:
+                if os.path.samefile(blob, target):
+                    return
+            except OSError:
+                pass
+            try:
+                os.link(blob, tmp_path)
+            except OSError:
+                shutil.copyfile(blob, tmp_path)
+            os.replace(tmp_path, target)
+
+    def release(self, file_hash: str):
+        """Drops the stored content once no ship file links to it any more."""
+        blob = self.path(file_hash)
+        with self._lock:
+            try:
+                if blob.stat().st_nlink <= 1:
+                    blob.unlink()
+            except FileNotFoundError:
+                pass
 
 class IStorageService(ABC):
     """Abstract Base Class for Storage Services"""
@@ -23,71 +232,421 @@ class IStorageService(ABC):
         """Get accessible path or download to temp path"""
         pass
 
+    @abstractmethod
+    def delete_file(self, ship_id: str, filename: str) -> bool:
+        """Delete a file; False if it did not exist"""
+        pass
+
+    @abstractmethod
+    def _modify_manifest(self, ship_id: str, change: Callable[[ShipManifest], Any]) -> Any:
+        """Applies change to the ship's manifest atomically, writing it back if it changed; returns change's result"""
+        pass
+
+    def manifest(self, ship_id: str) -> ShipManifest:
+        """The ship's manifest, built from a listing the first time it is needed"""
+        return self._modify_manifest(ship_id, lambda manifest: manifest)
+
+    def changes_since(self, ship_id: str, version: int = 0) -> Dict[str, Any]:
+        """Files added, replaced or re-extracted after manifest version, and files removed after it"""
+        return self.manifest(ship_id).changes_since(version)
+
+    def record_extraction(self, ship_id: str, statuses: Dict[str, str], parser_version: str):
+        """Stores each file's extraction outcome (by filename) in the manifest"""
+        def change(manifest: ShipManifest):
+            for name, status in statuses.items():
+                manifest.update(name, extraction={"status": status, "parser_version": parser_version})
+        self._modify_manifest(ship_id, change)
+
+    def validate_name(self, ship_id: str, filename: str):
+        """ValueError unless ship_id and filename are names this storage can hold"""
+        _safe_name(ship_id, "ship ID")
+        _safe_name(filename, "filename")
+
+    def save_existing(self, ship_id: str, filename: str, file_hash: str) -> Optional[str]:
+        """
+        Saves filename from content the storage already holds (by hex MD5), without
+        receiving it again; returns the path/uri, or None if the content must be uploaded
+        """
+        self.validate_name(ship_id, filename)
+        return None
+
+    def save_path(self, ship_id: str, filename: str, local_path: Path, file_hash: str) -> str:
+        """
+        Saves a local file whose hex MD5 is already verified, taking it over:
+        storage may move it rather than copy it. Returns the path/uri
+        """
+        self.validate_name(ship_id, filename)
+        try:
+            with open(local_path, "rb") as f:
+                return self.save_file(ship_id, filename, f)
+        finally:
+            os.remove(local_path)
+
+    def page_counts(self, ship_id: str) -> Dict[str, int]:
+        """Page count of each of the ship's PDFs by content hash, from the manifest"""
+        return {entry["hash"]: entry["pages"] for entry in self.manifest(ship_id).files.values()
+                if entry.get("hash") and entry.get("pages") is not None}
+
+    def _is_stored(self, ship_id: str, filename: str, file_hash: str) -> bool:
+        entry = self.manifest(ship_id).files.get(filename)
+        return bool(entry) and entry.get("hash") == file_hash
+
+    def iter_local_paths(self, ship_id: str, uris: List[str]) -> Iterable[str]:
+        """Local paths for list_files() entries, yielded as each becomes available"""
+        for uri in uris:
+            yield self.get_file_path(ship_id, uri)
+
+    def content_hashes(self, ship_id: str, uris: List[str]) -> Optional[List[str]]:
+        """Hex MD5 of each file's content (None if unknown), without fetching it if possible"""
+        files = self.manifest(ship_id).files
+        hashes = []
+        for uri in uris:
+            entry = files.get(Path(uri).name)
+            if not entry or not entry.get("hash"):
+                return None
+            hashes.append(entry["hash"])
+        return hashes
+
+    @staticmethod
+    def _files_changed(ship_id: str):
+        # The ship's memoized summary no longer matches its files
+        SummaryCache.invalidate(ship_id)
+
 class LocalStorageService(IStorageService):
+    """
+    wd/<ship_id>/<filename>, each file a link into the shared ContentStore
+    (wd/.blobs), and wd/<ship_id>/.manifest.json indexing them.
+    Listing reads the manifest only; a ship directory without one (files
+    placed by hand) is scanned once to build it.
+    """
+
     def __init__(self, base_dir: Path):
         self.base_dir = base_dir / "wd"
         self.base_dir.mkdir(exist_ok=True)
+        self.store = ContentStore(self.base_dir / BLOBS_DIR)
+        self._manifest_lock = threading.Lock()
     
+    def _ship_path(self, ship_id: str, filename: str = None) -> Path:
+        """wd/<ship_id>[/<filename>], refusing anything that would resolve outside wd."""
+        path = self.base_dir / _safe_name(ship_id, "ship ID")
+        if filename is not None:
+            path = path / _safe_name(filename, "filename")
+        if not path.resolve().is_relative_to(self.base_dir.resolve()):
+            raise ValueError(f"Invalid path: {path}")
+        return path
+
     def save_file(self, ship_id: str, filename: str, file_obj: BinaryIO) -> str:
-        ship_wd = self.base_dir / ship_id
-        ship_wd.mkdir(parents=True, exist_ok=True)
-        file_path = ship_wd / filename
+        self.validate_name(ship_id, filename)
+        # Hash while storing, so extraction never has to re-read the upload;
+        # content another ship already uploaded is kept once
+        return self._link_file(ship_id, filename, self.store.put_stream(file_obj))
+
+    def validate_name(self, ship_id: str, filename: str):
+        self._ship_path(ship_id, filename)
+
+    def save_existing(self, ship_id: str, filename: str, file_hash: str) -> Optional[str]:
+        self.validate_name(ship_id, filename)
+        if self._is_stored(ship_id, filename, file_hash):
+            return self.get_file_path(ship_id, filename)
+        if not self.store.has(file_hash):
+            return None
+        # Another ship (or an earlier revision) has the content: link it
+        return self._link_file(ship_id, filename, file_hash)
+
+    def save_path(self, ship_id: str, filename: str, local_path: Path, file_hash: str) -> str:
+        self.validate_name(ship_id, filename)
+        return self._link_file(ship_id, filename, self.store.commit(Path(local_path), file_hash))
+
+    def _link_file(self, ship_id: str, filename: str, file_hash: str) -> str:
+        file_path = self._ship_path(ship_id, filename)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file_obj, buffer)
+        self.store.link(file_hash, file_path)
+        FileHashIndex.record(str(file_path), file_hash)
+        previous = self.manifest(ship_id).files.get(filename)
+        # Pre-versioning entries have no page count; count it then
+        pages = previous.get("pages") if previous and previous.get("hash") == file_hash else None
+        if pages is None:
+            pages = _count_pages(filename, str(file_path))
+        previous = self._modify_manifest(ship_id, lambda manifest: manifest.put(
+            filename, hash=file_hash, size=file_path.stat().st_size, pages=pages,
+            uploaded_at=_now(), extraction={"status": "pending"}))
+        if previous and previous["hash"] != file_hash:
+            self.store.release(previous["hash"])
+        self._files_changed(ship_id)
             
         return str(file_path)
 
+    def _modify_manifest(self, ship_id: str, change: Callable[[ShipManifest], Any]) -> Any:
+        manifest_path = self._ship_path(ship_id) / MANIFEST_NAME
+        with self._manifest_lock:
+            doc = _read_json(manifest_path)
+            manifest = ShipManifest(doc) if doc is not None else self._scan(ship_id)
+            result = change(manifest)
+            if manifest.dirty:
+                _write_json(manifest_path, manifest.to_dict())
+        return result
+
+    def _scan(self, ship_id: str) -> ShipManifest:
+        manifest = ShipManifest()
+        ship_wd = self._ship_path(ship_id)
+        if not ship_wd.is_dir():
+            return manifest
+        for path in sorted(ship_wd.glob("*.pdf")) + sorted(ship_wd.glob("*.xlsx")):
+            manifest.put(path.name, hash=ExtractionCache.get_file_hash(str(path)), size=path.stat().st_size,
+                         pages=_count_pages(path.name, str(path)),
+                         uploaded_at=datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds"),
+                         extraction={"status": "pending"})
+        return manifest
+
     def list_files(self, ship_id: str) -> List[str]:
-        ship_wd = self.base_dir / ship_id
+        ship_wd = self._ship_path(ship_id)
         if not ship_wd.exists():
             return []
-        return [str(p) for p in ship_wd.glob("*.pdf")] + [str(p) for p in ship_wd.glob("*.xlsx")]
+        names = [entry["name"] for entry in self.manifest(ship_id).entries()]
+        return ([str(ship_wd / name) for name in names if name.lower().endswith(".pdf")]
+                + [str(ship_wd / name) for name in names if name.lower().endswith(".xlsx")])
     
     def get_file_path(self, ship_id: str, filename: str) -> str:
-        return str(self.base_dir / ship_id / filename)
+        return str(self._ship_path(ship_id, filename))
+
+    def iter_local_paths(self, ship_id: str, uris: List[str]) -> Iterable[str]:
+        # list_files() already returns local paths; a list lets the batch plan them as a whole
+        return list(uris)
+
+    def delete_file(self, ship_id: str, filename: str) -> bool:
+        file_path = self._ship_path(ship_id, filename)
+        previous = self._modify_manifest(ship_id, lambda manifest: manifest.remove(file_path.name))
+        if not file_path.is_file():
+            return previous is not None
+        file_path.unlink()
+        if previous:
+            self.store.release(previous["hash"])
+        self._files_changed(ship_id)
+        return True
 
 class GCSStorageService(IStorageService):
-    def __init__(self, bucket_name: str):
+    """
+    Blobs under gs://<bucket>/<ship_id>/, indexed by a manifest object
+    <ship_id>/.manifest.json that carries each blob's generation and MD5, so
+    listing and change detection cost one small GET instead of a bucket listing.
+    Blobs are downloaded on demand to a local cache directory; a per-ship
+    .downloads.json remembers the generation and MD5 of every local copy, so
+    unchanged blobs are never downloaded twice, and local copies are links into
+    a ContentStore, so content another ship already has (a shared drawing) is
+    not downloaded at all.
+    client defaults to google.cloud.storage.Client(); tests pass a fake.
+    """
+
+    def __init__(self, bucket_name: str, client=None, cache_dir: Path = None, max_downloads: int = None):
         self.bucket_name = bucket_name
-        # Late import to avoid hard dependency if not used
-        from google.cloud import storage
-        self.client = storage.Client()
+        if client is None:
+            # Late import to avoid hard dependency if not used
+            from google.cloud import storage
+            client = storage.Client()
+        self.client = client
         self.bucket = self.client.bucket(bucket_name)
+        self.cache_dir = cache_dir or Path(os.getenv("GCS_CACHE_DIR", "/tmp/seastar_cache"))
+        self.max_downloads = max_downloads or int(os.getenv("GCS_MAX_DOWNLOADS", DEFAULT_MAX_DOWNLOADS))
+        self.manifest_retries = int(os.getenv("GCS_MANIFEST_RETRIES", DEFAULT_MANIFEST_RETRIES))
+        self.store = ContentStore(self.cache_dir / BLOBS_DIR)
+        self._downloads_lock = threading.Lock()
+
+    @staticmethod
+    def _blob_fields(blob) -> Dict[str, Any]:
+        return {
+            # GCS already knows the content hash; extraction need not re-read the file
+            "hash": base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else None,
+            "md5_hash": blob.md5_hash,
+            "generation": blob.generation,
+            "size": blob.size,
+        }
 
     def save_file(self, ship_id: str, filename: str, file_obj: BinaryIO) -> str:
+        self.validate_name(ship_id, filename)
+        # Spooled into the local store (hashed on the way) and uploaded from there, so
+        # extracting it on this instance links the spool instead of downloading it back
+        return self._save_stored(ship_id, filename, self.store.put_stream(file_obj))
+
+    def save_existing(self, ship_id: str, filename: str, file_hash: str) -> Optional[str]:
+        self.validate_name(ship_id, filename)
+        if self._is_stored(ship_id, filename, file_hash):
+            return f"gs://{self.bucket_name}/{ship_id}/{filename}"
+        if not self.store.has(file_hash):
+            return None
+        # Content downloaded for another ship: upload it from the local store, not the client
+        return self._save_stored(ship_id, filename, file_hash)
+
+    def save_path(self, ship_id: str, filename: str, local_path: Path, file_hash: str) -> str:
+        self.validate_name(ship_id, filename)
+        return self._save_stored(ship_id, filename, self.store.commit(Path(local_path), file_hash))
+
+    def _save_stored(self, ship_id: str, filename: str, file_hash: str) -> str:
+        """Uploads content from the local store and keeps it as the ship's local copy, so it is never downloaded back."""
         blob_name = f"{ship_id}/{filename}"
         blob = self.bucket.blob(blob_name)
-        blob.upload_from_file(file_obj)
+        stored_path = self.store.path(file_hash)
+        blob.upload_from_filename(str(stored_path))
+        fields = self._blob_fields(blob)
+        self._modify_manifest(ship_id, lambda manifest: manifest.put(
+            filename, **fields, pages=_count_pages(filename, str(stored_path)), uploaded_at=_now(),
+            extraction={"status": "pending"}))
+        self._keep_local(ship_id, filename, file_hash, fields)
+        self._files_changed(ship_id)
         return f"gs://{self.bucket_name}/{blob_name}"
 
+    def _modify_manifest(self, ship_id: str, change: Callable[[ShipManifest], Any]) -> Any:
+        # Read-modify-write guarded by the object's generation; another
+        # instance writing in between makes the write fail, and we start over
+        manifest_name = f"{_safe_name(ship_id, 'ship ID')}/{MANIFEST_NAME}"
+        for _ in range(self.manifest_retries):
+            blob = self.bucket.get_blob(manifest_name)
+            manifest = ShipManifest(json.loads(blob.download_as_bytes())) if blob else self._scan(ship_id)
+            result = change(manifest)
+            if not manifest.dirty:
+                return result
+            try:
+                self.bucket.blob(manifest_name).upload_from_string(
+                    json.dumps(manifest.to_dict(), ensure_ascii=False), content_type="application/json",
+                    if_generation_match=blob.generation if blob else 0)
+                return result
+            except Exception as e:
+                if getattr(e, "code", None) != 412:  # Precondition Failed
+                    raise
+        raise RuntimeError(f"Manifest of {ship_id} kept changing; gave up after {self.manifest_retries} attempts")
+
+    def _scan(self, ship_id: str) -> ShipManifest:
+        manifest = ShipManifest()
+        for blob in self.client.list_blobs(self.bucket_name, prefix=f"{ship_id}/"):
+            name = blob.name[len(ship_id) + 1:]
+            if name == MANIFEST_NAME:
+                continue
+            updated = getattr(blob, "updated", None)
+            manifest.put(name, **self._blob_fields(blob), pages=None,
+                         uploaded_at=updated.isoformat(timespec="seconds") if updated else None,
+                         extraction={"status": "pending"})
+        return manifest
+
     def list_files(self, ship_id: str) -> List[str]:
-        blobs = self.client.list_blobs(self.bucket_name, prefix=f"{ship_id}/")
         # For parser compatibility, we might need to download them or handle gs:// paths
         # But Parser expects a file path. 
         # Strategy: Return gs:// URIs, and let get_file_path handle download.
-        return [f"gs://{self.bucket_name}/{blob.name}" for blob in blobs]
+        return [f"gs://{self.bucket_name}/{ship_id}/{entry['name']}" for entry in self.manifest(ship_id).entries()]
 
-    def get_file_path(self, ship_id: str, filename: str) -> str:
+    def _filename(self, ship_id: str, filename: str) -> str:
         # Check if it's already a full URI or just filename
-        blob_name = f"{ship_id}/{filename}"
         if filename.startswith("gs://"):
-             # extract blob name from URI
-             blob_name = filename.replace(f"gs://{self.bucket_name}/", "")
-        
-        # Download to a temporary location for processing
-        temp_dir = Path("/tmp/seastar_cache") / ship_id
+            # extract blob name from URI
+            return filename.replace(f"gs://{self.bucket_name}/{ship_id}/", "")
+        return filename
+
+    def get_file_path(self, ship_id: str, filename: str) -> str:
+        """Local copy of the blob, downloaded only if it is missing or its generation/MD5 changed."""
+        name = self._filename(ship_id, filename)
+        entry = self.manifest(ship_id).files.get(name)
+        if entry is None:
+            blob = self.bucket.get_blob(f"{ship_id}/{name}")
+            if blob is None:
+                raise FileNotFoundError(f"gs://{self.bucket_name}/{ship_id}/{name}")
+            entry = self._blob_fields(blob)
+        return self._fetch(ship_id, name, entry)
+
+    def _fetch(self, ship_id: str, name: str, entry: Dict[str, Any]) -> str:
+        # Both become local paths under cache_dir
+        blob_name = f"{_safe_name(ship_id, 'ship ID')}/{_safe_name(name, 'filename')}"
+        temp_dir = self.cache_dir / ship_id
         temp_dir.mkdir(parents=True, exist_ok=True)
-        local_path = temp_dir / Path(blob_name).name
-        
-        # Simple cache: if exists, skip download? (Risk of staleness)
-        # For security, better to always fresh download or check md5.
-        # For MVP: overwrite.
-        blob = self.bucket.blob(blob_name)
-        blob.download_to_filename(str(local_path))
-        
+        local_path = temp_dir / name
+
+        downloaded = self._downloads(ship_id).get(blob_name)
+        if (downloaded and downloaded["generation"] == entry["generation"]
+                and downloaded["md5_hash"] == entry["md5_hash"]
+                and local_path.is_file() and local_path.stat().st_size == entry["size"]):
+            return str(local_path)
+
+        file_hash = entry["hash"]
+        if file_hash is None or not self.store.has(file_hash):
+            # Download into the store and rename, so readers never see a partial file
+            part_path = self.store.temp_path()
+            try:
+                self.bucket.blob(blob_name).download_to_filename(str(part_path),
+                                                                 if_generation_match=entry["generation"])
+            except BaseException:
+                part_path.unlink()
+                raise
+            file_hash = self.store.commit(part_path, file_hash or hash_file(str(part_path)))
+        return self._keep_local(ship_id, name, file_hash, entry)
+
+    def _keep_local(self, ship_id: str, name: str, file_hash: str, entry: Dict[str, Any]) -> str:
+        """Links stored content in as the blob's local copy, remembering the generation it matches."""
+        blob_name = f"{ship_id}/{name}"
+        local_path = self.cache_dir / ship_id / name
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        downloaded = self._downloads(ship_id).get(blob_name)
+        self.store.link(file_hash, local_path)
+        FileHashIndex.record(str(local_path), file_hash)
+        self._record_download(ship_id, blob_name, {"generation": entry["generation"], "md5_hash": entry["md5_hash"]})
+        if downloaded and downloaded.get("md5_hash") and downloaded["md5_hash"] != entry["md5_hash"]:
+            self.store.release(base64.b64decode(downloaded["md5_hash"]).hex())
         return str(local_path)
 
+    def iter_local_paths(self, ship_id: str, uris: List[str]) -> Iterator[str]:
+        """Downloads up to max_downloads blobs at once and yields each local path as it lands."""
+        # One manifest read for the whole batch rather than one per file
+        files = self.manifest(ship_id).files
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_downloads,
+                                                         thread_name_prefix="gcs-download")
+        futures = {}
+        for uri in uris:
+            name = self._filename(ship_id, uri)
+            entry = files.get(name)
+            future = (executor.submit(self._fetch, ship_id, name, entry) if entry
+                      else executor.submit(self.get_file_path, ship_id, uri))
+            futures[future] = uri
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    print(f"❌ Download failed for {futures[future]}: {e}")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def delete_file(self, ship_id: str, filename: str) -> bool:
+        name = _safe_name(filename, "filename")
+        previous = self._modify_manifest(ship_id, lambda manifest: manifest.remove(name))
+        self._drop_local(ship_id, name)
+        blob = self.bucket.blob(f"{ship_id}/{name}")
+        if not blob.exists():
+            return previous is not None
+        blob.delete()
+        self._files_changed(ship_id)
+        return True
+
+    def _drop_local(self, ship_id: str, name: str):
+        """Removes the blob's local copy and releases its content once no other copy links to it."""
+        blob_name = f"{ship_id}/{name}"
+        with self._downloads_lock:
+            downloads = self._downloads(ship_id)
+            downloaded = downloads.pop(blob_name, None)
+            if downloaded is not None:
+                _write_json(self.cache_dir / ship_id / DOWNLOADS_NAME, downloads)
+        try:
+            (self.cache_dir / ship_id / name).unlink()
+        except FileNotFoundError:
+            pass
+        if downloaded and downloaded.get("md5_hash"):
+            self.store.release(base64.b64decode(downloaded["md5_hash"]).hex())
+
+    def _downloads(self, ship_id: str) -> Dict[str, Dict[str, Any]]:
+        return _read_json(self.cache_dir / ship_id / DOWNLOADS_NAME) or {}
+
+    def _record_download(self, ship_id: str, blob_name: str, entry: Dict[str, Any]):
+        with self._downloads_lock:
+            downloads = self._downloads(ship_id)
+            downloads[blob_name] = entry
+            _write_json(self.cache_dir / ship_id / DOWNLOADS_NAME, downloads)
+
 def get_storage_service() -> IStorageService:
     bucket_name = os.getenv("BUCKET_NAME")
     if bucket_name:
@@ -2,7 +2,8 @@
 import pandas as pd
 import difflib
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, BinaryIO, Union
+from .cable_types import normalize_series
 
 class UniversalParser:
     """
@@ -32,8 +33,9 @@ class UniversalParser:
         'remark': ['REMARK', 'NOTE', 'COMMENTS', 'PLAN HISTORY']
     }
 
-    def parse(self, file_path: str) -> List[Dict[str, Any]]:
-        df = pd.read_excel(file_path, header=None)
+    def parse(self, source: Union[str, BinaryIO]) -> List[Dict[str, Any]]:
+        """Parses a workbook from a path or a seekable binary stream (e.g. an upload's spool)."""
+        df = pd.read_excel(source, header=None)
         
         # 1. Detect Header Row
         header_idx = self.detect_header_row(df)
@@ -42,12 +44,19 @@ class UniversalParser:
         
         # 2. Extract Data
         # Re-read with correct header
-        df = pd.read_excel(file_path, header=header_idx)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        df = pd.read_excel(source, header=header_idx)
         
         # 3. Map Columns
         column_map = self.map_columns(df.columns.tolist())
         
         # 4. Standardize & Process
+        # Cable types are normalized in one pass over the column, not per row
+        type_col = next((k for k, v in column_map.items() if v == 'comp_name'), None)
+        if type_col is not None:
+            df[type_col] = normalize_series(df[type_col])
+
         normalized_data = []
         
         for _, row in df.iterrows():
@@ -0,0 +1,49 @@
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import pdfplumber
+
+# Add backend directory to path so we can import app modules
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from app.services.parser import AdvancedCableParser
+from test_parser_scanner import legacy_extract
+
+def run_benchmark(repeats: int = 3):
+    """
+    Times the regex stage of AdvancedCableParser on the wd/ drawings:
+    per-match context rebuild (legacy) vs the per-line ContextScanner.
+    Page text is extracted once up front so only the parse stage is measured.
+    """
+    warnings.simplefilter("ignore")
+    wd_dir = backend_dir.parent / "wd"
+    pdf_files = sorted(wd_dir.glob("*.pdf"))
+    if not pdf_files:
+        print(f"❌ Error: no PDFs found in {wd_dir}")
+        return
+
+    parser = AdvancedCableParser()
+    print(f"{'File':60} {'Cables':>7} {'Legacy ms':>10} {'Scanner ms':>11} {'Speedup':>8}")
+    for pdf_file in pdf_files:
+        with pdfplumber.open(pdf_file) as pdf:
+            pages = [page.extract_text() or "" for page in pdf.pages]
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            legacy = [c for i, t in enumerate(pages) for c in legacy_extract(parser, t, i + 1)]
+        legacy_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            scanned = [c for i, t in enumerate(pages) for c in parser._extract_cables_from_text(t, i + 1)]
+        scanner_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        assert [c["cable_name"] for c in legacy] == [c.cable_name for c in scanned]
+        print(f"{pdf_file.name[:60]:60} {len(scanned):>7} {legacy_ms:>10.1f} {scanner_ms:>11.1f} {legacy_ms / scanner_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
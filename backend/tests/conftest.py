@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+# Add backend to sys.path to import services
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core import cache
+
+
+def build_pdf(pages, font_entries=b"", extra_objs=()):
+    """
+    Builds a minimal text-only PDF. `pages` is a list of pages, each a list of text lines.
+    Lets tests exercise pdfplumber without shipping drawing fixtures.
+    `font_entries` are added to the font dictionary and may reference `extra_objs`,
+    which are numbered after the pages.
+    """
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2*i} 0 R" for i in range(len(pages))), len(pages))).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica " + font_entries + b" >>",
+    ]
+    for i, lines in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "40 800 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2*i} 0 R >>".encode())
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objs.extend(extra_objs)
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for idx, body in enumerate(objs):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (idx + 1) + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return out
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def _make(name, pages):
+        path = tmp_path / name
+        path.write_bytes(build_pdf(pages))
+        return str(path)
+    return _make
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keeps tests from reading or writing the real cache_store."""
+    cache_dir = tmp_path / "cache_store"
+    cache_dir.mkdir()
+    monkeypatch.setattr(cache, "CACHE_DIR", cache_dir)
+    # Spawned pool workers re-import the module and read the env var
+    monkeypatch.setenv("EXTRACT_CACHE_DIR", str(cache_dir))
+    cache.MemoryCache.clear()
+    cache.SummaryCache.clear()
+    return cache_dir
@@ -0,0 +1,104 @@
+"""
+Filesystem-backed stand-in for the parts of google.cloud.storage that
+GCSStorageService uses. Objects are files under root/<bucket>/<name>;
+generation is the file's mtime_ns, as with real GCS it changes on every write.
+"""
+import base64
+import hashlib
+import shutil
+from pathlib import Path
+
+
+class PreconditionFailed(Exception):
+    code = 412
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+        self.md5_hash = None
+        self.size = None
+
+    @property
+    def path(self) -> Path:
+        return self.bucket.root / self.name
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def reload(self):
+        st = self.path.stat()
+        self.generation = st.st_mtime_ns
+        self.size = st.st_size
+        self.md5_hash = base64.b64encode(hashlib.md5(self.path.read_bytes()).digest()).decode()
+        return self
+
+    def upload_from_file(self, file_obj):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as f:
+            shutil.copyfileobj(file_obj, f)
+        self.reload()
+
+    def upload_from_filename(self, filename):
+        with open(filename, "rb") as f:
+            self.upload_from_file(f)
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        if if_generation_match is not None:
+            current = self.path.stat().st_mtime_ns if self.exists() else 0
+            if current != if_generation_match:
+                raise PreconditionFailed(self.name)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(data.encode() if isinstance(data, str) else data)
+        self.reload()
+
+    def download_as_bytes(self):
+        return self.path.read_bytes()
+
+    def download_to_filename(self, filename, if_generation_match=None):
+        before = self.bucket.before_download
+        if before is not None:
+            before(self.name)
+        if if_generation_match is not None and self.path.stat().st_mtime_ns != if_generation_match:
+            raise PreconditionFailed(self.name)
+        shutil.copyfile(self.path, filename)
+        self.bucket.downloads.append(self.name)
+
+    def delete(self):
+        self.path.unlink()
+
+
+class FakeBucket:
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.downloads = []
+        # Called with the blob name before each download (e.g. to delay or gate it)
+        self.before_download = None
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        blob = FakeBlob(self, name)
+        return blob.reload() if blob.exists() else None
+
+
+class FakeClient:
+    def __init__(self, root: Path):
+        self.root = root
+        self._buckets = {}
+
+    def bucket(self, name):
+        if name not in self._buckets:
+            self._buckets[name] = FakeBucket(self.root / name)
+        return self._buckets[name]
+
+    def list_blobs(self, bucket_name, prefix=""):
+        bucket = self.bucket(bucket_name)
+        for path in sorted(bucket.root.rglob("*")):
+            name = path.relative_to(bucket.root).as_posix()
+            if path.is_file() and name.startswith(prefix):
+                yield FakeBlob(bucket, name).reload()
@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.admission import AdmissionController, QueueFull
+from app.services.storage import LocalStorageService
+
+
+def test_free_slots_go_to_least_served_ship():
+    admission = AdmissionController(max_active=1, max_queued=3)
+    running = admission.reserve("A")
+    a2 = admission.reserve("A")
+    a3 = admission.reserve("A")
+    b1 = admission.reserve("B")
+    assert running.admitted and admission.stats()["queued"] == 3
+
+    running.release()
+    assert a2.admitted
+    a2.release()
+    # B waited behind A's burst but is served before A's third run
+    assert b1.admitted and not a3.admitted
+    b1.release()
+    assert a3.admitted
+
+
+def test_full_queue_rejects_and_cancelled_tickets_leave_it():
+    admission = AdmissionController(max_active=1, max_queued=1)
+    admission.reserve("A")
+    waiting = admission.reserve("B")
+    with pytest.raises(QueueFull) as excinfo:
+        admission.reserve("C")
+    assert excinfo.value.retry_after >= 1
+
+    waiting.release()
+    assert not waiting.wait(0) and admission.stats()["queued"] == 0
+    assert not admission.reserve("C").admitted
+
+
+def test_background_tickets_yield_to_interactive_ones():
+    admission = AdmissionController(max_active=2, max_queued=2)
+    warm1 = admission.reserve("A", background=True)
+    warm2 = admission.reserve("B", background=True)
+    # The last slot stays free for interactive requests
+    assert warm1.admitted and not warm2.admitted
+    interactive = admission.reserve("C")
+    assert interactive.admitted
+
+    queued = admission.reserve("D")
+    warm1.release()
+    assert queued.admitted and not warm2.admitted
+    queued.release()
+    assert warm2.admitted
+    assert admission.stats()["background_active"] == 1
+
+
+def test_extract_returns_429_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "storage_service", LocalStorageService(tmp_path))
+    monkeypatch.setattr(main, "admission", AdmissionController(max_active=1, max_queued=0))
+    main.admission.reserve("OTHER")
+
+    response = TestClient(main.app).post("/api/extract/S1")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from app.services import cable_types
+from app.services.cable_types import normalize_cable_type, normalize_series
+from app.services.parser import AdvancedCableParser
+
+
+def test_hyphenated_and_plain_spellings_normalize_alike():
+    cases = [
+        ('D-2', 'D(Y)(S)2'), ('D2', 'D(Y)(S)2'),
+        ('T-35', 'T(Y)(S)35'), ('T35', 'T(Y)(S)35'),
+        ('TY-2', 'TY-2'), ('TY2', 'TY-2'),
+        ('FM-7', 'FMPYC(Y)(S)-7FA'), ('FM7', 'FMPYC(Y)(S)-7FA'),
+        ('TT-1Q', 'TT(Y)(S)1Q'), ('TT1Q', 'TT(Y)(S)1Q'),
+        ('FD-2', 'FDPYC(Y)(S)-2.5FA'), ('5P-1', '5PYC(Y)-1.5'),
+        ('STPCAT5', 'STP CAT-5'), ('dpyc(y)(s)-2.5', 'DPYC(Y)(S)-2.5'),
+        ('S2', 'S(Y)(S)2.5'), ('XYZ', 'XYZ'), ('', ''),
+    ]
+    for raw, expected in cases:
+        assert normalize_cable_type(raw) == expected, raw
+
+
+def test_normalize_series_matches_scalar():
+    raw = pd.Series(['D-2', None, 'T35', 'D-2', 'rg-6'], index=[10, 11, 12, 13, 14], name='CABLE_TYPE')
+    out = normalize_series(raw)
+    assert out.tolist() == ['D(Y)(S)2', '', 'T(Y)(S)35', 'D(Y)(S)2', 'RG-6']
+    assert out.index.tolist() == raw.index.tolist()
+    assert out.name == 'CABLE_TYPE'
+
+
+def test_normalizer_changes_invalidate_parser_caches(monkeypatch):
+    before = AdvancedCableParser.version()
+    monkeypatch.setattr(AdvancedCableParser, "_version", None)
+    monkeypatch.setattr(cable_types, "_CORE_SIZES", {**cable_types._CORE_SIZES, "70": "70"})
+
+    assert AdvancedCableParser.version() != before
@@ -0,0 +1,48 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.cache import CacheBudget, CacheStats, PageCache
+
+
+def _age(path, seconds_ago):
+    t = time.time() - seconds_ago
+    os.utime(path, (t, t))
+
+
+def test_lru_eviction_keeps_recently_read_entries(monkeypatch, isolated_cache):
+    monkeypatch.setenv("EXTRACT_CACHE_MAX_MB", str(3500 / (1024 * 1024)))
+    for i in range(3):
+        PageCache.set(f"p{i}", {"blob": "x" * 900})
+        _age(PageCache._path(f"p{i}"), 100 - i)
+    assert PageCache.get("p0") is not None  # refreshes p0
+
+    PageCache.set("p3", {"blob": "x" * 900})
+
+    assert PageCache.get("p1") is None
+    assert all(PageCache._path(k).exists() for k in ("p0", "p2", "p3"))
+
+
+def test_ttl_expires_old_entries(monkeypatch, isolated_cache):
+    monkeypatch.setenv("EXTRACT_CACHE_TTL_DAYS", "1")
+    PageCache.set("old", {"cables": []})
+    PageCache.set("new", {"cables": []})
+    _age(PageCache._path("old"), 2 * 86400)
+
+    assert CacheBudget.evict() == (1, PageCache._path("new").stat().st_size)
+    assert PageCache._path("new").exists()
+
+
+def test_stats_endpoint_reports_tiers(isolated_cache):
+    CacheStats.drain()
+    PageCache.set("k", {"cables": []})
+    PageCache.get("k")
+    PageCache.get("missing")
+
+    stats = TestClient(main.app).get("/api/cache/stats").json()
+
+    assert stats["tiers"]["pages"] == {"writes": 1, "bytes_written": 14, "hits": 1, "misses": 1}
+    assert stats["entries"] == 1 and stats["bytes"] == 14
+    assert stats["parser_version"]
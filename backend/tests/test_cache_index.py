@@ -0,0 +1,33 @@
+import hashlib
+import io
+import os
+
+from app.core import cache
+from app.core.cache import ExtractionCache
+from app.services.storage import LocalStorageService
+
+
+def test_unchanged_file_is_hashed_once(tmp_path, monkeypatch):
+    path = tmp_path / "drawing.pdf"
+    path.write_bytes(b"%PDF-1.4 first")
+    calls = []
+    real_hash = cache.hash_file
+    monkeypatch.setattr(cache, "hash_file", lambda p: calls.append(p) or real_hash(p))
+
+    first = ExtractionCache.get_file_hash(str(path))
+    ExtractionCache.set(str(path), {"cables": []})
+    assert ExtractionCache.get(str(path)) == {"cables": []}
+    assert len(calls) == 1
+
+    # A changed size/mtime invalidates the index entry
+    path.write_bytes(b"%PDF-1.4 second revision")
+    os.utime(path, ns=(1, 1))
+    assert ExtractionCache.get_file_hash(str(path)) != first
+    assert len(calls) == 2
+
+
+def test_upload_records_content_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "hash_file", lambda p: (_ for _ in ()).throw(AssertionError("re-read")))
+    saved = LocalStorageService(tmp_path).save_file("S1", "a.pdf", io.BytesIO(b"%PDF-1.4 upload"))
+
+    assert ExtractionCache.get_file_hash(saved) == hashlib.md5(b"%PDF-1.4 upload").hexdigest()
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from app.core.cache import CacheBudget, ExtractionCache, PageCache, get_backend
+from app.services.manager import ExtractionManager, process_page_shard
+from app.services.parser import AdvancedCableParser
+
+
+def _page(i):
+    return {"cables": [{"cable_name": f"P{2800 + j}", "cable_type": "DPYC-2.5", "from_node": "MSBD",
+                        "to_node": "ENGINE ROOM", "page": i} for j in range(40)], "misses": []}
+
+
+def test_sqlite_backend_round_trip_and_compact(monkeypatch, isolated_cache):
+    PageCache.set("k", _page(1))
+    file_bytes = CacheBudget.usage()["bytes"]
+
+    monkeypatch.setenv("EXTRACT_CACHE_BACKEND", "sqlite")
+    assert get_backend().name == "sqlite"
+    assert PageCache.get("k") is None
+    PageCache.set("k", _page(1))
+
+    assert PageCache.get("k") == _page(1)
+    assert (isolated_cache / "cache.sqlite3").exists()
+    assert CacheBudget.usage()["bytes"] * 4 < file_bytes
+
+
+def test_sqlite_concurrent_writers_same_key(monkeypatch, isolated_cache):
+    monkeypatch.setenv("EXTRACT_CACHE_BACKEND", "sqlite")
+    errors = []
+
+    def writer(n):
+        try:
+            for _ in range(20):
+                PageCache.set("shared", _page(n))
+                assert PageCache.get("shared")["cables"][0]["page"] in range(8)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert CacheBudget.usage()["entries"] == 1
+
+
+def test_sqlite_lru_and_ttl_eviction(monkeypatch, isolated_cache):
+    monkeypatch.setenv("EXTRACT_CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("EXTRACT_CACHE_TTL_DAYS", "1")
+    for i in range(3):
+        PageCache.set(f"p{i}", _page(i))
+    assert PageCache.get("p0") is not None  # refreshes p0
+    size = CacheBudget.usage()["bytes"]
+    monkeypatch.setenv("EXTRACT_CACHE_MAX_MB", str(size * 0.8 / (1024 * 1024)))
+
+    assert CacheBudget.evict()[0] == 1
+    assert PageCache.get("p1") is None and PageCache.get("p0") is not None
+
+    assert CacheBudget.evict(now=time.time() + 2 * 86400)[0] == 2
+    assert CacheBudget.usage() == {"bytes": 0, "entries": 0}
+
+
+def test_sqlite_backend_serves_batch_extraction(monkeypatch, make_pdf, isolated_cache):
+    monkeypatch.setenv("EXTRACT_CACHE_BACKEND", "sqlite")
+    path = make_pdf("drawing.pdf", [["P2800 DPYC-2.5 MSBD ENGINE ROOM"], ["P2801 T-35 WHEEL HOUSE"]])
+    manager = ExtractionManager(max_workers=1, pages_per_shard=1)
+    monkeypatch.setattr(manager, "_iter_shard_results",
+                        lambda shards, file_hashes=None, reparse=False: (
+                            (s, process_page_shard(*s, (file_hashes or {}).get(s[0]), reparse)) for s in shards))
+
+    first = manager.extract_batch([path])
+    assert ExtractionCache.get(path, version=AdvancedCableParser.version()) is not None
+    assert manager.extract_batch([path])["cables"] == first["cables"]
+    assert not list(isolated_cache.rglob("*.json"))
@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.manager import ExtractionManager
+from app.services.storage import LocalStorageService
+
+
+def _upload(storage, ship_id, name, pdf):
+    with open(pdf, "rb") as f:
+        return storage.save_file(ship_id, name, f)
+
+
+def test_shared_drawing_is_stored_once_and_released_when_unreferenced(tmp_path, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    pdf = make_pdf("shared.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    a = _upload(storage, "S1", "E-101.pdf", pdf)
+    b = _upload(storage, "S2", "E-101_sister.pdf", pdf)
+
+    assert os.path.samefile(a, b)
+    file_hash = storage.manifest("S1").files["E-101.pdf"]["hash"]
+    entry = storage.manifest("S2").files["E-101_sister.pdf"]
+    assert (entry["hash"], entry["size"]) == (file_hash, os.path.getsize(pdf))
+    assert storage.content_hashes("S2", storage.list_files("S2")) == [file_hash]
+
+    # Replacing S1's copy keeps S2's; the old content goes once nothing links to it
+    _upload(storage, "S1", "E-101.pdf", make_pdf("rev1.pdf", [["P2812 DPYC-2.5 MSBD"]]))
+    assert storage.store.has(file_hash) and not os.path.samefile(a, b)
+    storage.delete_file("S2", "E-101_sister.pdf")
+    assert not storage.store.has(file_hash)
+    assert storage.manifest("S2").files == {}
+
+
+def test_sister_ship_hits_extraction_cache(tmp_path, make_pdf, monkeypatch):
+    storage = LocalStorageService(tmp_path)
+    pdf = make_pdf("shared.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    manager = ExtractionManager(max_workers=1)
+    first = manager.extract_batch([_upload(storage, "S1", "E-101.pdf", pdf)])
+
+    def no_shards(shards, *args):
+        assert not list(shards)
+        return iter(())
+
+    monkeypatch.setattr(manager, "_iter_shard_results", no_shards)
+    second = manager.extract_batch([_upload(storage, "S2", "E-101.pdf", pdf)])
+
+    assert second["cables"] == first["cables"]
+
+
+def test_paths_outside_the_working_directory_are_refused(tmp_path, monkeypatch):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    victim = tmp_path / "victim.txt"
+    victim.write_text("keep")
+
+    response = TestClient(main.app).delete("/api/upload/%2E%2E/victim.txt")
+
+    assert response.status_code == 400
+    assert victim.read_text() == "keep" and not (tmp_path / ".manifest.json").exists()
+    for ship_id, filename in [("..", "a.pdf"), ("S1", "../a.pdf"), ("S1", ".manifest.json"), (".", "a.pdf")]:
+        with pytest.raises(ValueError):
+            storage.save_file(ship_id, filename, io.BytesIO(b"%PDF"))
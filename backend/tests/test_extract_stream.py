@@ -0,0 +1,41 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.storage import LocalStorageService
+
+
+def test_stream_emits_pages_then_summary(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    pdf = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"], ["C0912 M-7 ECR"]])
+    with open(pdf, "rb") as f:
+        storage.save_file("S1", "drawing.pdf", f)
+
+    client = TestClient(main.app)
+    response = client.post("/api/extract/S1/stream")
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert events[0]["event"] == "start"
+    assert events[0]["progress"]["total_pages"] == 3
+    pages = [e for e in events if e["event"] == "pages"]
+    assert sorted(e["pages"][0] for e in pages) == [1, 2, 3]
+    assert pages[-1]["progress"]["pages_done"] == 3
+    assert events[-1]["event"] == "summary"
+
+    # The final summary matches the non-streaming endpoint
+    blocking = client.post("/api/extract/S1").json()
+    assert events[-1]["summary"]["cables"] == blocking["cables"]
+    assert events[-1]["summary"]["total_count"] == blocking["total_count"]
+
+
+def test_stream_as_server_sent_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "storage_service", LocalStorageService(tmp_path))
+
+    response = TestClient(main.app).post("/api/extract/EMPTY/stream?format=sse")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: summary\ndata: ")
+    assert json.loads(response.text.split("data: ", 1)[1])["summary"]["total_count"] == 0
@@ -0,0 +1,206 @@
+import concurrent.futures
+import re
+
+import pdfplumber
+
+from app.core.cache import ExtractionCache
+from app.services.manager import ExtractionManager, process_page_shard
+from app.services.parser import AdvancedCableParser
+from conftest import build_pdf
+
+
+def _drawing_pages(count, offset=0):
+    return [[f"P{2800 + offset + i:04d} DPYC-2.5 MSBD ENGINE ROOM", f"N{10 + i} TW99S"] for i in range(count)]
+
+
+def _in_process_shards(shards, file_hashes=None, reparse=False):
+    file_hashes = file_hashes or {}
+    return ((s, process_page_shard(*s, file_hashes.get(s[0]), reparse)) for s in shards)
+
+
+def test_plan_shards_is_largest_first_across_files(make_pdf):
+    big = make_pdf("big.pdf", _drawing_pages(9))
+    small = make_pdf("small.pdf", _drawing_pages(2))
+    manager = ExtractionManager(max_workers=2, pages_per_shard=4)
+
+    shards = manager.plan_shards({small: 2, big: 9})
+
+    assert sorted(shards) == sorted([(small, 0, 2), (big, 0, 4), (big, 4, 8), (big, 8, 9)])
+    assert shards[:2] == [(big, 0, 4), (big, 4, 8)]
+    assert shards[-1] == (big, 8, 9)
+
+
+def test_first_page_alone_keeps_the_rest_normal_sized(make_pdf):
+    big = make_pdf("big.pdf", _drawing_pages(9))
+    small = make_pdf("small.pdf", _drawing_pages(2))
+    manager = ExtractionManager(max_workers=2, pages_per_shard=4)
+
+    shards = manager.plan_shards({small: 2, big: 9}, first_page_alone=True)
+
+    assert shards[:2] == [(small, 0, 1), (big, 0, 1)]
+    assert shards[2:4] == [(big, 1, 5), (big, 5, 9)]
+    assert sorted(shards[4:]) == [(small, 1, 2)]
+
+
+def test_sharded_batch_matches_single_pass_parse(make_pdf):
+    # Repeat a cable on the last page so dedup must run after the merge
+    pages = _drawing_pages(7) + [["P2800 T-35 WHEEL HOUSE"]]
+    path = make_pdf("drawing.pdf", pages)
+
+    expected = AdvancedCableParser().parse_file(path)
+    result = ExtractionManager(max_workers=2, pages_per_shard=3).extract_batch([path])
+
+    assert result["cables"] == expected
+    assert result["total_count"] == len(expected)
+    assert sum(1 for c in result["cables"] if c.cable_name.startswith("P28")) == 7
+    assert result["peak_worker_rss_mb"] > 0
+
+
+def test_iter_pages_releases_each_page(make_pdf):
+    path = make_pdf("drawing.pdf", _drawing_pages(3))
+    seen = []
+    for page_num, page in AdvancedCableParser.iter_pages(path, 1):
+        page.extract_text()
+        seen.append((page_num, page))
+
+    assert [n for n, _ in seen] == [2, 3]
+    # Layout objects are dropped once the consumer moves past a page
+    assert not any(hasattr(page, "_objects") or hasattr(page, "_layout") for _, page in seen)
+
+
+def _to_unicode(target):
+    cmap = (b"begincmap\n1 begincodespacerange <00> <FF> endcodespacerange\n"
+            b"1 beginbfchar <50> <%04X> endbfchar\nendcmap" % ord(target))
+    return b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream"
+
+
+def test_fingerprint_covers_the_font_text_mapping(tmp_path):
+    pages = _drawing_pages(1)
+    fingerprints = []
+    for name, target in [("a.pdf", "P"), ("b.pdf", "Q"), ("c.pdf", "P")]:
+        path = tmp_path / name
+        # Same content stream and BaseFont; only the ToUnicode map differs
+        path.write_bytes(build_pdf(pages, font_entries=b"/ToUnicode 6 0 R", extra_objs=[_to_unicode(target)]))
+        with pdfplumber.open(str(path)) as pdf:
+            fingerprints.append(AdvancedCableParser.page_fingerprint(pdf.pages[0]))
+
+    assert fingerprints[0] != fingerprints[1]
+    assert fingerprints[0] == fingerprints[2]
+
+
+def test_known_page_counts_spare_opening_the_file_to_plan(make_pdf, monkeypatch):
+    path = make_pdf("drawing.pdf", _drawing_pages(4))
+    file_hash = ExtractionCache.get_file_hash(path)
+    expected = AdvancedCableParser().parse_file(path)
+    monkeypatch.setattr(AdvancedCableParser, "count_pages",
+                        staticmethod(lambda fp: (_ for _ in ()).throw(AssertionError("reopened for planning"))))
+    manager = ExtractionManager(max_workers=1, pages_per_shard=2)
+    monkeypatch.setattr(manager, "_iter_shard_results", _in_process_shards)
+
+    result = manager.extract_batch([path], page_counts={file_hash: 4})
+
+    assert result["cables"] == expected
+
+
+def test_revision_reparses_only_changed_pages(make_pdf, monkeypatch):
+    r0_pages = _drawing_pages(5)
+    r1_pages = list(r0_pages)
+    r1_pages[3] = ["P2999 TPYC-35 STEERING GEAR ROOM"]
+    r0 = make_pdf("OE-003_R0.pdf", r0_pages)
+    r1 = make_pdf("OE-003_R1.pdf", r1_pages)
+    manager = ExtractionManager(max_workers=1, pages_per_shard=5)
+    manager.extract_batch([r0])
+
+    parsed_pages = []
+    original = AdvancedCableParser._extract_cables_from_text
+
+    def spy(self, text, page_num):
+        parsed_pages.append(page_num)
+        return original(self, text, page_num)
+
+    monkeypatch.setattr(AdvancedCableParser, "_extract_cables_from_text", spy)
+    # Run the shard in-process so the spy sees every parsed page
+    monkeypatch.setattr(manager, "_iter_shard_results", _in_process_shards)
+    result = manager.extract_batch([r1])
+
+    assert parsed_pages == [4]
+    monkeypatch.undo()
+    assert result["cables"] == AdvancedCableParser().parse_file(r1)
+
+
+def test_reparse_reuses_cached_text_layer(make_pdf, monkeypatch, isolated_cache):
+    path = make_pdf("drawing.pdf", _drawing_pages(3))
+    manager = ExtractionManager(max_workers=1, pages_per_shard=3)
+    monkeypatch.setattr(manager, "_iter_shard_results", _in_process_shards)
+    first = manager.extract_batch([path])
+    assert len(list((isolated_cache / "text").glob("*.json"))) == 3
+
+    # A rule change must not need pdfplumber text extraction again
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("page text should come from TextLayerCache")
+
+    monkeypatch.setattr("pdfplumber.page.Page.extract_text", no_extraction)
+    monkeypatch.setattr("pdfplumber.page.Page.extract_words", no_extraction)
+    monkeypatch.setattr(AdvancedCableParser, "CIRCUIT_PATTERN", re.compile(r'\b([P]\d{4})\b'))
+    result = manager.extract_batch([path], reparse=True)
+
+    assert result["cables"] != first["cables"]
+    assert [c.cable_name for c in result["cables"]] == ["P2800", "P2801", "P2802"]
+
+
+def test_repeat_extraction_is_served_from_memory(make_pdf, monkeypatch):
+    path = make_pdf("drawing.pdf", _drawing_pages(3))
+    manager = ExtractionManager(max_workers=1, pages_per_shard=3)
+    first = manager.extract_batch([path])
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("a memory hit must not read the disk cache")
+
+    def no_shards(shards, *args):
+        assert not shards
+        return iter(())
+
+    monkeypatch.setattr(manager, "_iter_shard_results", no_shards)
+    monkeypatch.setattr(ExtractionCache, "get", no_disk)
+    result = manager.extract_batch([path])
+
+    assert result["cables"] == first["cables"]
+
+
+def test_path_listed_twice_is_parsed_once(make_pdf):
+    path = make_pdf("drawing.pdf", _drawing_pages(2))
+    manager = ExtractionManager(max_workers=1)
+    manager._iter_shard_results = _in_process_shards
+
+    once = manager.extract_batch([path])
+    listed = manager.extract_batch([path, path])
+    streamed = manager.extract_batch(iter([path, path]), reparse=True)
+
+    assert listed["cables"] == streamed["cables"] == once["cables"]
+
+
+class _CountingPool:
+    """Thread-backed stand-in for WorkerPool that records how many shards were pending at each submit."""
+    max_workers = 4
+
+    def __init__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        self.submitted = []
+        self.peak = 0
+
+    def submit(self, fn, *args):
+        self.peak = max(self.peak, 1 + sum(not f.done() for f in self.submitted))
+        self.submitted.append(self.executor.submit(fn, *args))
+        return self.submitted[-1]
+
+
+def test_background_batch_caps_shards_in_the_pool(make_pdf):
+    path = make_pdf("drawing.pdf", _drawing_pages(8))
+    pool = _CountingPool()
+    manager = ExtractionManager(pool=pool, pages_per_shard=1)
+
+    events = list(manager.iter_batch([path], reparse=True, background=True))
+    pool.executor.shutdown()
+
+    assert pool.peak <= manager.background_shards == 2
+    assert len(pool.submitted) == 8 and events[-1]["event"] == "summary"
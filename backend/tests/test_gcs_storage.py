@@ -0,0 +1,126 @@
+import hashlib
+import threading
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.cache import ExtractionCache
+from app.services.manager import ExtractionManager, process_page_shard
+from app.services.storage import GCSStorageService
+from fake_gcs import FakeClient
+
+
+def _storage(tmp_path):
+    return GCSStorageService("ships", client=FakeClient(tmp_path / "bucket"), cache_dir=tmp_path / "gcs_cache")
+
+
+def _upload(storage, ship_id, name, pdf):
+    """Writes a blob through another instance, so storage has no local copy of it."""
+    uploader = GCSStorageService("ships", client=storage.client, cache_dir=storage.cache_dir.with_name("uploader_cache"))
+    with open(pdf, "rb") as f:
+        uploader.save_file(ship_id, name, f)
+
+
+def test_downloads_only_new_or_changed_blobs(tmp_path, make_pdf):
+    storage = _storage(tmp_path)
+    bucket = storage.bucket
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]))
+    _upload(storage, "S1", "b.pdf", make_pdf("b.pdf", [["L1101 T-35 WHEEL HOUSE"]]))
+
+    paths = sorted(storage.iter_local_paths("S1", storage.list_files("S1")))
+    assert sorted(bucket.downloads) == ["S1/a.pdf", "S1/b.pdf"]
+    # The blob's MD5 is recorded, so extraction does not re-hash the download
+    assert ExtractionCache.get_file_hash(paths[0]) == storage.content_hashes("S1", [storage.list_files("S1")[0]])[0]
+
+    bucket.downloads.clear()
+    assert sorted(storage.iter_local_paths("S1", storage.list_files("S1"))) == paths
+    assert bucket.downloads == []
+
+    _upload(storage, "S1", "b.pdf", make_pdf("b2.pdf", [["C0912 M-7 ECR"]]))
+    list(storage.iter_local_paths("S1", storage.list_files("S1")))
+    assert bucket.downloads == ["S1/b.pdf"]
+
+
+def test_parsing_starts_while_later_files_download(tmp_path, make_pdf):
+    storage = _storage(tmp_path)
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]))
+    _upload(storage, "S1", "b.pdf", make_pdf("b.pdf", [["L1101 T-35 WHEEL HOUSE"]]))
+    b_may_download = threading.Event()
+    storage.bucket.before_download = lambda name: name == "S1/b.pdf" and b_may_download.wait(10)
+    parsed_before_b = []
+
+    manager = ExtractionManager(max_workers=1, pages_per_shard=1)
+
+    def in_process(shards, file_hashes=None, reparse=False):
+        results = []
+        for shard in shards:
+            parsed_before_b.append(not b_may_download.is_set())
+            results.append((shard, process_page_shard(*shard, (file_hashes or {}).get(shard[0]), reparse)))
+            # a.pdf is already being parsed; only now let b.pdf finish downloading
+            b_may_download.set()
+        return iter(results)
+
+    manager._iter_shard_results = in_process
+    result = manager.extract_batch(storage.iter_local_paths("S1", storage.list_files("S1")))
+
+    assert parsed_before_b == [True, False]
+    assert {"P2811", "L1101"} <= {c.cable_name for c in result["cables"]}
+
+
+def test_unchanged_remote_ship_needs_no_downloads(tmp_path, monkeypatch, make_pdf):
+    storage = _storage(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]))
+    client = TestClient(main.app)
+
+    first = client.post("/api/extract/S1").json()
+    storage.bucket.downloads.clear()
+    again = client.post("/api/extract/S1").json()
+
+    assert storage.bucket.downloads == []
+    assert again["cables"] == first["cables"]
+
+
+def test_sister_ship_reuses_downloaded_content(tmp_path, make_pdf):
+    storage = _storage(tmp_path)
+    pdf = make_pdf("shared.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    _upload(storage, "S1", "E-101.pdf", pdf)
+    _upload(storage, "S2", "E-101.pdf", pdf)
+
+    first = list(storage.iter_local_paths("S1", storage.list_files("S1")))
+    second = list(storage.iter_local_paths("S2", storage.list_files("S2")))
+
+    assert storage.bucket.downloads == ["S1/E-101.pdf"]
+    assert open(first[0], "rb").read() == open(second[0], "rb").read()
+
+
+def test_verified_upload_is_kept_as_the_local_copy(tmp_path, make_pdf):
+    storage = _storage(tmp_path)
+    pdf = make_pdf("E-101.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    data = open(pdf, "rb").read()
+    md5 = hashlib.md5(data).hexdigest()
+
+    storage.save_path("S1", "E-101.pdf", pdf, md5)
+    storage.save_existing("S2", "E-101.pdf", md5)
+
+    paths = [storage.get_file_path(ship, "E-101.pdf") for ship in ("S1", "S2")]
+    assert storage.bucket.downloads == []
+    assert [open(p, "rb").read() for p in paths] == [data, data]
+    assert storage.manifest("S2").files["E-101.pdf"]["pages"] == 1
+
+
+def test_deleting_a_file_releases_its_local_copy(tmp_path, make_pdf):
+    storage = _storage(tmp_path)
+    pdf = make_pdf("E-101.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    md5 = hashlib.md5(open(pdf, "rb").read()).hexdigest()
+    for ship in ("S1", "S2"):
+        with open(pdf, "rb") as f:
+            storage.save_file(ship, "E-101.pdf", f)
+
+    assert storage.delete_file("S1", "E-101.pdf")
+    # The sister ship still links the content
+    assert storage.store.has(md5)
+    assert not (storage.cache_dir / "S1" / "E-101.pdf").exists()
+
+    assert storage.delete_file("S2", "E-101.pdf")
+    assert not storage.store.has(md5)
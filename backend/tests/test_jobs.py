@@ -0,0 +1,93 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models.schemas import JobState
+from app.services.jobs import JobManager
+from app.services.storage import LocalStorageService
+
+
+def _wait_finished(client, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/api/jobs/{job_id}").json()
+        if status["status"] in ("completed", "failed", "cancelled"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_job_runs_in_background_and_returns_result(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    pdf = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"]])
+    with open(pdf, "rb") as f:
+        storage.save_file("S1", "drawing.pdf", f)
+
+    client = TestClient(main.app)
+    created = client.post("/api/jobs", json={"ship_id": "S1"})
+    assert created.status_code == 202
+    job_id = created.json()["job_id"]
+
+    status = _wait_finished(client, job_id)
+    assert status["status"] == "completed"
+    assert status["progress"]["total_pages"] == 2
+
+    result = client.get(f"/api/jobs/{job_id}/result").json()
+    blocking = client.post("/api/extract/S1").json()
+    assert result["cables"] == blocking["cables"]
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_cancel_queued_job(tmp_path):
+    release = threading.Event()
+
+    def resolve_files(ship_id):
+        release.wait(10)
+        return []
+
+    jobs = JobManager(None, resolve_files, lambda result: result, max_jobs=1)
+    first = jobs.submit("S1")
+    queued = jobs.submit("S2")
+
+    assert jobs.cancel(queued.job_id).state == JobState.CANCELLED
+    release.set()
+    first.future.result(10)
+    assert first.state == JobState.COMPLETED
+    assert queued.future.cancelled()
+    jobs.shutdown()
+
+
+def test_upload_can_warm_the_cache_in_background(tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(main, "storage_service", LocalStorageService(tmp_path))
+    client = TestClient(main.app)
+    pdf = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"]])
+
+    with open(pdf, "rb") as f:
+        uploaded = client.post("/api/upload/S1", files={"file": ("drawing.pdf", f)}).json()
+    assert "extraction_job_id" not in uploaded
+
+    with open(pdf, "rb") as f:
+        uploaded = client.post("/api/upload/S1?extract=true", files={"file": ("drawing.pdf", f)}).json()
+    status = _wait_finished(client, uploaded["extraction_job_id"])
+    assert status["status"] == "completed" and status["background"]
+
+    extracted = client.post("/api/extract/S1").json()
+    assert [c["cable_name"] for c in extracted["cables"]][0] == "P2811"
+    stats = client.get("/api/cache/stats").json()["tiers"]
+    assert stats["memory"]["hits"] >= 1
+
+
+def test_queued_background_job_absorbs_repeat_requests():
+    release = threading.Event()
+    jobs = JobManager(None, lambda ship_id: release.wait(10) and [], lambda result: result, max_jobs=1)
+    # Occupies the only job thread, so the background jobs stay queued
+    jobs.submit("S0")
+    first = jobs.submit("S1", background=True)
+
+    assert jobs.submit("S1", background=True) is first
+    assert jobs.submit("S2", background=True) is not first
+    release.set()
+    jobs.shutdown()
@@ -0,0 +1,96 @@
+import hashlib
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.storage import GCSStorageService, LocalStorageService
+from fake_gcs import FakeClient
+
+
+def _upload(storage, ship_id, name, pdf):
+    with open(pdf, "rb") as f:
+        return storage.save_file(ship_id, name, f)
+
+
+def test_changes_since_and_extraction_status(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"]]))
+    _upload(storage, "S1", "b.pdf", make_pdf("b.pdf", [["C0912 M-7 ECR"]]))
+    client = TestClient(main.app)
+
+    listing = client.get("/api/files/S1").json()
+    assert [(f["name"], f["pages"], f["extraction"]["status"]) for f in listing["changed"]] == \
+        [("a.pdf", 2, "pending"), ("b.pdf", 1, "pending")]
+    since = listing["version"]
+
+    client.post("/api/extract/S1")
+    extracted = client.get(f"/api/files/S1?since={since}").json()
+    assert {f["name"]: f["extraction"]["status"] for f in extracted["changed"]} == \
+        {"a.pdf": "extracted", "b.pdf": "extracted"}
+    # An unchanged re-extraction is not a change
+    client.post("/api/extract/S1")
+    assert client.get(f"/api/files/S1?since={extracted['version']}").json()["changed"] == []
+
+    storage.delete_file("S1", "b.pdf")
+    changes = client.get(f"/api/files/S1?since={extracted['version']}").json()
+    assert (changes["changed"], changes["removed"]) == ([], ["b.pdf"])
+
+
+def test_local_manifest_is_built_for_files_placed_by_hand(tmp_path, make_pdf):
+    ship_wd = tmp_path / "wd" / "S1"
+    ship_wd.mkdir(parents=True)
+    (ship_wd / "a.pdf").write_bytes(open(make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]), "rb").read())
+    storage = LocalStorageService(tmp_path)
+
+    assert storage.list_files("S1") == [str(ship_wd / "a.pdf")]
+    assert storage.manifest("S1").files["a.pdf"]["pages"] == 1
+    assert (ship_wd / ".manifest.json").is_file()
+
+
+def test_unchanged_upload_over_a_pre_versioning_entry(tmp_path, make_pdf):
+    pdf = make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    storage = LocalStorageService(tmp_path)
+    _upload(storage, "S1", "a.pdf", pdf)
+    data = open(pdf, "rb").read()
+    legacy = {"a.pdf": {"hash": hashlib.md5(data).hexdigest(), "size": len(data)}}
+    (tmp_path / "wd" / "S1" / ".manifest.json").write_text(json.dumps(legacy))
+
+    _upload(storage, "S1", "a.pdf", pdf)
+
+    assert storage.manifest("S1").files["a.pdf"]["pages"] == 1
+
+
+def test_extraction_plans_from_manifest_page_counts(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"]]))
+    monkeypatch.setattr(main.AdvancedCableParser, "count_pages",
+                        staticmethod(lambda fp: (_ for _ in ()).throw(AssertionError("reopened for planning"))))
+
+    result = TestClient(main.app).post("/api/extract/S1").json()
+
+    assert {"P2811", "L1101"} <= {c["cable_name"] for c in result["cables"]}
+
+
+def test_gcs_listing_reads_manifest_object(tmp_path, monkeypatch, make_pdf):
+    client = FakeClient(tmp_path / "bucket")
+    storage = GCSStorageService("ships", client=client, cache_dir=tmp_path / "gcs_cache")
+    _upload(storage, "S1", "a.pdf", make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]))
+    # A blob written by another tool is picked up when the manifest is rebuilt
+    client.bucket("ships").blob("S1/.manifest.json").delete()
+    client.bucket("ships").blob("S1/b.xlsx").upload_from_file(io.BytesIO(b"sheet"))
+
+    assert storage.list_files("S1") == ["gs://ships/S1/a.pdf", "gs://ships/S1/b.xlsx"]
+
+    def no_listing(*args, **kwargs):
+        raise AssertionError("listed the bucket")
+
+    monkeypatch.setattr(client, "list_blobs", no_listing)
+    storage.delete_file("S1", "b.xlsx")
+    assert storage.list_files("S1") == ["gs://ships/S1/a.pdf"]
+    assert storage.changes_since("S1", 0)["removed"] == ["b.xlsx"]
+    assert storage.bucket.downloads == []
+    assert len(list(storage.iter_local_paths("S1", storage.list_files("S1")))) == 1
@@ -0,0 +1,23 @@
+from app.services.miss_detector import MissDetector
+from app.services.parser import AdvancedCableParser
+
+
+def test_reports_uncaught_tokens_once_with_offsets():
+    text = "P2811 D-2 MSBD\nP-2812 feeds AB 123\nDWG 1234 P-2812 P2811"
+    detector = MissDetector()
+    misses = detector.detect(text, 3, {"P2811"})
+
+    assert [m.token for m in misses] == ["P-2812", "AB 123"]
+    first = misses[0]
+    assert first.page_number == 3
+    assert text[first.offset:first.offset + len(first.token)] == first.token
+    assert first.context == "P-2812 feeds AB 123"
+    # Already reported tokens stay quiet until reset
+    assert detector.detect(text, 4, {"P2811"}) == []
+
+
+def test_parser_collects_structured_misses_per_page():
+    parser = AdvancedCableParser()
+    parser._extract_cables_from_text("P2811 D-2\nP 2812", 1)
+    parser._extract_cables_from_text("P 2812", 2)
+    assert [(m.page_number, m.token) for m in parser.missed_patterns] == [(1, "P 2812"), (2, "P 2812")]
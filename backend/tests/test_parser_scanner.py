@@ -0,0 +1,63 @@
+import re
+
+from app.services.parser import AdvancedCableParser
+
+
+def _find_match(pattern, text):
+    m = pattern.search(text)
+    return m.group(1) if m else "UNKNOWN"
+
+
+def _find_rooms(parser, context):
+    rooms = parser.ROOM_PATTERN.findall(context)
+    return (rooms + ["", ""])[:2]
+
+
+def _find_nodes(parser, context):
+    matches = [m for m in parser.NODE_PATTERN.findall(context) if m not in parser.NODE_EXCLUDES and "DK" not in m]
+    return tuple((matches + ["", ""])[:2])
+
+
+def legacy_extract(parser, text, page_num):
+    """Reference: the original per-match context rebuild the scanner replaced."""
+    cables = []
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        for circuit_num in parser.CIRCUIT_PATTERN.findall(line):
+            if len(circuit_num.strip()) < 4: continue
+            context = '\n'.join(lines[max(0, i-2):min(len(lines), i+5)])
+            cables.append({
+                "cable_name": circuit_num.strip().upper(),
+                "cable_type": parser._normalize_type(_find_match(parser.CABLE_TYPE_PATTERN, context)),
+                "from_room": _find_rooms(parser, context)[0],
+                "to_room": _find_rooms(parser, context)[1],
+                "from_node": _find_nodes(parser, context)[0],
+                "to_node": _find_nodes(parser, context)[1],
+                "page_number": page_num,
+                "raw_text": line.strip(),
+            })
+    return cables
+
+
+def _scanned(parser, text):
+    keys = ["cable_name", "cable_type", "from_room", "to_room", "from_node", "to_node", "page_number", "raw_text"]
+    return [{k: getattr(c, k) for k in keys} for c in parser._extract_cables_from_text(text, 1)]
+
+
+def test_scanner_matches_legacy_context_search():
+    parser = AdvancedCableParser()
+    texts = [
+        "P2811 DPYC-2.5 MSBD\nN25 TW99S\nENGINE ROOM",
+        # Room names continuing across a line break (ROOM_PATTERN's \s+ spans it)
+        "P2811 FROM MAIN SWITCH\n\n  BOARD TO\nWHEEL HOUSE C0912 M-7\nSPYC DK12 E/R",
+        "L1101 T-35\nab\nC0912\nL1102 L1103 SY-6 W/H\n\nP2901",
+        "",
+    ]
+    for text in texts:
+        assert _scanned(parser, text) == legacy_extract(parser, text, 1)
+
+
+def test_node_pattern_is_precompiled():
+    assert isinstance(AdvancedCableParser.NODE_PATTERN, re.Pattern)
+    cable = AdvancedCableParser()._extract_cables_from_text("P2811 SPYC N25 DK12 TW99S", 1)[0]
+    assert (cable.cable_name, cable.from_node, cable.to_node) == ("P2811", "N25", "TW99S")
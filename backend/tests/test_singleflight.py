@@ -0,0 +1,112 @@
+import threading
+
+from app.core.cache import CacheStats, ExtractionCache
+from app.services import manager as manager_module
+from app.services.manager import ExtractionManager, process_page_shard
+from app.services.parser import AdvancedCableParser
+
+
+def _gated_manager(gate, parsed):
+    manager = ExtractionManager(max_workers=1, pages_per_shard=2)
+
+    def in_process(shards, file_hashes=None, reparse=False):
+        for shard in shards:
+            gate.wait(10)
+            parsed.append(shard)
+            yield shard, process_page_shard(*shard, (file_hashes or {}).get(shard[0]), reparse)
+
+    manager._iter_shard_results = in_process
+    return manager
+
+
+def _watch_followers(monkeypatch):
+    followed = threading.Event()
+    acquire = manager_module._flights.acquire
+
+    def spy(key):
+        future, leader = acquire(key)
+        if not leader:
+            followed.set()
+        return future, leader
+
+    monkeypatch.setattr(manager_module._flights, "acquire", spy)
+    return followed
+
+
+def test_concurrent_batches_parse_a_file_once(make_pdf, monkeypatch):
+    path = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"]])
+    followed = _watch_followers(monkeypatch)
+    gate, parsed, results = threading.Event(), [], []
+    CacheStats.drain()
+
+    threads = [threading.Thread(target=lambda: results.append(_gated_manager(gate, parsed).extract_batch([path])))
+               for _ in range(2)]
+    threads[0].start()
+    threads[1].start()
+    assert followed.wait(10)
+    gate.set()
+    for t in threads:
+        t.join(10)
+
+    assert len(parsed) == 1
+    assert results[0]["cables"] == results[1]["cables"]
+    assert CacheStats.snapshot()["singleflight"] == {"coalesced": 1}
+    assert manager_module._flights.in_flight() == 0
+
+
+def test_follower_parses_when_leader_is_abandoned(make_pdf, monkeypatch):
+    path = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    followed = _watch_followers(monkeypatch)
+    gate, parsed, results = threading.Event(), [], []
+    leader = _gated_manager(gate, parsed).iter_batch([path])
+    assert next(leader)["event"] == "start"
+
+    follower = threading.Thread(target=lambda: results.append(_gated_manager(gate, parsed).extract_batch([path])))
+    follower.start()
+    assert followed.wait(10)
+    leader.close()
+    gate.set()
+    follower.join(10)
+
+    assert len(parsed) == 1
+    assert [c.cable_name for c in results[0]["cables"]][0] == "P2811"
+
+
+def test_follower_of_a_leaked_flight_times_out_and_parses(make_pdf):
+    path = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    key = f"{ExtractionCache.get_file_hash(path)}_{AdvancedCableParser.version()}"
+    # A leader that never resolves
+    manager_module._flights.acquire(key)
+    try:
+        manager = ExtractionManager(max_workers=1, flight_wait=0.1)
+        manager._iter_shard_results = lambda shards, file_hashes=None, reparse=False: (
+            (shard, process_page_shard(*shard, file_hashes[shard[0]], reparse)) for shard in shards)
+        result = manager.extract_batch([path])
+    finally:
+        manager_module._flights.resolve(key, None)
+
+    assert [c.cable_name for c in result["cables"]][0] == "P2811"
+
+
+def test_replaced_file_resolves_every_flight_it_led(make_pdf, tmp_path):
+    path = tmp_path / "drawing.pdf"
+    first = make_pdf("first.pdf", [["P2811 DPYC-2.5 MSBD"]])
+    second = make_pdf("second.pdf", [["L1101 T-35 WHEEL HOUSE"]])
+    path.write_bytes(open(first, "rb").read())
+    manager = ExtractionManager(max_workers=1)
+
+    def paths():
+        yield str(path)
+        # Same path, new content, before the first one was parsed
+        path.write_bytes(open(second, "rb").read())
+        yield str(path)
+
+    def submit_all_first(shards, file_hashes=None, reparse=False):
+        # Like the pool: both files are admitted before either finishes
+        shards = list(shards)
+        return iter([(shard, process_page_shard(*shard, file_hashes[shard[0]], reparse)) for shard in shards])
+
+    manager._iter_shard_results = submit_all_first
+    manager.extract_batch(paths())
+
+    assert manager_module._flights.in_flight() == 0
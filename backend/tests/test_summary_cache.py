@@ -0,0 +1,64 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.storage import GCSStorageService, LocalStorageService
+from fake_gcs import FakeClient
+
+
+def test_unchanged_ship_reuses_summary_until_files_change(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    for name, line in (("a.pdf", "P2811 DPYC-2.5 MSBD"), ("b.pdf", "L1101 T-35 WHEEL HOUSE")):
+        with open(make_pdf(name, [[line]]), "rb") as f:
+            storage.save_file("S1", name, f)
+    client = TestClient(main.app)
+    first = client.post("/api/extract/S1").json()
+    assert {"P2811", "L1101"} <= {c["cable_name"] for c in first["cables"]}
+
+    batches = []
+    original = main.parser_manager.extract_batch
+    monkeypatch.setattr(main.parser_manager, "extract_batch",
+                        lambda paths, **kw: batches.append(paths) or original(paths, **kw))
+
+    again = client.post("/api/extract/S1").json()
+    assert batches == []
+    assert again["cables"] == first["cables"]
+
+    assert client.delete("/api/upload/S1/b.pdf").json()["status"] == "deleted"
+    after_delete = client.post("/api/extract/S1").json()
+    assert len(batches) == 1
+    names = {c["cable_name"] for c in after_delete["cables"]}
+    assert "P2811" in names and "L1101" not in names
+    assert client.delete("/api/upload/S1/b.pdf").status_code == 404
+
+
+def test_partial_batch_is_not_memoized(tmp_path, monkeypatch, make_pdf):
+    storage = GCSStorageService("ships", client=FakeClient(tmp_path / "bucket"), cache_dir=tmp_path / "gcs_cache")
+    monkeypatch.setattr(main, "storage_service", storage)
+    # Uploaded through another instance, so this one has to download them
+    uploader = GCSStorageService("ships", client=storage.client, cache_dir=tmp_path / "uploader_cache")
+    for name, line in (("a.pdf", "P2811 DPYC-2.5 MSBD"), ("b.pdf", "L1101 T-35 WHEEL HOUSE")):
+        with open(make_pdf(name, [[line]]), "rb") as f:
+            uploader.save_file("S1", name, f)
+    failures = ["S1/b.pdf"]
+
+    def flaky(name):
+        if name in failures:
+            failures.remove(name)
+            raise ConnectionError("network dropped")
+
+    storage.bucket.before_download = flaky
+    client = TestClient(main.app)
+
+    partial = client.post("/api/extract/S1").json()
+    assert "L1101" not in {c["cable_name"] for c in partial["cables"]}
+    # The next request retries b.pdf instead of serving the a.pdf-only summary
+    retried = client.post("/api/extract/S1").json()
+    assert {"P2811", "L1101"} <= {c["cable_name"] for c in retried["cables"]}
+
+    # Now complete: the stream endpoint serves it from the summary cache
+    events = [json.loads(line) for line in client.post("/api/extract/S1/stream").text.splitlines()]
+    assert [e["event"] for e in events] == ["summary"]
+    assert events[0]["summary"]["cables"] == retried["cables"]
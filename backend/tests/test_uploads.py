@@ -0,0 +1,286 @@
+import hashlib
+import io
+import os
+import zipfile
+
+import ezdxf
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from starlette.formparsers import MultiPartParser
+
+from app import main
+from app.core.cache import HASH_CHUNK_SIZE
+from app.core.uploads import HashingReader, UploadSessions
+from app.services import cad_service
+from app.services.universal_parser import UniversalParser
+from app.services.manager import process_page_shard
+from app.services.storage import GCSStorageService, LocalStorageService
+from fake_gcs import FakeClient
+
+
+class _CountingReader(io.BytesIO):
+    """Counts the bytes handed out by every read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def test_hashing_reader_hashes_during_the_parsers_own_read():
+    data = os.urandom(2 * HASH_CHUNK_SIZE + 10)
+    source = _CountingReader(data)
+    reader = HashingReader(source)
+
+    assert reader.read(100) == data[:100]
+    reader.seek(0)
+    assert reader.read(HASH_CHUNK_SIZE) == data[:HASH_CHUNK_SIZE]
+    assert reader.read() == data[HASH_CHUNK_SIZE:]
+    assert reader.hexdigest() == hashlib.md5(data).hexdigest()
+    # Re-reading the start did not hash it twice, and nothing was re-read for the digest
+    assert source.bytes_read == 100 + len(data)
+
+
+def test_hashing_reader_reads_only_what_the_parser_skipped():
+    data = os.urandom(3 * HASH_CHUNK_SIZE)
+    source = _CountingReader(data)
+    reader = HashingReader(source)
+
+    reader.read(10)
+    reader.seek(2 * HASH_CHUNK_SIZE)
+    reader.read(10)
+    assert reader.hexdigest() == hashlib.md5(data).hexdigest()
+    assert source.bytes_read == 10 + 10 + (len(data) - 10)
+    assert reader.tell() == 2 * HASH_CHUNK_SIZE + 10 and not source.closed
+
+
+@pytest.fixture
+def spooled_to_disk(monkeypatch):
+    """Makes every multipart upload roll its spool over to a temp file."""
+    monkeypatch.setattr(MultiPartParser, "max_file_size", 16)
+    monkeypatch.setattr(cad_service, "BINARY_MAP_MIN_BYTES", 0)
+
+
+@pytest.mark.parametrize("fmt", ["asc", "bin"])
+def test_cad_upload_parses_the_spool_in_place(tmp_path, fmt, spooled_to_disk):
+    doc = ezdxf.new()
+    doc.modelspace().add_line((0, 0), (10, 0))
+    dxf_path = tmp_path / "plan.dxf"
+    doc.saveas(dxf_path, fmt=fmt)
+
+    with open(dxf_path, "rb") as f:
+        response = TestClient(main.app).post("/api/cad/upload", files={"file": ("plan.dxf", f)})
+
+    assert response.status_code == 200
+    assert response.json()["file_hash"] == hashlib.md5(dxf_path.read_bytes()).hexdigest()
+    assert [e["type"] for e in response.json()["entities"]] == ["LINE"]
+
+
+def test_universal_upload_parses_the_spool_in_place(tmp_path, spooled_to_disk, monkeypatch):
+    rows = [["CABLE LIST", None, None, None],
+            ["NO", "SYSTEM", "CABLE NO", "TYPE"],
+            [1, "LTG", "P2811", "DPYC-2.5"],
+            [2, "LTG", "P2812", "TPYC-35"]]
+    xlsx_path = tmp_path / "schedule.xlsx"
+    pd.DataFrame(rows).to_excel(xlsx_path, header=False, index=False)
+
+    parsed = []
+    original = UniversalParser.parse
+
+    def spy(self, source):
+        parsed.append((source, original(self, source)))
+        return parsed[-1][1]
+    monkeypatch.setattr(UniversalParser, "parse", spy)
+
+    with open(xlsx_path, "rb") as f:
+        response = TestClient(main.app).post("/api/universal/upload/S1", files={"file": ("schedule.xlsx", f)})
+
+    assert response.status_code == 200
+    source, rows = parsed[0]
+    assert isinstance(source, HashingReader)
+    assert [r["cable_name"] for r in rows] == ["P2811", "P2812"]
+    assert response.json()["ship_metadata"]["file_hash"] == hashlib.md5(xlsx_path.read_bytes()).hexdigest()
+
+
+def _resumable(tmp_path, monkeypatch):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    monkeypatch.setattr(main, "upload_sessions", UploadSessions(tmp_path / "sessions", max_chunk_mb=1))
+    return storage, TestClient(main.app)
+
+
+def _put(client, upload_id, data, start, size):
+    return client.put(f"/api/uploads/{upload_id}", content=data,
+                      headers={"Content-Range": f"bytes {start}-{start + len(data) - 1}/{size}"})
+
+
+def test_chunked_upload_resumes_and_skips_known_content(tmp_path, monkeypatch):
+    storage, client = _resumable(tmp_path, monkeypatch)
+    data = os.urandom(2 * 1024 * 1024 + 10)
+    declared = {"filename": "E-101.pdf", "size": len(data), "md5": hashlib.md5(data).hexdigest()}
+
+    session = client.post("/api/upload/S1/sessions", json=declared).json()
+    assert (session["status"], session["offset"]) == ("pending", 0)
+    chunk = session["chunk_size"]
+    assert _put(client, session["upload_id"], data[:chunk], 0, len(data)).json()["offset"] == chunk
+    # A chunk sent again after a lost response is refused with the offset to continue from
+    conflict = _put(client, session["upload_id"], data[:chunk], 0, len(data))
+    assert conflict.status_code == 409 and conflict.json()["detail"]["offset"] == chunk
+
+    # The client reconnects: same declaration, same session
+    resumed = client.post("/api/upload/S1/sessions", json=declared).json()
+    assert (resumed["upload_id"], resumed["offset"]) == (session["upload_id"], chunk)
+    for start in range(chunk, len(data), chunk):
+        response = _put(client, session["upload_id"], data[start:start + chunk], start, len(data))
+    assert response.json()["status"] == "uploaded"
+    assert open(storage.get_file_path("S1", "E-101.pdf"), "rb").read() == data
+    assert client.get(f"/api/uploads/{session['upload_id']}").status_code == 404
+
+    # Unchanged re-upload, and the same drawing for a sister ship: one request each
+    assert client.post("/api/upload/S1/sessions", json=declared).json()["status"] == "present"
+    sister = client.post("/api/upload/S2/sessions", json={**declared, "filename": "E-101_sister.pdf"}).json()
+    assert sister["status"] == "present"
+    assert os.path.samefile(storage.get_file_path("S1", "E-101.pdf"), storage.get_file_path("S2", "E-101_sister.pdf"))
+
+
+def test_chunked_upload_rejects_corrupted_content(tmp_path, monkeypatch):
+    storage, client = _resumable(tmp_path, monkeypatch)
+    data = b"%PDF-1.4 drawing"
+    declared = {"filename": "E-101.pdf", "size": len(data), "md5": hashlib.md5(b"other").hexdigest()}
+
+    session = client.post("/api/upload/S1/sessions", json=declared).json()
+    response = _put(client, session["upload_id"], data, 0, len(data))
+
+    assert response.status_code == 422
+    assert storage.list_files("S1") == []
+    assert client.get(f"/api/uploads/{session['upload_id']}").status_code == 404
+
+
+def test_upload_session_refuses_bad_names_and_oversized_chunks_up_front(tmp_path, monkeypatch):
+    storage, client = _resumable(tmp_path, monkeypatch)
+    declared = {"filename": "E-101.pdf", "size": 4 * 1024 * 1024, "md5": hashlib.md5(b"x").hexdigest()}
+
+    assert client.post("/api/upload/.hidden/sessions", json=declared).status_code == 400
+    assert client.post("/api/upload/S1/sessions", json={**declared, "filename": ".."}).status_code == 400
+
+    session = client.post("/api/upload/S1/sessions", json=declared).json()
+    chunk = session["chunk_size"]
+    # Sent without Content-Length: the limit is enforced while reading the body
+    body = (b"\0" * 64 * 1024 for _ in range(chunk // (64 * 1024) + 1))
+    response = client.put(f"/api/uploads/{session['upload_id']}", content=body,
+                          headers={"Content-Range": f"bytes 0-{chunk}/{declared['size']}"})
+    assert response.status_code == 413
+    assert client.get(f"/api/uploads/{session['upload_id']}").json()["offset"] == 0
+
+
+def test_chunked_upload_survives_a_restart_and_is_moved_into_storage(tmp_path, monkeypatch):
+    storage, client = _resumable(tmp_path, monkeypatch)
+    data = os.urandom(1024 * 1024 + 10)
+    declared = {"filename": "E-101.pdf", "size": len(data), "md5": hashlib.md5(data).hexdigest()}
+    session = client.post("/api/upload/S1/sessions", json=declared).json()
+    chunk = session["chunk_size"]
+    _put(client, session["upload_id"], data[:chunk], 0, len(data))
+
+    # A new process: the running MD5 is rebuilt from what was received
+    monkeypatch.setattr(main, "upload_sessions", UploadSessions(tmp_path / "sessions", max_chunk_mb=1))
+    part_inode = os.stat(main.upload_sessions.path(session["upload_id"])).st_ino
+    response = _put(client, session["upload_id"], data[chunk:], chunk, len(data))
+
+    assert response.json()["status"] == "uploaded"
+    stored = storage.get_file_path("S1", "E-101.pdf")
+    assert open(stored, "rb").read() == data
+    assert os.stat(stored).st_ino == part_inode
+
+
+def test_archive_members_are_stored_and_parsed_while_reading(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]), "set/E-101.pdf")
+        zf.writestr("set/cables.xlsx", b"sheet")
+        zf.writestr("set/readme.txt", b"notes")
+        zf.writestr("__MACOSX/set/._E-101.pdf", b"fork")
+        zf.write(make_pdf("b.pdf", [["L1101 T-35 WHEEL HOUSE"]]), "set/E-102.pdf")
+    archive.seek(0)
+    order = []
+    save_file = storage.save_file
+
+    def logged_save(ship_id, name, file_obj):
+        order.append(("saved", name))
+        return save_file(ship_id, name, file_obj)
+
+    def in_process(shards, file_hashes=None, reparse=False):
+        for shard in shards:
+            order.append(("parsed", os.path.basename(shard[0])))
+            yield shard, process_page_shard(*shard, (file_hashes or {}).get(shard[0]), reparse)
+
+    monkeypatch.setattr(storage, "save_file", logged_save)
+    monkeypatch.setattr(main.parser_manager, "_iter_shard_results", in_process)
+    response = TestClient(main.app).post("/api/upload/S1/archive", files={"file": ("set.zip", archive)}).json()
+
+    assert response["files"] == ["E-101.pdf", "cables.xlsx", "E-102.pdf"]
+    assert storage.manifest("S1").files.keys() == {"E-101.pdf", "cables.xlsx", "E-102.pdf"}
+    assert {"P2811", "L1101"} <= {c["cable_name"] for c in response["summary"]["cables"]}
+    # E-101 was parsed before the rest of the archive was read
+    assert order.index(("parsed", "E-101.pdf")) < order.index(("saved", "E-102.pdf"))
+
+
+def test_archive_members_on_gcs_are_not_downloaded_back(tmp_path, monkeypatch, make_pdf):
+    storage = GCSStorageService("ships", client=FakeClient(tmp_path / "bucket"), cache_dir=tmp_path / "gcs_cache")
+    monkeypatch.setattr(main, "storage_service", storage)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(make_pdf("a.pdf", [["P2811 DPYC-2.5 MSBD"]]), "E-101.pdf")
+    archive.seek(0)
+
+    response = TestClient(main.app).post("/api/upload/S1/archive", files={"file": ("set.zip", archive)}).json()
+
+    assert "P2811" in {c["cable_name"] for c in response["summary"]["cables"]}
+    assert storage.bucket.downloads == []
+
+
+def test_archive_over_the_caps_is_refused_before_anything_is_stored(tmp_path, monkeypatch):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    monkeypatch.setenv("ARCHIVE_MAX_TOTAL_MB", "1")
+    monkeypatch.setenv("ARCHIVE_MAX_MEMBERS", "3")
+    client = TestClient(main.app)
+
+    bomb = io.BytesIO()
+    with zipfile.ZipFile(bomb, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("E-101.pdf", b"%PDF-1.4")
+        zf.writestr("E-102.pdf", b"\0" * (2 * 1024 * 1024))
+    bomb.seek(0)
+    response = client.post("/api/upload/S1/archive", files={"file": ("bomb.zip", bomb)}, params={"extract": False})
+    assert response.status_code == 413
+
+    crowded = io.BytesIO()
+    with zipfile.ZipFile(crowded, "w") as zf:
+        for i in range(4):
+            zf.writestr(f"E-{i}.pdf", b"%PDF-1.4")
+    crowded.seek(0)
+    response = client.post("/api/upload/S1/archive", files={"file": ("many.zip", crowded)}, params={"extract": False})
+    assert response.status_code == 413
+    assert storage.list_files("S1") == []
+
+
+def test_archive_members_with_the_same_name_stay_distinct(tmp_path, monkeypatch, make_pdf):
+    storage = LocalStorageService(tmp_path)
+    monkeypatch.setattr(main, "storage_service", storage)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(make_pdf("r0.pdf", [["P2811 DPYC-2.5 MSBD"]]), "R0/E-101.pdf")
+        zf.write(make_pdf("r1.pdf", [["L1101 T-35 WHEEL HOUSE"]]), "R1/E-101.pdf")
+    archive.seek(0)
+
+    response = TestClient(main.app).post("/api/upload/S1/archive", files={"file": ("set.zip", archive)}).json()
+
+    assert response["files"] == ["E-101.pdf", "E-101 (2).pdf"]
+    names = [c["cable_name"] for c in response["summary"]["cables"]]
+    assert names.count("P2811") == 1 and names.count("L1101") == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.workers import PeakRSSWindow, WorkerPool, default_pool_size, detect_cpu_limit, detect_memory_limit
+from app.services.manager import ExtractionManager
+from app.services.parser import AdvancedCableParser
+
+
+def test_cgroup_v2_limits(tmp_path, monkeypatch):
+    monkeypatch.delenv("EXTRACT_WORKERS", raising=False)
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(16)))
+    (tmp_path / "cpu.max").write_text("200000 100000\n")
+    (tmp_path / "memory.max").write_text(str(4 * 1024 ** 3))
+
+    assert detect_cpu_limit(tmp_path) == 2.0
+    assert detect_memory_limit(tmp_path) == 4 * 1024 ** 3
+    assert default_pool_size(tmp_path) == 2
+
+    # Memory, not CPU, is the binding limit on a small instance
+    (tmp_path / "cpu.max").write_text("800000 100000\n")
+    (tmp_path / "memory.max").write_text(str(1024 ** 3))
+    assert default_pool_size(tmp_path) == 1
+
+
+def test_cgroup_v1_and_unlimited(tmp_path, monkeypatch):
+    monkeypatch.delenv("EXTRACT_WORKERS", raising=False)
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(4)))
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+
+    assert detect_cpu_limit(tmp_path) == 4.0
+    assert detect_memory_limit(tmp_path) is None
+    assert default_pool_size(tmp_path) == 4
+
+    monkeypatch.setenv("EXTRACT_WORKERS", "3")
+    assert default_pool_size(tmp_path) == 3
+
+
+def test_peak_rss_window_forgets_earlier_peaks():
+    first = PeakRSSWindow()
+    if first.peak_mb() is None:
+        pytest.skip("no procfs")
+    ballast = bytearray(200 * 1024 * 1024)
+    ballast[::4096] = b"x" * len(ballast[::4096])
+    del ballast
+    heavy = first.peak_mb()
+
+    # A later shard in the same long-lived worker must not report the earlier one's peak
+    assert PeakRSSWindow().peak_mb() < heavy - 100
+
+
+def test_peak_rss_window_samples_rss_without_a_resettable_mark(tmp_path):
+    (tmp_path / "clear_refs").mkdir()  # writes fail, as on kernels that refuse the reset
+    (tmp_path / "status").write_text("VmHWM:\t 900000 kB\nVmRSS:\t 102400 kB\n")
+    window = PeakRSSWindow(tmp_path)
+    (tmp_path / "status").write_text("VmHWM:\t 900000 kB\nVmRSS:\t 153600 kB\n")
+
+    assert not window.reset
+    assert window.peak_mb() == 150.0
+    assert PeakRSSWindow(tmp_path / "missing").peak_mb() is None
+
+
+def test_persistent_pool_serves_repeated_batches(make_pdf):
+    path = make_pdf("drawing.pdf", [["P2811 DPYC-2.5 MSBD"], ["L1101 T-35 WHEEL HOUSE"]])
+    expected = AdvancedCableParser().parse_file(path)
+
+    pool = WorkerPool(max_workers=1, max_tasks_per_child=1).start()
+    try:
+        manager = ExtractionManager(pool=pool, pages_per_shard=1)
+        assert manager.max_workers == 1
+        assert manager.extract_batch([path])["cables"] == expected
+    finally:
+        pool.shutdown()
@@ -10,11 +10,19 @@ const AVAILABLE_SHIPS = [
     { id: "K2024_FERRY", name: "K2024 - Passenger Ferry" }
 ];
 
+interface PotentialMiss {
+    page_number: number;
+    token: string;
+    offset: number;
+    context: string;
+}
+
 interface ExtractionSummary {
     total_count: number;
     system_distribution: Record<string, number>;
-    potential_misses: string[];
+    potential_misses: PotentialMiss[];
     processing_time_ms: number;
+    peak_worker_rss_mb?: number | null;
     ship_metadata: {
         hull_no: string;
         ship_type: string;
@@ -22,6 +30,14 @@ interface ExtractionSummary {
     cables: any[]; // Use any to avoid strict type checks initially, will map to Cable
 }
 
+interface ExtractionProgress {
+    pages_done: number;
+    total_pages: number;
+    files_done: number;
+    total_files: number;
+    cables_seen: number;
+}
+
 interface WDExtractionViewProps {
     onImportCables: (cables: Cable[]) => void;
     currentShipId: string;
@@ -38,6 +54,7 @@ const WDExtractionView: React.FC<WDExtractionViewProps> = ({ onImportCables, cur
     const [isLoading, setIsLoading] = useState(false);
     const [uploading, setUploading] = useState(false);
     const [result, setResult] = useState<ExtractionSummary | null>(null);
+    const [progress, setProgress] = useState<ExtractionProgress | null>(null);
     const [error, setError] = useState<string | null>(null);
     const [uploadedFiles, setUploadedFiles] = useState<string[]>([]);
 
@@ -62,7 +79,8 @@ const WDExtractionView: React.FC<WDExtractionViewProps> = ({ onImportCables, cur
             const formData = new FormData();
             formData.append('file', e.target.files[0]);
 
-            const response = await fetch(`${API_BASE}/api/upload/${selectedShipId}`, {
+            // extract=true warms the cache in the background, so Run Extraction is instant
+            const response = await fetch(`${API_BASE}/api/upload/${selectedShipId}?extract=true`, {
                 method: 'POST',
                 body: formData
             });
@@ -82,24 +100,48 @@ const WDExtractionView: React.FC<WDExtractionViewProps> = ({ onImportCables, cur
         setIsLoading(true);
         setError(null);
         setResult(null);
+        setProgress(null);
 
         try {
-            const response = await fetch(`${API_BASE}/api/extract/${selectedShipId}`, {
+            // NDJSON stream: per-page cable batches arrive while the batch is still running
+            const response = await fetch(`${API_BASE}/api/extract/${selectedShipId}/stream`, {
                 method: 'POST',
             });
 
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error(`Server Error: ${response.statusText}`);
             }
 
-            const data = await response.json();
-            setResult(data);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            const stream = { cablesSeen: 0, summary: null as ExtractionSummary | null };
+
+            const handleEvent = (event: any) => {
+                if (event.event === 'pages') stream.cablesSeen += event.cables.length;
+                if (event.progress) setProgress({ ...event.progress, cables_seen: stream.cablesSeen });
+                if (event.event === 'summary') stream.summary = event.summary;
+            };
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop() || '';
+                lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+            }
+            if (buffer.trim()) handleEvent(JSON.parse(buffer));
+
+            if (!stream.summary) throw new Error("Extraction stream ended without a summary");
+            setResult(stream.summary);
             setStep(3);
         } catch (err) {
             console.error(err);
             setError("Failed to connect to Extraction Backend.");
         } finally {
             setIsLoading(false);
+            setProgress(null);
         }
     };
 
@@ -227,6 +269,20 @@ const WDExtractionView: React.FC<WDExtractionViewProps> = ({ onImportCables, cur
                                 </button>
                             </div>
                         )}
+                        {isLoading && progress && (
+                            <div className="mt-4 text-sm text-gray-300">
+                                <div className="flex justify-between mb-1">
+                                    <span>Pages {progress.pages_done} / {progress.total_pages} · Files {progress.files_done} / {progress.total_files}</span>
+                                    <span>{progress.cables_seen} cables found</span>
+                                </div>
+                                <div className="h-2 bg-seastar-900 rounded overflow-hidden">
+                                    <div
+                                        className="h-full bg-seastar-cyan transition-all"
+                                        style={{ width: `${progress.total_pages ? (100 * progress.pages_done) / progress.total_pages : 100}%` }}
+                                    />
+                                </div>
+                            </div>
+                        )}
                         {error && <div className="mt-4 text-red-400 text-sm flex items-center gap-2"><AlertCircle size={16} /> {error}</div>}
                     </div>
                 )}
@@ -255,7 +311,7 @@ const WDExtractionView: React.FC<WDExtractionViewProps> = ({ onImportCables, cur
                             <div className="mb-6 bg-yellow-900/20 border border-yellow-900/50 p-4 rounded max-h-40 overflow-y-auto custom-scrollbar">
                                 <div className="text-xs font-bold text-yellow-500 mb-2 sticky top-0 bg-transparent">WARNING: Verify these patterns</div>
                                 {result.potential_misses.map((m, i) => (
-                                    <div key={i} className="text-xs text-yellow-200 font-mono border-b border-yellow-900/30 py-1 last:border-0">{m}</div>
+                                    <div key={i} className="text-xs text-yellow-200 font-mono border-b border-yellow-900/30 py-1 last:border-0">Page {m.page_number}: {m.token} (Context: {m.context}...)</div>
                                 ))}
                             </div>
                         )}
@@ -1,9 +1,15 @@
 import re
 import pandas as pd
-import pdfplumber
 from pathlib import Path
 from typing import List, Dict, Optional
 import os
+import sys
+
+# Cable-type normalization is shared with the backend parsers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.services.cable_types import CABLE_TYPES, normalize_cable_type, normalize_series
+from app.services.miss_detector import MissDetector
+from app.services.parser import AdvancedCableParser
 
 class ShipCableListParser:
     """
@@ -11,61 +17,8 @@ class ShipCableListParser:
     실제 도면 패턴: P2811, C0912, N1101 등
     """
     
-    # 케이블 타입 하드코딩 (JIS-C3410 기준)
-    CABLE_TYPES = {
-        # Single core 시리즈
-        'S1': 'S(Y)(S)1', 'S2': 'S(Y)(S)2.5', 'S4': 'S(Y)(S)4',
-        'S6': 'S(Y)(S)6', 'S10': 'S(Y)(S)10', 'S16': 'S(Y)(S)16',
-        'S25': 'S(Y)(S)25', 'S35': 'S(Y)(S)35', 'S50': 'S(Y)(S)50',
-        'S70': 'S(Y)(C)(S)70', 'S95': 'S(Y)(C)(S)95', 'S150': 'S(Y)(C)(S)150',
-        
-        # SPYC 시리즈
-        'SP1': 'SPYC(Y)(S)-1.5', 'SP2': 'SPYC(Y)(S)-2.5', 'SP4': 'SPYC(Y)(S)-4',
-        'SP6': 'SPYC(Y)(S)-6', 'SP10': 'SPYC(Y)(S)-10', 'SP16': 'SPYC(Y)(S)-16',
-        'SP25': 'SPYC(Y)(S)-25', 'SP35': 'SPYC(Y)(S)-35', 'SP50': 'SPYC(Y)(S)-50',
-        
-        # Double core 시리즈
-        'D1': 'D(Y)(S)1', 'D2': 'D(Y)(S)2', 'D4': 'D(Y)(S)4',
-        'D6': 'D(Y)(S)6', 'D10': 'D(Y)(S)10', 'D16': 'D(Y)(S)16',
-        'D25': 'D(Y)(S)25', 'D35': 'D(Y)(S)35', 'D50': 'D(Y)(S)50',
-        
-        # DPYC 시리즈
-        'DP1': 'DPYC(Y)(S)-1.5', 'DP2': 'DPYC(Y)(S)-2.5', 'DP4': 'DPYC(Y)(S)-4',
-        'DP6': 'DPYC(Y)(S)-6', 'DP10': 'DPYC(Y)(S)-10', 'DP16': 'DPYC(Y)(S)-16',
-        
-        # Three core 시리즈
-        'T1': 'T(Y)(S)1', 'T2': 'T(Y)(S)2', 'T4': 'T(Y)(S)4',
-        'T6': 'T(Y)(S)6', 'T10': 'T(Y)(S)10', 'T16': 'T(Y)(S)16',
-        'T25': 'T(Y)(S)25', 'T35': 'T(Y)(S)35', 'T50': 'T(Y)(S)50',
-        'T70': 'T(Y)(S)70', 'T95': 'T(Y)(S)95', 'T120': 'T(Y)(S)120',
-        'T150': 'T(Y)(S)150',
-        
-        # TPYC 시리즈
-        'TP1': 'TPYC(Y)(S)-1.5', 'TP2': 'TPYC(Y)(S)-2.5', 'TP4': 'TPYC(Y)(S)-4',
-        'TP10': 'TPYC(Y)(S)-10', 'TP16': 'TPYC(Y)(S)-16', 'TP25': 'TPYC(Y)(S)-25',
-        
-        # Multi core (M, TT 시리즈)
-        'M2': 'M(Y)(S)2', 'M4': 'M(Y)(S)4', 'M7': 'M(Y)(S)7',
-        'M12': 'M(Y)(S)12', 'M19': 'M(Y)(S)19', 'M27': 'M(Y)(S)27',
-        
-        'TT1': 'TT(Y)(S)1', 'TT1Q': 'TT(Y)(S)1Q', 'TT4': 'TT(Y)(S)4',
-        'TT7': 'TT(Y)(S)7', 'TT10': 'TT(Y)(S)10', 'TT14': 'TT(Y)(S)14',
-        
-        'TTS1': 'TTYC(Y)(S)-1', 'TTS1Q': 'TTYC(Y)(S)-1Q', 'TTS4': 'TTYC(Y)(S)-4',
-        
-        # Fire resistant 시리즈 (Regex Logic has priority for specific mappings)
-        # 'FD1': 'FD(Y)(S)1', 'FD2': 'FD(Y)(S)2', 'FD4': 'FD(Y)(S)4', 'FD6': 'FD(Y)(S)6',
-        # 'FM2': 'FM(Y)(S)2', 'FM4': 'FM(Y)(S)4', 'FM7': 'FM(Y)(S)7', 'FM12': 'FM(Y)(S)12',
-        'FT1': 'FT(Y)(S)1', 'FT2': 'FT(Y)(S)2', 'FT4': 'FT(Y)(S)4',
-        
-        # 기타
-        'DY1': 'DY-1', 'DY2': 'DY-2', 'TY2': 'TY-2', 'TY6': 'TY-6', 'TY10': 'TY-10',
-        'MY2': 'MY-2', 'MY4': 'MY-4', 'MY7': 'MY-7', 'MY12': 'MY-12',
-        'SY6': 'SY-6', 'SY10': 'SY-10', 'SY50': 'SY-50', 'SY70': 'SY-70',
-        'MS2': 'MS-2', 'MS4': 'MS-4', 'MS7': 'MS-7', 'MS12': 'MS-12',
-        '5P1': '5PYC(Y)-1.5', '5P2': '5PYC(Y)-2.5',
-        'RG6': 'RG-6', 'RG12U': 'RG-12/U', 'CAT5': 'STP CAT-5', 'CAT6': 'STP CAT-6',
-    }
+    # 케이블 타입 하드코딩 (JIS-C3410 기준): app.services.cable_types
+    CABLE_TYPES = CABLE_TYPES
     
     # 약어 확장 (도면에서 사용되는 공간/장비 약어)
     ABBREVIATIONS = {
@@ -91,16 +44,17 @@ class ShipCableListParser:
     def extract_text_from_pdf(self) -> List[str]:
         """PDF에서 텍스트 추출"""
         try:
-            text_pages = []
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_pages.append(text)
-            return text_pages
+            return [text for _, text in self.iter_text_pages()]
         except Exception as e:
             print(f"PDF 추출 실패: {e}")
             return []
+
+    def iter_text_pages(self):
+        """페이지 단위 텍스트 스트리밍: (페이지 번호, 텍스트), 처리가 끝난 페이지는 바로 메모리 해제"""
+        for page_num, page in AdvancedCableParser.iter_pages(self.pdf_path):
+            text = page.extract_text()
+            if text:
+                yield page_num, text
     
     def parse_circuit_number(self, text: str) -> List[Dict]:
         """
@@ -164,19 +118,12 @@ class ShipCableListParser:
                     cable_info['FROM_ROOM'] = rooms[0]
                 
                 cables.append(cable_info)
-            
-            # [VERIFICATION] Check for potential misses
-            # Look for patterns that resemble circuit numbers but were not caught
-            # e.g., P-1234, P 1234, or different prefixes
-            loose_pattern = r'\b([A-Z]{1,2}[-\s]?\d{3,4}[A-Z]?)\b'
-            potential_matches = re.findall(loose_pattern, line)
-            for pot in potential_matches:
-                # Clean up potential match to compare
-                clean_pot = pot.replace('-', '').replace(' ', '')
-                if clean_pot not in [c['CABLE_NAME'] for c in cables] and clean_pot not in self.detected_potential_misses:
-                    # Ignore common non-cable strings
-                    if not re.match(r'^(IEC|JIS|NK|POS|NO|DWG|REF|REV|SEC|PAGE|DATE|APP|CHK|DRW|TYP|CAP|AC\d|DC\d|OE-)', clean_pot):
-                         self.detected_potential_misses.append(f"Page {self.current_page}: {pot} (Context: {line.strip()[:50]}...)")
+
+        # [VERIFICATION] Check for potential misses
+        # Look for patterns that resemble circuit numbers but were not caught
+        # e.g., P-1234, P 1234, or different prefixes (reported once per document)
+        self.detected_potential_misses.extend(
+            self.miss_detector.detect(text, self.current_page, {c['CABLE_NAME'] for c in cables}))
 
         return cables
 
@@ -184,6 +131,7 @@ class ShipCableListParser:
         self.pdf_path = pdf_path
         self.cable_data = []
         self.detected_potential_misses = []
+        self.miss_detector = MissDetector()
         self.current_page = 0
     
     def normalize_cable_type(self, cable_type_str: str) -> str:
@@ -191,162 +139,7 @@ class ShipCableListParser:
         케이블 타입 문자열을 표준 형식으로 변환
         하이픈 유무 상관없이 처리: D-2, D2 모두 D(Y)(S)2로 변환
         """
-        if not cable_type_str:
-            return ''
-        
-        # 공백 제거 및 대문자 변환
-        original = cable_type_str.strip().upper().replace(' ', '')
-        
-        # 하이픈 제거한 버전
-        no_hyphen = original.replace('-', '').replace('(', '').replace(')', '')
-        
-        # 1. 직접 매칭 시도 (하이픈 있는 버전과 없는 버전 모두)
-        for key, value in self.CABLE_TYPES.items():
-            key_no_hyphen = key.replace('-', '')
-            value_no_hyphen = value.replace('(', '').replace(')', '').replace('-', '')
-            
-            if (key_no_hyphen == no_hyphen or 
-                key.upper() == original or
-                value.upper() == original or
-                value_no_hyphen.upper() == no_hyphen):
-                return value
-        
-        # 2. 패턴 매칭 (하이픈 유무 상관없이)
-        
-        # Single core: S-2, S2 → S(Y)(S)2
-        match = re.match(r'^S-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            valid_nums = ['1', '2', '4', '6', '10', '16', '25', '35', '50', '70', '95', '150']
-            if num in valid_nums:
-                if num in ['70', '95', '150']:
-                    return f'S(Y)(C)(S){num}'
-                return f'S(Y)(S){num if num != "1" else "1"}'
-        
-        # SPYC: SP-2, SP2 → SPYC(Y)(S)-2.5
-        match = re.match(r'^SP-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            num_map = {'1': '1.5', '2': '2.5', '4': '4', '6': '6', '10': '10', 
-                       '16': '16', '25': '25', '35': '35', '50': '50'}
-            if num in num_map:
-                return f'SPYC(Y)(S)-{num_map[num]}'
-        
-        # Double core: D-2, D2 → D(Y)(S)2  
-        match = re.match(r'^D-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            valid_nums = ['1', '2', '4', '6', '10', '16', '25', '35', '50']
-            if num in valid_nums:
-                return f'D(Y)(S){num}'
-        
-        # DPYC: DP-2, DP2 → DPYC(Y)(S)-2.5
-        match = re.match(r'^DP-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            num_map = {'1': '1.5', '2': '2.5', '4': '4', '6': '6', '10': '10', '16': '16'}
-            if num in num_map:
-                return f'DPYC(Y)(S)-{num_map[num]}'
-        
-        # Three core: T-35, T35 → T(Y)(S)35
-        match = re.match(r'^T-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            valid_nums = ['1', '2', '4', '6', '10', '16', '25', '35', '50', '70', '95', '120', '150']
-            if num in valid_nums:
-                return f'T(Y)(S){num}'
-        
-        # TPYC: TP-35, TP35 → TPYC(Y)(S)-35
-        match = re.match(r'^TP-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            num_map = {'1': '1.5', '2': '2.5', '4': '4', '6': '6', '10': '10', 
-                       '16': '16', '25': '25', '35': '35', '50': '50'}
-            if num in num_map:
-                return f'TPYC(Y)(S)-{num_map[num]}'
-        
-        # Multi core: M-7, M7 → M(Y)(S)7
-        match = re.match(r'^M-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            valid_nums = ['2', '4', '7', '12', '19', '27', '37', '44']
-            if num in valid_nums:
-                return f'M(Y)(S){num}'
-        
-        # TT series: TT-1, TT1 → TT(Y)(S)1
-        match = re.match(r'^TT-?(\d+)([QS]?)', original)
-        if match:
-            num = match.group(1)
-            suffix = match.group(2)
-            valid_nums = ['1', '2', '4', '7', '10', '14']
-            if num in valid_nums:
-                if suffix == 'Q':
-                    return f'TT(Y)(S){num}Q'
-                return f'TT(Y)(S){num}'
-        
-        # TTS/TTYC series: TTS-1, TTS1 → TTYC(Y)(S)-1
-        match = re.match(r'^TTS-?(\d+)([QS]?)', original)
-        if match:
-            num = match.group(1)
-            suffix = match.group(2)
-            if suffix == 'Q':
-                return f'TTYC(Y)(S)-{num}Q'
-            return f'TTYC(Y)(S)-{num}'
-        
-        # Fire resistant: FD-2, FD2 → FD(Y)(S)2 or FDPYC(Y)(S)-2.5FA
-        match = re.match(r'^F([DTM])-?(\d+)', original)
-        if match:
-            prefix = match.group(1)
-            num = match.group(2)
-            
-            if prefix == 'D':
-                num_map = {'1': '1.5', '2': '2.5', '4': '4', '6': '6'}
-                if num in num_map:
-                    return f'FDPYC(Y)(S)-{num_map[num]}FA'
-            elif prefix == 'T':
-                num_map = {'1': '1.5', '2': '2.5', '4': '4', '6': '6', '10': '10', 
-                           '16': '16', '25': '25', '35': '35', '50': '50'}
-                if num in num_map:
-                    return f'FTPYC(Y)(S)-{num_map[num]}FA'
-            elif prefix == 'M':
-                if num in ['2', '4', '7', '12', '19']:
-                    return f'FMPYC(Y)(S)-{num}FA'
-        
-        # 특수 타입들 (하이픈 유지 필요): DY-1, TY-2, MY-7, SY-6 등
-        match = re.match(r'^([DTMS])Y-?(\d+)', original)
-        if match:
-            prefix = match.group(1)
-            num = match.group(2)
-            return f'{prefix}Y-{num}'
-        
-        # MS series: MS-2, MS2 → MS-2
-        match = re.match(r'^MS-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            return f'MS-{num}'
-        
-        # 5P series: 5P-1, 5P1 → 5PYC(Y)-1.5
-        match = re.match(r'^5P-?(\d+)', original)
-        if match:
-            num = match.group(1)
-            num_map = {'1': '1.5', '2': '2.5'}
-            if num in num_map:
-                return f'5PYC(Y)-{num_map[num]}'
-        
-        # RG series: RG-6, RG6 → RG-6
-        match = re.match(r'^RG-?(\w+)', original)
-        if match:
-            suffix = match.group(1)
-            return f'RG-{suffix}'
-        
-        # CAT series: CAT-5, CAT5 → STP CAT-5
-        match = re.match(r'^(?:STP)?-?CAT-?([56])', original)
-        if match:
-            num = match.group(1)
-            return f'STP CAT-{num}'
-        
-        # 매칭 안되면 원본 반환
-        return original
+        return normalize_cable_type(cable_type_str)
     
     def expand_abbreviation(self, abbr: str) -> str:
         """약어를 전체 이름으로 확장"""
@@ -356,22 +149,25 @@ class ShipCableListParser:
         """전체 처리 파이프라인"""
         print(f"📄 PDF 파일 처리 중: {self.pdf_path}")
         
-        text_pages = self.extract_text_from_pdf()
+        # 각 페이지에서 케이블 정보 추출 (페이지 단위 스트리밍)
+        all_cables = []
+        page_count = 0
+        try:
+            for page_num, text in self.iter_text_pages():
+                page_count += 1
+                self.current_page = page_num
+                cables = self.parse_circuit_number(text)
+                if cables:
+                    all_cables.extend(cables)
+                    print(f"  페이지 {page_num}: {len(cables)}개 케이블 발견")
+        except Exception as e:
+            print(f"PDF 추출 실패: {e}")
         
-        if not text_pages:
+        if not page_count:
             print("❌ 텍스트 추출 실패")
             return []
         
-        print(f"✓ {len(text_pages)}페이지 텍스트 추출 완료")
-        
-        # 각 페이지에서 케이블 정보 추출
-        all_cables = []
-        for idx, text in enumerate(text_pages):
-            self.current_page = idx + 1
-            cables = self.parse_circuit_number(text)
-            if cables:
-                all_cables.extend(cables)
-                print(f"  페이지 {idx+1}: {len(cables)}개 케이블 발견")
+        print(f"✓ {page_count}페이지 텍스트 추출 완료")
         
         # 중복 제거 (같은 케이블 이름)
         unique_cables = {}
@@ -390,7 +186,7 @@ class ShipCableListParser:
             print("!" * 80)
             print(f"총 {len(self.detected_potential_misses)}개 의심 항목:")
             for miss in self.detected_potential_misses[:20]: # Show top 20
-                print(f"  - {miss}")
+                print(f"  - Page {miss.page_number}: {miss.token} (Context: {miss.context}...)")
             if len(self.detected_potential_misses) > 20:
                 print(f"  ... 외 {len(self.detected_potential_misses) - 20}개 더 있음")
             print("!" * 80 + "\n")
@@ -409,7 +205,7 @@ class ShipCableListParser:
         
         # 케이블 타입 정규화
         if 'CABLE_TYPE' in df.columns:
-            df['CABLE_TYPE'] = df['CABLE_TYPE'].apply(self.normalize_cable_type)
+            df['CABLE_TYPE'] = normalize_series(df['CABLE_TYPE'])
         
         # 약어 확장
         for col in ['FROM_ROOM', 'TO_ROOM']: